@@ -2,55 +2,31 @@
 It is called from the analytics module in the main menu of the app and prints the calculated streaks.
 """
 
-import sqlite3
 from datetime import datetime, timedelta
 
+import database_and_table_creation_module
+import streak_table_module
 
-def calculate_daily_and_weekly_streaks(database, habit_table_name, progression_table_name):
-    """This function calculates the streak for each habit. It is called by the calculate_and_print_streaks function in
-     this module which, in turn, is called by the main menu. The function makes in its calculations a distinction
-     between daily and weekly streaks by calling upon two other functions: count_daily_streak and count_weekly_streak.
-     """
-    # Connect to the database.
-    conn = sqlite3.connect(database)
-    cursor = conn.cursor()
 
+def calculate_daily_and_weekly_streaks(database, habit_table_name, progression_table_name,
+                                       user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function provides the current streak for each habit of the user (the default user, unless a user_id is
+    given). It is called by the calculate_and_print_streaks function in this module which, in turn, is called by the
+    main menu.
+
+    The streaks are read from the Streak_table through the streak_table_module, which keeps them up-to-date when the
+    user updates their progression and when new dates are added. So instead of going through the complete history of
+    every habit, only one row per habit is read. The streaks in the Streak_table are calculated in SQL by the
+    streak_engine_module. The two functions below, count_daily_streak and count_weekly_streak, are the original
+    Python calculation. They are kept as the reference against which the outcome of the streak engine is tested.
+    """
     # Next, a dictionary is created in which the habits with corresponding streaks are stored.
     stored_streaks = {}
 
-    # Query the Habit_table for every habit name and periodicity.
-    cursor.execute(f"SELECT habit_name, habit_periodicity FROM {habit_table_name}")
-    habits = cursor.fetchall()
-
-    # Store today's date into the variable 'today'.
-    today = datetime.today()
-
-    # Using a for loop, for every habit, a query is performed where the dates and 'completed' status are retrieved and
-    # up to 'today'. This data is then stored into the dates_and_completions variable. If the habit in that loop
-    # iteration is a daily habit, it is fed into the count_daily_streak function. If it is a weekly habit, it is fed
-    # into the count_weekly_streak function. These last two functions basically count the streak for the weekly and
-    # daily habits.
-    for habit, periodicity in habits:
-        # the '<' symbol on the next line makes sure that 'today' is included in the query and streak calculation.
-        cursor.execute(
-            f"""SELECT date, completed FROM {progression_table_name} 
-            WHERE habit_name = ? AND date <= ? ORDER BY date DESC""",
-            (habit, today))
-
-        # The dates_and_completions variable contains for every habit, pairs of 'date' and 'completed', ordered from
-        # most recent to oldest.
-        dates_and_completions = cursor.fetchall()
-
-        if periodicity == 'daily':
-            count = count_daily_streak(dates_and_completions)
-        elif periodicity == 'weekly':
-            count = count_weekly_streak(dates_and_completions, today)
-
-        # Here the count with its habit gets stored in the dictionary stored_streaks defined above.
-        stored_streaks[habit] = (periodicity, count)
-
-    # Close the database.
-    conn.close()
+    # Here the current streak of every habit gets stored in the dictionary stored_streaks defined above.
+    for habit, periodicity, current_streak, longest_streak in streak_table_module.read_streaks(
+            database, habit_table_name, progression_table_name, user_id=user_id):
+        stored_streaks[habit] = (periodicity, current_streak)
 
     # Then the stored streak data is returned from this function, back into the initially calculate_and_print_streaks
     # function that initially called this calculate_daily_and_weekly_streaks function.
@@ -58,14 +34,13 @@ def calculate_daily_and_weekly_streaks(database, habit_table_name, progression_t
 
 
 def count_daily_streak(daily_streak):
-    """This function is called by the calculate_daily_and_weekly_streaks. From this function it gets fed daily habit
-    data consisting of dates and 'completed' data, sorted from most recent to oldest.
+    """This function is the Python reference for the daily current streak of the streak_engine_module. It gets fed
+    daily habit data consisting of dates and 'completed' data, sorted from most recent to oldest.
     - First, the streak count is set to '0'.
     - Next, for every 'completed' value that is equal to '1' (completed habit), the count is increased with 1.
     - This continues, until a row is encountered where the completed is not equal to '1', breaking
       the for loop / streak.
-    - Then the count value (being the daily streak) is returned to the calculate_daily_and_weekly_streaks after
-    which it is stored with the habit name in stored_streaks.
+    - Then the count value (being the daily streak) is returned.
     """
     count = 0
     for date, completed in daily_streak:
@@ -126,11 +101,12 @@ def count_weekly_streak(completions, today):
     return count
 
 
-def calculate_and_print_streaks(database, habit_table_name, progression_table_name):
+def calculate_and_print_streaks(database, habit_table_name, progression_table_name,
+                                user_id=database_and_table_creation_module.DEFAULT_USER_ID):
     """This function gets called from the main menu and initializes the streak calculations. Next, it prints them
     using a for loop."""
     input_from_streak_calculation = calculate_daily_and_weekly_streaks(database, habit_table_name,
-                                                                       progression_table_name)
+                                                                       progression_table_name, user_id)
     print("")
     for habit, (periodicity, count) in input_from_streak_calculation.items():
         print(f"Habit: {habit}, current {periodicity} streak: {count}")
@@ -3,47 +3,34 @@ the user ever achieved. The module is called from the analytics module in the ma
 calculated longest streaks ever.
 """
 
-import sqlite3
 from datetime import datetime, timedelta
 
+import database_and_table_creation_module
+import streak_table_module
 
-def calculate_longest_streaks(database, habit_table_name, progression_table_name):
-    """This functionCalculates the longest sequential completions for each habit, distinguishing between daily and
-    weekly habits. It provides the calculate_and_print_longest_streaks_ever function with a dictionary of habits and
-     their longest streaks ever.
-    """
-    # Make a connection to the database.
-    conn = sqlite3.connect(database)
-    cursor = conn.cursor()
 
+def calculate_longest_streaks(database, habit_table_name, progression_table_name,
+                              user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function provides the longest sequential completions for each habit of the user (the default user,
+    unless a user_id is given), distinguishing between daily and weekly habits. It provides the
+    calculate_and_print_longest_streaks_ever function with a dictionary of habits and their longest streaks ever.
+
+    Just like the current streaks, the longest streaks are read from the Streak_table through the
+    streak_table_module, which keeps them up-to-date. So only one row per habit is read. The streaks in the
+    Streak_table are calculated in SQL by the streak_engine_module. The two functions below,
+    calculate_longest_daily_streak and calculate_longest_weekly_streak, are the original Python calculation. They are
+    kept as the reference against which the outcome of the streak engine is tested.
+    """
     # Next, a dictionary is created in which the habits with corresponding record-streaks are stored.
     longest_streaks = {}
 
-    # Query the Habit_table for every habit name and periodicity.
-    cursor.execute(f"SELECT habit_name, habit_periodicity FROM {habit_table_name}")
-    habits = cursor.fetchall()
-
-    # Using a for loop, for every habit, a query is performed where the dates and 'completed' status are retrieved and
-    # up to 'today'. This data is then stored into the dates_and_completions variable. If the habit in that loop
-    # iteration is a daily habit, it is fed into the calculate_longest_daily_streak function. If it is a weekly habit,
-    # it is fed into the calculate_longest_weekly_streak function. These last two functions basically count the longest
-    # streak ever for the weekly and daily habits.
-    for habit, periodicity in habits:
-        cursor.execute(f"""SELECT date, completed FROM {progression_table_name}
-        WHERE habit_name = ? ORDER BY date""", (habit,))
-        dates_and_completions = cursor.fetchall()
-
-        if periodicity == 'daily':
-            longest_count = calculate_longest_daily_streak(dates_and_completions)
-        elif periodicity == 'weekly':
-            longest_count = calculate_longest_weekly_streak(dates_and_completions)
-
-        # Here the count with its habit gets stored in the dictionary longest_streaks defined above. Periodicity is
-        # only included so that it can be printed later on.
+    # Here the count with its habit gets stored in the dictionary longest_streaks defined above. Periodicity is
+    # only included so that it can be printed later on.
+    for habit, periodicity, current_streak, longest_count in streak_table_module.read_streaks(
+            database, habit_table_name, progression_table_name, user_id=user_id):
         longest_streaks[habit] = (longest_count, periodicity)
 
-    # Close database and return the longest_streaks values to the calculate_and_print_longest_streaks_ever function.
-    conn.close()
+    # Return the longest_streaks values to the calculate_and_print_longest_streaks_ever function.
     return longest_streaks
 
 
@@ -56,7 +43,7 @@ def calculate_longest_daily_streak(completions):
     Then, through the for loop, for every (normalized) date and completed status, it is checked whether the habit was
     completed ('1') on that date, and next, if the previous day there also was a check-off. If so, then the
     current_count is increased by 1. The longest count (ever), is the highest (max) of the current count and the
-    previous longest count. In the end, the longest_count value gets returned to the calculate_longest_streaks function.
+    previous longest count. In the end, the longest_count value gets returned.
     """
     longest_count = current_count = 0
     last_date = None
@@ -128,10 +115,12 @@ def calculate_longest_weekly_streak(completions):
     return longest_count
 
 
-def calculate_and_print_longest_streaks_ever(database, habit_table_name, progression_table_name):
+def calculate_and_print_longest_streaks_ever(database, habit_table_name, progression_table_name,
+                                             user_id=database_and_table_creation_module.DEFAULT_USER_ID):
     """This function gets called from the main menu and initializes the calculations of the longest streak ever per
     habit. Next, it prints them using a for loop."""
-    input_from_streak_calculation = calculate_longest_streaks(database, habit_table_name, progression_table_name)
+    input_from_streak_calculation = calculate_longest_streaks(database, habit_table_name, progression_table_name,
+                                                              user_id)
     print("")
     for habit, (count, periodicity) in input_from_streak_calculation.items():
         print(f"Habit: {habit}, longest {periodicity} streak ever: {count}")
@@ -0,0 +1,248 @@
+"""This module is a local HTTP service with a JSON API over the habit database. Scripts and other programs can use it
+instead of starting a new command line process for every action. It offers:
+
+GET    /habits?periodicity=daily      list the habits (optionally of one periodicity)
+POST   /habits                        add a habit: {"habit_name": ..., "habit_description": ...,
+                                      "habit_periodicity": ...}
+DELETE /habits/<habit_name>           delete a habit and its progression
+GET    /progression/<date>            the progression of all habits on a date (YYYY-MM-DD)
+POST   /progression/<date>            update the progression on a date: {"habit_name": ..., "completed": 1}, or a list
+                                      of such objects
+GET    /streaks                       the current and longest streaks of all habits
+
+Every request works on the habits of one user, given by name with the query parameter 'user' (for example
+/habits?user=anakin). Without it, the default user is used. Adding a habit for a new user name adds the user as well.
+
+The server is built on asyncio: one event loop accepts the connections and reads the requests, so many clients can be
+connected at the same time. The SQLite work is done in a pool of worker threads. Every worker thread keeps its own
+connection (see connection_manager_module), which is opened when the worker starts and reused for all its requests.
+Because the database is in WAL mode, reading requests do not block each other or the writer. Every request runs in
+one transaction. Requests that write take the write lock when their transaction starts (see writes_data), so
+concurrent writers wait for each other instead of failing with 'database is locked'. The actions themselves are the
+functions of the command_line_module, so the input is checked in the same way as in the main menu. Invalid input gives
+status 400, and an unknown user, habit or path status 404.
+
+GET /progression/<date> and GET /streaks first add the dates up to today and the missing progression rows (see
+backfill), like the analytics menu does, so both show the same days, also when the server runs for several days. This
+only takes the write lock when dates or rows are actually missing, which is once a day and after a habit is added; the
+requests themselves run in reading transactions.
+
+Start the server with: python api_server_module.py --port 8080
+"""
+
+import argparse
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import command_line_module
+import connection_manager_module
+import database_and_table_creation_module
+import date_module
+import main_habit_tracker_app
+import progression_module
+import update_progression_module
+import user_module
+
+# The HTTP status texts that the server uses.
+STATUS_TEXTS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                500: 'Internal Server Error'}
+
+# The largest request body that is accepted, in bytes.
+MAX_BODY_SIZE = 10 * 1024 * 1024
+
+
+def handle_request(database, method, path, query, body):
+    """This function handles one request and returns the HTTP status and the JSON outcome. It runs in a worker
+    thread, and does all its work in one transaction, which takes the write lock at its start if the request writes.
+    A reading request can still have to write, for example to store streaks that were not stored yet. If that fails
+    because another request is writing, the request is run again with the write lock. Invalid input gives status 400
+    and an unknown user or habit status 404, both with an 'error'."""
+    parts = [unquote(part) for part in path.strip('/').split('/')]
+    try:
+        if method == 'GET' and (parts == ['streaks'] or parts[0] == 'progression'):
+            backfill(database)
+        try:
+            return run_request(database, method, parts, query, body, writes_data(method, parts))
+        except sqlite3.OperationalError:
+            if writes_data(method, parts):
+                raise
+            return run_request(database, method, parts, query, body, True)
+    except database_and_table_creation_module.NotFoundError as error:
+        return 404, {'error': str(error)}
+    except ValueError as error:
+        return 400, {'error': str(error)}
+
+
+def run_request(database, method, parts, query, body, immediate):
+    """This function runs a request in one transaction, which takes the write lock at its start if immediate is
+    True."""
+    with connection_manager_module.transaction(database, immediate=immediate):
+        user_id = user_module.user_id_for_name(
+            database, query.get('user', [database_and_table_creation_module.DEFAULT_USER_NAME])[0],
+            create=method == 'POST' and parts == ['habits'])
+        return route_request(database, method, parts, query, body, user_id)
+
+
+def writes_data(method, parts):
+    """This function returns whether a request changes the database: every request except the GET requests."""
+    return method != 'GET'
+
+
+def backfill(database):
+    """This function adds the dates up to today to the Date_table and the missing rows to the Progression_table. It
+    is called by the GET requests for the progression and the streaks, so that they work on the same days. It first
+    checks, without writing, whether anything is missing, and only then takes the write lock, in a transaction of its
+    own."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    if database_and_table_creation_module.table_type(database, 'Metadata_table') is not None and \
+            progression_module.Progression.progression_up_to_date(c, 'Habit_table', 'Metadata_table'):
+        return
+    with connection_manager_module.transaction(database, immediate=True):
+        date_module.Date.update_dates(database, 'Date_table')
+        progression_module.Progression.combine_habits_dates(database, 'Habit_table', 'Date_table',
+                                                            'Progression_table')
+
+
+def route_request(database, method, parts, query, body, user_id):
+    """This function calls the function that belongs to the method and path of the request, for the given user."""
+    if parts == ['habits']:
+        if method == 'GET':
+            return 200, command_line_module.list_habits(database, query.get('periodicity', [None])[0], user_id)
+        if method == 'POST':
+            habit = json_object(body)
+            return 201, command_line_module.add_habit(database, str(habit.get('habit_name', '')),
+                                                      str(habit.get('habit_description', '')),
+                                                      habit.get('habit_periodicity'), user_id)
+        return 405, {'error': "Use GET or POST."}
+    if len(parts) == 2 and parts[0] == 'habits':
+        if method == 'DELETE':
+            return 200, command_line_module.delete_habit(database, parts[1], user_id)
+        return 405, {'error': "Use DELETE."}
+    if len(parts) == 2 and parts[0] == 'progression':
+        day = parts[1]
+        if method == 'GET':
+            if not command_line_module.is_iso_date(day):
+                raise ValueError(f"Invalid date '{day}': use YYYY-MM-DD.")
+            return 200, {'date': day, 'progression': [
+                {'habit_name': habit_name, 'completed': completed}
+                for date, habit_name, completed in update_progression_module.read_day_progression(database, day,
+                                                                                                  user_id)]}
+        if method == 'POST':
+            updates = json.loads(body or b'null')
+            updates = updates if isinstance(updates, list) else [updates]
+            if not all(isinstance(update, dict) for update in updates):
+                raise ValueError("The body must be an object or a list of objects.")
+            return 200, command_line_module.mark_habits(
+                database, [(str(update.get('habit_name', '')).strip().lower(), day, update.get('completed', 1))
+                           for update in updates], user_id)
+        return 405, {'error': "Use GET or POST."}
+    if parts == ['streaks']:
+        if method == 'GET':
+            return 200, command_line_module.habit_streaks(database, user_id)
+        return 405, {'error': "Use GET."}
+    return 404, {'error': f"Unknown path '/{'/'.join(parts)}'."}
+
+
+def json_object(body):
+    """This function reads the body of a request as a JSON object."""
+    try:
+        value = json.loads(body or b'{}')
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Invalid JSON: {error}")
+    if not isinstance(value, dict):
+        raise ValueError("The body must be a JSON object.")
+    return value
+
+
+async def handle_connection(reader, writer, database, executor):
+    """This function reads the requests of one client connection, lets a worker thread handle them, and writes the
+    responses. The connection stays open for more requests (keep-alive), unless the client asks to close it."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            headers = {}
+            while True:
+                header_line = await reader.readline()
+                if header_line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = header_line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            # A request that cannot be read gets status 400, and the connection is closed, because the end of the
+            # request (and so the start of the next one) is not known.
+            request_parts = request_line.decode('latin-1').split()
+            content_length = headers.get('content-length', '0')
+            keep_alive = False
+            if len(request_parts) != 3:
+                status, payload = 400, {'error': "Invalid request line: use METHOD /path HTTP/1.1."}
+            elif not (content_length.isascii() and content_length.isdigit()):
+                status, payload = 400, {'error': "Invalid Content-Length: use a number of bytes."}
+            elif int(content_length) > MAX_BODY_SIZE:
+                status, payload = 400, {'error': "The request body is too large."}
+            else:
+                method, target, version = request_parts
+                body = await reader.readexactly(int(content_length)) if int(content_length) else b''
+                url = urlsplit(target)
+                try:
+                    status, payload = await loop.run_in_executor(executor, handle_request, database, method.upper(),
+                                                                 url.path, parse_qs(url.query), body)
+                except Exception as error:
+                    status, payload = 500, {'error': str(error)}
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+            response_body = json.dumps(payload).encode('utf-8')
+            writer.write(f"HTTP/1.1 {status} {STATUS_TEXTS.get(status, '')}\r\n"
+                         f"Content-Type: application/json\r\n"
+                         f"Content-Length: {len(response_body)}\r\n"
+                         f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1')
+                         + response_body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(database='Habit_app_database.db', host='127.0.0.1', port=8080, workers=8):
+    """This function prepares the database (see bootstrap in the main module), starts the pool of worker threads
+    (every worker opens its connection to the database when it starts), and starts the server. It returns the server
+    and the pool of worker threads."""
+    main_habit_tracker_app.bootstrap(database)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='habit-api',
+                                  initializer=connection_manager_module.get_connection, initargs=(database,))
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(reader, writer, database, executor),
+                                        host, port)
+    return server, executor
+
+
+async def serve(database='Habit_app_database.db', host='127.0.0.1', port=8080, workers=8):
+    """This function starts the server and handles requests until it is stopped (for example with Ctrl+C)."""
+    server, executor = await start_server(database, host, port, workers)
+    print(f"Habit tracker API listening on http://{host}:{server.sockets[0].getsockname()[1]}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="HTTP/JSON API of the habit tracker.")
+    parser.add_argument('--database', default='Habit_app_database.db', help="the database file")
+    parser.add_argument('--host', default='127.0.0.1', help="the address to listen on")
+    parser.add_argument('--port', type=int, default=8080, help="the port to listen on")
+    parser.add_argument('--workers', type=int, default=8, help="the number of worker threads for the database")
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(serve(arguments.database, arguments.host, arguments.port, arguments.workers))
+    except KeyboardInterrupt:
+        print("API server stopped.")
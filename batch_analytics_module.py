@@ -0,0 +1,127 @@
+"""This module calculates the current and longest streaks of the habits in many database files at once, for example
+every night for thousands of databases with the habits of one user each. Going through the databases one by one uses
+only one processor core. Here, the databases are spread over a pool of worker processes (ProcessPoolExecutor), so all
+cores are used. The databases are handed to the workers in chunks of chunk_size databases, so the cost of sending
+work to a process is paid once per chunk instead of once per database.
+
+Every worker opens its database read-only (see read_only_database in the connection_manager_module), so the
+databases are never changed, and calculates the streaks of every user in it with the streak_engine_module, from the
+stored progression. The dates after the last stored date, which the application adds when the user opens it, count
+as not completed (see current_streak_up_to_today). A database of an older version is not upgraded, but reported with
+an 'error': open it with the application first. The connection to the database is closed afterwards, so a worker never
+keeps thousands of files open.
+
+The outcomes are written to one JSON Lines file (gzip-compressed if the name ends with .gz) while the workers are
+still busy: one line per database, in the order of the databases. A database that cannot be read gives a line with an
+'error', and the other databases are still done. At the end, the number of databases per second is reported:
+python batch_analytics_module.py user_databases/ streaks.jsonl.gz --workers 8 --chunk-size 16
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import connection_manager_module
+import database_and_table_creation_module
+import export_module
+import streak_engine_module
+
+# The default number of databases that is handed to a worker process at once.
+DEFAULT_CHUNK_SIZE = 8
+
+
+def database_files(paths):
+    """This function returns the database files of the given paths, in the given order. A path that is a directory
+    gives all files in it that end with .db, sorted by name."""
+    databases = []
+    for path in paths:
+        if os.path.isdir(path):
+            databases.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.db')))
+        else:
+            databases.append(path)
+    return databases
+
+
+def current_streak_up_to_today(periodicity, current_streak, last_date, today):
+    """This function returns the current streak of a habit, taking into account that the dates after last_date (the
+    last stored date of the habit) up to today are not stored yet. They count as not completed, as they would after
+    the application added them: a daily habit then has no current streak, and a weekly habit only keeps its current
+    streak if its last stored date is in the week of today."""
+    if last_date is None:
+        return 0
+    if periodicity == 'daily':
+        return current_streak if last_date >= today.isoformat() else 0
+    week_start = (today - timedelta(days=today.weekday())).isoformat()
+    return current_streak if last_date >= week_start else 0
+
+
+def analyse_database(database):
+    """This function runs in a worker process. It opens the database read-only and returns, for every user in it,
+    the current and longest streak of every habit: {'database': ..., 'users': [{'user_name': ..., 'habits': [...]}]}.
+    If the database cannot be read or has an older layout, it returns {'database': ..., 'error': ...} instead."""
+    if not os.path.isfile(database):
+        return {'database': database, 'error': "The database file does not exist."}
+    read_only_database = connection_manager_module.read_only_database(database)
+    try:
+        c = connection_manager_module.get_connection(read_only_database).cursor()
+        c.execute("PRAGMA user_version")
+        schema_version = c.fetchone()[0]
+        if schema_version < database_and_table_creation_module.SCHEMA_VERSION:
+            return {'database': database, 'error': f"The database has an older layout (version {schema_version}): "
+                                                   f"open it with the application first to upgrade it."}
+
+        today = date.today()
+        c.execute("SELECT user_id, user_name FROM User_table ORDER BY user_id")
+        users = []
+        for user_id, user_name in c.fetchall():
+            users.append({'user_name': user_name, 'habits': [
+                {'habit_name': habit_name, 'habit_periodicity': periodicity,
+                 'current_streak': current_streak_up_to_today(periodicity, current_streak, last_date, today),
+                 'longest_streak': longest_streak}
+                for habit_name, periodicity, current_streak, longest_streak, last_date in
+                streak_engine_module.calculate_streaks(read_only_database, 'Habit_table', 'Progression_table',
+                                                       today=today.isoformat(), user_id=user_id)]})
+        return {'database': database, 'users': users}
+    except (sqlite3.Error, ValueError) as error:
+        return {'database': database, 'error': str(error)}
+    finally:
+        connection_manager_module.close_connection(read_only_database)
+
+
+def run_batch(databases, output_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """This function calculates the streaks of all databases with a pool of worker processes (by default one per
+    processor core) and writes one JSON line per database to the output file, as soon as the outcome of the database
+    is known. It returns the number of databases, the number of databases with an error, the duration in seconds and
+    the number of databases per second."""
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be at least 1.")
+    databases = list(databases)
+    number_of_errors = 0
+    start = time.perf_counter()
+    with export_module.open_output(output_path, compress=output_path.endswith('.gz')) as output_file, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        for outcome in executor.map(analyse_database, databases, chunksize=chunk_size):
+            number_of_errors += 'error' in outcome
+            output_file.write(json.dumps(outcome, ensure_ascii=False) + "\n")
+    seconds = time.perf_counter() - start
+    return {'databases': len(databases), 'errors': number_of_errors, 'seconds': seconds,
+            'databases_per_second': len(databases) / seconds if seconds > 0 else 0.0}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Calculate the streaks of many habit databases at once. The "
+                                                 "databases are only read, never changed.")
+    parser.add_argument('paths', nargs='+', help="the database files, or directories with .db files")
+    parser.add_argument('output_path', help="the JSON Lines output file, for example streaks.jsonl.gz")
+    parser.add_argument('--workers', type=int, help="the number of worker processes (default: one per core)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="the number of databases handed to a worker at once")
+    arguments = parser.parse_args()
+
+    result = run_batch(database_files(arguments.paths), arguments.output_path, arguments.workers, arguments.chunk_size)
+    print(f"Analysed {result['databases']} databases ({result['errors']} with an error) in "
+          f"{result['seconds']:.2f} seconds: {result['databases_per_second']:.1f} databases per second.")
@@ -0,0 +1,278 @@
+"""This module contains benchmarks for the application. It is not used by the application itself. It builds synthetic
+databases with a chosen number of habits and days of history, and measures how long the calculations take. The
+results are printed and can be written to a JSON file, so that different runs can be compared.
+
+The module compares the backends for the streak calculations:
+- python: the original calculation, which queries the history of every habit and counts it row by row in Python. On
+  large databases this takes very long, so it is skipped above a number of progression rows (--python-limit).
+- sql_engine: the single SQL statement of the streak_engine_module.
+- numpy: the completion matrix of the streak_numpy_module (only if NumPy is installed).
+- bitmap: the packed bitmaps of the bitmap_storage_module (built once, before the measurement).
+
+Next to that, it times the other hot paths of the application on the same database:
+- update_dates and combine_habits_dates, both when everything is up-to-date and when 30 days have to be caught up.
+- read_streaks: reading the stored streaks of the Streak_table, as the analytics module does.
+- provide_habit_list: printing all habits (the output is not shown).
+- day_navigation and update_progression: the progression menu of update_function, going back 30 days, and updating
+  the progression of one habit. The input of the user is simulated and the output is not shown.
+The sample data loader is timed once per run, on its own database.
+
+By default, the scales 10 to 1,000 habits and 1 month to 1 year are used. With --full, all scales from 10 to 10,000
+habits and from 1 month to 10 years are used, which takes a long time (and a lot of disk space).
+
+Example: python benchmark_module.py --habits 10 100 1000 --days 30 365 --output bench_output.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+import analysis_current_streak_per_habit
+import analysis_longest_streak_ever
+import bitmap_storage_module
+import connection_manager_module
+import database_and_table_creation_module
+import date_module
+import habit_module
+import insert_sample_data_module
+import progression_module
+import streak_engine_module
+import streak_numpy_module
+import streak_table_module
+import update_progression_module
+
+# All scales: the numbers of habits, and the numbers of days of history (1 month, 1 year and 10 years).
+HABIT_SCALES = [10, 100, 1000, 10000]
+DAY_SCALES = [30, 365, 3650]
+
+# The number of days that is caught up by update_dates and combine_habits_dates, and that day_navigation goes back.
+CATCH_UP_DAYS = 30
+
+
+def build_synthetic_database(database, number_of_habits, number_of_days, completion_chance=0.6, seed=1):
+    """This function (re)creates a database with the given number of habits (half daily, half weekly) and a
+    Progression_table with a row for every habit on every day, ending 'today'. Every habit is completed on a day with
+    the given chance. The watermark of combine_habits_dates is stored as well, so the database looks like a database
+    of the application that is up-to-date.
+    """
+    remove_database(database)
+
+    database_and_table_creation_module.check_and_create_database(database)
+    database_and_table_creation_module.create_habit_table('Habit_table', database)
+    database_and_table_creation_module.create_date_table('Date_table', database)
+    database_and_table_creation_module.create_progression_table('Progression_table', database)
+    database_and_table_creation_module.create_metadata_table('Metadata_table', database)
+
+    randomizer = random.Random(seed)
+    first_date = date.today() - timedelta(days=number_of_days - 1)
+    dates = [(first_date + timedelta(days=day)).isoformat() for day in range(number_of_days)]
+    habits = [(f"habit {number}", 'daily' if number % 2 == 0 else 'weekly') for number in range(number_of_habits)]
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute("DELETE FROM Date_table")
+    c.executemany("INSERT INTO Date_table (Date) VALUES (?)", [(day,) for day in dates])
+    c.executemany("INSERT INTO Habit_table (habit_name, habit_description, habit_periodicity, habit_creation_date) "
+                  "VALUES (?, ?, ?, ?)",
+                  [(habit_name, 'synthetic', periodicity, f"{dates[0]} 00:00") for habit_name, periodicity in habits])
+    c.executemany("INSERT INTO Progression_table (date_plus_habit_name, habit_name, habit_periodicity, date, "
+                  "completed) VALUES (?, ?, ?, ?, ?)",
+                  ((f"{day} - {habit_name}", habit_name, periodicity, day, int(randomizer.random() < completion_chance))
+                   for day in dates for habit_name, periodicity in habits))
+    c.executemany("INSERT OR REPLACE INTO Metadata_table (key, value) VALUES (?, ?)",
+                  [(progression_module.WATERMARK_DATE_KEY, dates[-1]),
+                   (progression_module.WATERMARK_HABIT_KEY, str(number_of_habits)),
+                   (date_module.DATE_WATERMARK_KEY, dates[-1])])
+    dbconnection.commit()
+
+
+def remove_database(database):
+    """This function closes the connection to the database and removes its files."""
+    connection_manager_module.close_connection(database)
+    for file_name in (database, database + '-wal', database + '-shm'):
+        if os.path.exists(file_name):
+            os.remove(file_name)
+
+
+def rewind_dates(database, number_of_days=CATCH_UP_DAYS):
+    """This function removes the last days from the Date_table (and its stored most recent date), as if the
+    application has not been opened for these days. It is used before timing the catch-up of update_dates."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    cutoff = (date.today() - timedelta(days=number_of_days)).isoformat()
+    c.execute("DELETE FROM Date_table WHERE Date > ?", (cutoff,))
+    c.execute("DELETE FROM Metadata_table WHERE key = ?", (date_module.DATE_WATERMARK_KEY,))
+    dbconnection.commit()
+
+
+def rewind_progression(database, number_of_days=CATCH_UP_DAYS):
+    """This function removes the rows of the last days from the Progression_table, and sets the watermark of
+    combine_habits_dates back. It is used before timing the catch-up of combine_habits_dates."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    cutoff = (date.today() - timedelta(days=number_of_days)).isoformat()
+    c.execute("DELETE FROM Progression_table WHERE date > ?", (cutoff,))
+    c.execute("INSERT OR REPLACE INTO Metadata_table (key, value) VALUES (?, ?)",
+              (progression_module.WATERMARK_DATE_KEY, cutoff))
+    dbconnection.commit()
+
+
+def run_silently(function, *arguments, user_input=()):
+    """This function calls a function of the application without showing its output. The input() calls of the
+    function are answered with the values in user_input."""
+    with contextlib.redirect_stdout(io.StringIO()), mock.patch('builtins.input', side_effect=list(user_input)):
+        return function(*arguments)
+
+
+def python_streaks(database):
+    """This function calculates the streaks in the original way: one query per habit, and counting in Python."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    today = datetime.today()
+
+    c.execute("SELECT habit_name, habit_periodicity FROM Habit_table WHERE user_id = ?",
+              (database_and_table_creation_module.DEFAULT_USER_ID,))
+    streaks = {}
+    for habit_name, periodicity in c.fetchall():
+        c.execute("SELECT date, completed FROM Progression_table WHERE user_id = ? AND habit_name = ? ORDER BY date",
+                  (database_and_table_creation_module.DEFAULT_USER_ID, habit_name))
+        history = c.fetchall()
+        up_to_today = [row for row in reversed(history) if row[0] <= today.strftime('%Y-%m-%d')]
+        if periodicity == 'daily':
+            streaks[habit_name] = (analysis_current_streak_per_habit.count_daily_streak(up_to_today),
+                                   analysis_longest_streak_ever.calculate_longest_daily_streak(history))
+        else:
+            streaks[habit_name] = (analysis_current_streak_per_habit.count_weekly_streak(up_to_today, today),
+                                   analysis_longest_streak_ever.calculate_longest_weekly_streak(history))
+    return streaks
+
+
+def time_function(function, *arguments, repeat=3, setup=None):
+    """This function calls the function 'repeat' times and returns the fastest time in seconds. If a setup function
+    is given, it is called (without timing it) before every call."""
+    fastest = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function(*arguments)
+        elapsed = time.perf_counter() - start
+        fastest = elapsed if fastest is None else min(fastest, elapsed)
+    return fastest
+
+
+def benchmark_streak_backends(database, repeat=3, include_python=True):
+    """This function times the streak backends on the given database and returns the times in seconds. The python
+    backend is left out (None) if include_python is False."""
+    results = {
+        'python': time_function(python_streaks, database, repeat=repeat) if include_python else None,
+        'sql_engine': time_function(streak_engine_module.calculate_streaks, database, 'Habit_table',
+                                    'Progression_table', repeat=repeat),
+    }
+    bitmap_storage_module.build_bitmaps(database, 'Habit_table', 'Date_table', 'Progression_table')
+    results['bitmap'] = time_function(bitmap_storage_module.calculate_streaks, database, 'Habit_table', 'Date_table',
+                                      'Progression_table', repeat=repeat)
+    if streak_numpy_module.numpy is not None:
+        results['numpy'] = time_function(streak_numpy_module.calculate_streak_arrays, database, 'Habit_table',
+                                         'Progression_table', repeat=repeat)
+    return results
+
+
+def benchmark_hot_paths(database, repeat=3):
+    """This function times the other hot paths of the application on the given database and returns the times in
+    seconds. The paths that change the database restore it themselves, or are prepared by a setup function."""
+    return {
+        'update_dates_up_to_date': time_function(date_module.Date.update_dates, database, 'Date_table',
+                                                 repeat=repeat),
+        'update_dates_catch_up': time_function(date_module.Date.update_dates, database, 'Date_table', repeat=repeat,
+                                               setup=lambda: rewind_dates(database)),
+        'combine_habits_dates_up_to_date': time_function(progression_module.Progression.combine_habits_dates,
+                                                         database, 'Habit_table', 'Date_table', 'Progression_table',
+                                                         repeat=repeat),
+        'combine_habits_dates_catch_up': time_function(progression_module.Progression.combine_habits_dates,
+                                                       database, 'Habit_table', 'Date_table', 'Progression_table',
+                                                       repeat=repeat, setup=lambda: rewind_progression(database)),
+        'read_streaks': time_function(streak_table_module.read_streaks, database, 'Habit_table', 'Progression_table',
+                                      repeat=repeat),
+        'provide_habit_list': time_function(run_silently, habit_module.Habit.provide_habit_list, 'Habit_table',
+                                            database, repeat=repeat),
+        'day_navigation': time_function(lambda: run_silently(update_progression_module.update_function, database,
+                                                             user_input=['1'] * CATCH_UP_DAYS + ['m']),
+                                        repeat=repeat),
+        'update_progression': time_function(lambda: run_silently(update_progression_module.update_function, database,
+                                                                 user_input=['3', 'habit 0', '1', 'm']),
+                                            repeat=repeat),
+    }
+
+
+def benchmark_sample_data_loader(database='benchmark_sample_database.db', repeat=3):
+    """This function times loading the sample data into a new (empty) database."""
+    def load_sample_data():
+        run_silently(insert_sample_data_module.insert_sample_data_before_distribution_of_app, database,
+                     'Habit_table', 'Date_table', 'Progression_table')
+
+    fastest = time_function(load_sample_data, repeat=repeat, setup=lambda: remove_database(database))
+    remove_database(database)
+    return fastest
+
+
+def run_benchmarks(habit_counts, day_counts, database='benchmark_database.db', repeat=3, python_limit=2000000):
+    """This function builds a synthetic database for every combination of habit count and day count, runs the
+    benchmarks on it, and returns a list with one dictionary of results per combination. The python streak backend
+    is skipped for databases with more than python_limit progression rows."""
+    results = []
+    for number_of_habits in habit_counts:
+        for number_of_days in day_counts:
+            start = time.perf_counter()
+            build_synthetic_database(database, number_of_habits, number_of_days)
+            result = {'habits': number_of_habits, 'days': number_of_days,
+                      'progression_rows': number_of_habits * number_of_days,
+                      'build_seconds': time.perf_counter() - start,
+                      'streak_backends': benchmark_streak_backends(
+                          database, repeat, include_python=number_of_habits * number_of_days <= python_limit),
+                      'hot_paths': benchmark_hot_paths(database, repeat)}
+            print(json.dumps(result))
+            results.append(result)
+    remove_database(database)
+    return results
+
+
+def main(arguments=None):
+    """This function reads the command line arguments, runs the benchmarks and writes the results to a JSON file."""
+    parser = argparse.ArgumentParser(description="Benchmarks of the habit tracker application.")
+    parser.add_argument('--habits', type=int, nargs='+', default=HABIT_SCALES[:3], help="numbers of habits")
+    parser.add_argument('--days', type=int, nargs='+', default=DAY_SCALES[:2], help="numbers of days of history")
+    parser.add_argument('--full', action='store_true', help="use all scales (10 to 10,000 habits, up to 10 years)")
+    parser.add_argument('--python-limit', type=int, default=2000000,
+                        help="skip the python streak backend above this number of progression rows")
+    parser.add_argument('--repeat', type=int, default=3, help="number of times every measurement is repeated")
+    parser.add_argument('--database', default='benchmark_database.db', help="file for the synthetic database")
+    parser.add_argument('--output', help="JSON file to write the results to")
+    arguments = parser.parse_args(arguments)
+
+    if arguments.full:
+        arguments.habits, arguments.days = HABIT_SCALES, DAY_SCALES
+
+    results = run_benchmarks(arguments.habits, arguments.days, arguments.database, arguments.repeat,
+                             arguments.python_limit)
+    sample_data_loader = benchmark_sample_data_loader(repeat=arguments.repeat)
+    print(json.dumps({'sample_data_loader': sample_data_loader}))
+    if arguments.output:
+        with open(arguments.output, 'w') as output_file:
+            json.dump({'created': datetime.now().isoformat(timespec='seconds'),
+                       'environment': {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                                       'platform': platform.platform()},
+                       'sample_data_loader': sample_data_loader, 'results': results}, output_file, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""This module stores the completion history of every habit as a packed bitmap: one bit per day, starting at the
+first date of the Date_table (the 'epoch'). The bitmaps are kept in the BLOB column of the Bitmap_table, next to the
+normal Progression_table. Ten years of one habit fit in about 460 bytes, instead of about 3,650 rows.
+
+In Python, a bitmap is handled as one (large) integer, so all calculations are bit operations on the complete history
+at once, and no rows have to be iterated:
+- Completion counts: the number of 1 bits (popcount, int.bit_count).
+- Longest streak: 'bits & (bits >> 1)' removes the last day of every series of completed days. The number of times
+  this can be done before nothing is left, is the length of the longest series.
+- Current streak: the most recent 0 bit up to 'today' is found with bit_length() on the inverted bitmap. The current
+  streak is the number of bits after it.
+- Weekly habits: the bitmap is shifted so that bit 0 is a Monday, and every group of 7 bits is folded into its first
+  bit (any completion in the week). The weekly streaks are then calculated in the same way, with steps of 7 bits.
+
+The bitmaps are built from the Progression_table the first time they are needed. They are not rewritten on every
+check-off, because the application reads its streaks from the Streak_table, and only the benchmark and the functions of
+this module read the bitmaps: when the user updates the progression of a habit, its bitmap is removed by
+invalidate_bitmaps, and built again the next time it is needed. The outcome is the same as the outcome of the
+functions in analysis_current_streak_per_habit and analysis_longest_streak_ever. Like the Progression_table, the
+bitmaps are stored per user, and every function works on the habits of one user.
+"""
+
+from datetime import date
+
+import connection_manager_module
+import database_and_table_creation_module
+import streak_table_module
+
+# Every week has 7 bits. The mask contains the 7 bits of the first week.
+DAYS_PER_WEEK = 7
+WEEK_MASK = (1 << DAYS_PER_WEEK) - 1
+
+
+def build_bitmaps(database, habit_table_name, date_table_name, progression_table_name, habit_name=None,
+                  bitmap_table_name='Bitmap_table', user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function builds the bitmap of one habit, or of all habits of the user if no habit name is given, from the
+    Progression_table, and stores it in the Bitmap_table. Only the completed rows are read. The day number of every
+    completed row is calculated by SQLite, so no dates are parsed in Python.
+    """
+    database_and_table_creation_module.create_bitmap_table(bitmap_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute(f"SELECT MIN(Date) FROM {date_table_name}")
+    first_date = c.fetchone()[0]
+    if first_date is None:
+        return
+
+    habit_filter = "AND habit_name = ?" if habit_name is not None else ""
+    habit_parameters = (habit_name,) if habit_name is not None else ()
+    c.execute(f"SELECT habit_name FROM {habit_table_name} WHERE user_id = ? {habit_filter}",
+              (user_id,) + habit_parameters)
+    bitmaps = {row[0]: 0 for row in c.fetchall()}
+
+    c.execute(f"""SELECT habit_name, CAST(julianday(date) - julianday(?) AS INTEGER)
+              FROM {progression_table_name} WHERE user_id = ? AND completed = 1 AND date >= ? {habit_filter}""",
+              (first_date, user_id, first_date) + habit_parameters)
+    for name, day in c.fetchall():
+        if name in bitmaps:
+            bitmaps[name] |= 1 << day
+
+    c.executemany(f"INSERT OR REPLACE INTO {bitmap_table_name} (habit_name, first_date, bits, user_id) "
+                  f"VALUES (?, ?, ?, ?)",
+                  [(name, first_date, to_bytes(bits), user_id) for name, bits in bitmaps.items()])
+    dbconnection.commit()
+
+
+def read_bitmaps(database, habit_table_name, date_table_name, progression_table_name,
+                 bitmap_table_name='Bitmap_table', user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the bitmaps of all habits of the user as a list of (habit_name, periodicity, first_date,
+    bits), in the order in which the habits were added. Habits that have no bitmap yet, are built first.
+    """
+    database_and_table_creation_module.create_bitmap_table(bitmap_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute(f"""SELECT h.habit_name FROM {habit_table_name} AS h
+              LEFT JOIN {bitmap_table_name} AS b ON b.user_id = h.user_id AND b.habit_name = h.habit_name
+              WHERE h.user_id = ? AND b.habit_name IS NULL""", (user_id,))
+    missing_habits = [row[0] for row in c.fetchall()]
+    if missing_habits:
+        c.execute(f"SELECT COUNT(*) FROM {habit_table_name} WHERE user_id = ?", (user_id,))
+        if len(missing_habits) == c.fetchone()[0]:
+            build_bitmaps(database, habit_table_name, date_table_name, progression_table_name,
+                          bitmap_table_name=bitmap_table_name, user_id=user_id)
+        else:
+            for habit_name in missing_habits:
+                build_bitmaps(database, habit_table_name, date_table_name, progression_table_name, habit_name,
+                              bitmap_table_name, user_id)
+
+    c.execute(f"""SELECT h.habit_name, h.habit_periodicity, b.first_date, b.bits
+              FROM {habit_table_name} AS h
+              JOIN {bitmap_table_name} AS b ON b.user_id = h.user_id AND b.habit_name = h.habit_name
+              WHERE h.user_id = ?
+              ORDER BY h.rowid""", (user_id,))
+    return [(habit_name, periodicity, date.fromisoformat(first_date), from_bytes(bits))
+            for habit_name, periodicity, first_date, bits in c.fetchall()]
+
+
+def invalidate_bitmaps(database, bitmap_table_name='Bitmap_table', habit_name=None, user_id=None):
+    """This function removes the bitmap of one habit, or of all habits if no habit name is given, of the given user,
+    or of all users if no user_id is given. It is used whenever progression data has been changed, also by the update
+    module. The removed bitmaps are built again by read_bitmaps the next time they are needed.
+    """
+    if database_and_table_creation_module.table_type(database, bitmap_table_name) is None:
+        return
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    conditions, parameters = streak_table_module.user_and_habit_conditions(user_id, habit_name)
+    c.execute(f"DELETE FROM {bitmap_table_name} {conditions}", parameters)
+    dbconnection.commit()
+
+
+def calculate_streaks(database, habit_table_name, date_table_name, progression_table_name, today=None,
+                      bitmap_table_name='Bitmap_table', user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the streaks of all habits of the user as a list of (habit_name, periodicity, current
+    streak, longest streak), in the order in which the habits were added. The current streaks are calculated up to
+    and including 'today', unless a different date is given.
+    """
+    today = today or date.today()
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    # The current streak starts at the most recent date up to 'today'.
+    c.execute(f"SELECT MAX(Date) FROM {date_table_name} WHERE Date <= ?", (today.isoformat(),))
+    last_date = c.fetchone()[0]
+
+    streaks = []
+    for habit_name, periodicity, first_date, bits in read_bitmaps(database, habit_table_name, date_table_name,
+                                                                  progression_table_name, bitmap_table_name, user_id):
+        last_day = (date.fromisoformat(last_date) - first_date).days if last_date else -1
+        if periodicity == 'daily':
+            current_streak = current_run(bits, last_day)
+            longest_streak = longest_run(bits)
+        else:
+            offset = first_date.weekday()
+            current_streak = current_run(weeks_completed(keep_days(bits, last_day), offset),
+                                         (last_day + offset) // DAYS_PER_WEEK * DAYS_PER_WEEK, DAYS_PER_WEEK)
+            longest_streak = longest_run(weeks_completed(bits, offset), DAYS_PER_WEEK)
+        streaks.append((habit_name, periodicity, current_streak, longest_streak))
+    return streaks
+
+
+def calculate_daily_and_weekly_streaks(database, habit_table_name, date_table_name, progression_table_name,
+                                       user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the current streak of every habit as a dictionary: {habit: (periodicity, streak)}."""
+    return {habit_name: (periodicity, current_streak) for habit_name, periodicity, current_streak, longest_streak in
+            calculate_streaks(database, habit_table_name, date_table_name, progression_table_name, user_id=user_id)}
+
+
+def calculate_longest_streaks(database, habit_table_name, date_table_name, progression_table_name,
+                              user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the longest streak ever of every habit as a dictionary: {habit: (streak, periodicity)}."""
+    return {habit_name: (longest_streak, periodicity) for habit_name, periodicity, current_streak, longest_streak in
+            calculate_streaks(database, habit_table_name, date_table_name, progression_table_name, user_id=user_id)}
+
+
+def completion_counts(database, habit_table_name, date_table_name, progression_table_name, first_day=None,
+                      last_day=None, bitmap_table_name='Bitmap_table',
+                      user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the number of completed days of every habit as a dictionary: {habit: count}. If a first
+    and/or last date is given, only the days in that period (including both dates) are counted.
+    """
+    counts = {}
+    for habit_name, periodicity, first_date, bits in read_bitmaps(database, habit_table_name, date_table_name,
+                                                                  progression_table_name, bitmap_table_name, user_id):
+        if last_day is not None:
+            bits = keep_days(bits, (last_day - first_date).days)
+        if first_day is not None:
+            bits >>= max((first_day - first_date).days, 0)
+        counts[habit_name] = bits.bit_count()
+    return counts
+
+
+def to_bytes(bits):
+    """This function packs a bitmap into bytes (little-endian: bit 0 is the lowest bit of the first byte)."""
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def from_bytes(data):
+    """This function unpacks the bytes of a bitmap into an integer."""
+    return int.from_bytes(data or b'', 'little')
+
+
+def keep_days(bits, last_day):
+    """This function removes all bits after the given day number."""
+    return bits & ((1 << (last_day + 1)) - 1) if last_day >= 0 else 0
+
+
+def week_completed(bits, first_date, day):
+    """This function returns True if the habit was completed on any day of the week (Monday to Sunday) of the given
+    date."""
+    monday = (day - first_date).days - day.weekday()
+    if monday < 0:
+        return bool(bits & (WEEK_MASK >> -monday))
+    return bool((bits >> monday) & WEEK_MASK)
+
+
+def weeks_completed(bits, offset):
+    """This function folds every week of the bitmap into one bit. The bitmap is first shifted by 'offset' days, so
+    that bit 0 is a Monday. Then the 7 bits of every week are combined (OR) into the first bit of the week, and the
+    other bits are removed. So bit 7 * n is 1 if the habit was completed in week n."""
+    bits <<= offset
+    folded = bits
+    for shift in range(1, DAYS_PER_WEEK):
+        folded |= bits >> shift
+    number_of_weeks = (folded.bit_length() + DAYS_PER_WEEK - 1) // DAYS_PER_WEEK
+    return folded & every_step(number_of_weeks, DAYS_PER_WEEK)
+
+
+def every_step(number_of_bits, step):
+    """This function returns a mask with 'number_of_bits' bits that are 'step' bits apart: bits 0, step, 2 * step,
+    and so on. Dividing a series of 1 bits by a series of 'step' 1 bits gives exactly this mask."""
+    return ((1 << (step * number_of_bits)) - 1) // ((1 << step) - 1)
+
+
+def longest_run(bits, step=1):
+    """This function returns the length of the longest series of 1 bits that are 'step' bits apart. Every 'bits &
+    (bits >> step)' removes the last bit of every series, so the number of steps until no bit is left is the length of
+    the longest series."""
+    length = 0
+    while bits:
+        bits &= bits >> step
+        length += 1
+    return length
+
+
+def current_run(bits, last_position, step=1):
+    """This function returns the length of the series of 1 bits (that are 'step' bits apart) that ends at
+    last_position. The most recent 0 bit up to last_position is found with bit_length() on the inverted bits."""
+    if last_position < 0:
+        return 0
+    positions = every_step(last_position // step + 1, step)
+    misses = ~bits & positions
+    if not misses:
+        return last_position // step + 1
+    return (last_position - (misses.bit_length() - 1)) // step
@@ -0,0 +1,172 @@
+"""This module shows the history of the habits as a grid in the terminal: a week, a month or a year, for one habit or
+for all habits of a user. Before, the history could only be seen one day at a time in the progression menu. Every
+grid is made from one range query on the Progression_table (the rows of the user between the first and the last date
+of the grid), which uses the indexes that start with (user_id, date) or (user_id, habit_name, date). So a year grid for
+hundreds of habits takes milliseconds.
+
+The grids have one line per habit:
+- week: one column per day (Monday to Sunday), 'X' for completed and '.' for not completed.
+- month: one column per day of the month, with the same characters.
+- year: a heatmap with one column per week (weeks start on Monday). For daily habits the character shows on how many
+  days of the week the habit was completed (see HEATMAP_SHADES); a weekly habit shows '#' if it was completed in the
+  week. For the year grid, SQLite counts the completions per week, so only one row per habit per week is read.
+A day or week without data (before the habit existed, or in the future) is left empty.
+
+The grids are shown from the analytics menu of the main menu, or from the command line:
+python calendar_view_module.py year --date 2024-06-01 --habit meditate
+"""
+
+import argparse
+import calendar
+from datetime import date, timedelta
+
+import connection_manager_module
+import database_and_table_creation_module
+import habit_registry_module
+import user_module
+
+# The characters of the year heatmap for 0, 1-2, 3-4, 5-6 and 7 completed days in a week.
+HEATMAP_SHADES = ['.', '-', '+', '*', '#']
+
+# The width of the column with the habit names.
+NAME_WIDTH = 31
+
+
+def period_range(period, day):
+    """This function returns the first and the last date (as date objects) of the week (Monday to Sunday), month or
+    year that contains the day."""
+    if period == 'week':
+        first_day = day - timedelta(days=day.weekday())
+        return first_day, first_day + timedelta(days=6)
+    if period == 'month':
+        return day.replace(day=1), day.replace(day=calendar.monthrange(day.year, day.month)[1])
+    if period == 'year':
+        return date(day.year, 1, 1), date(day.year, 12, 31)
+    raise ValueError("The period must be 'week', 'month' or 'year'.")
+
+
+def habits_of_grid(database, habit_name=None, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the habits of the grid as a dictionary {habit_name: habit_periodicity}: all habits of the
+    user, or only the given habit. An unknown habit raises a ValueError."""
+    habits = habit_registry_module.habit_periodicities(database, user_id)
+    if habit_name is None:
+        return habits
+    if habit_name not in habits:
+        raise ValueError(f"Habit name '{habit_name}' not found.")
+    return {habit_name: habits[habit_name]}
+
+
+def read_completions(database, first_day, last_day, habit_name=None,
+                     user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the progression of the user from first_day up to and including last_day, with one
+    range query, as a dictionary: {habit_name: {date (YYYY-MM-DD): completed}}."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    habit_filter = "AND habit_name = ?" if habit_name is not None else ""
+    c.execute(f"""SELECT habit_name, date, completed FROM Progression_table
+              WHERE user_id = ? AND date BETWEEN ? AND ? {habit_filter}""",
+              [user_id, first_day.isoformat(), last_day.isoformat()] + ([habit_name] if habit_name else []))
+    completions = {}
+    for row_habit_name, day, completed in c.fetchall():
+        completions.setdefault(row_habit_name, {})[day] = completed
+    return completions
+
+
+def read_weekly_completions(database, first_day, last_day, habit_name=None,
+                            user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the number of completed days per week of the user from first_day up to and including
+    last_day, with one range query in which SQLite counts the completions, as a dictionary: {habit_name: {Monday of
+    the week (YYYY-MM-DD): number of completed days}}."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    habit_filter = "AND habit_name = ?" if habit_name is not None else ""
+    c.execute(f"""SELECT habit_name, date(date, 'weekday 0', '-6 days') AS week_start, SUM(completed)
+              FROM Progression_table
+              WHERE user_id = ? AND date BETWEEN ? AND ? {habit_filter}
+              GROUP BY habit_name, week_start""",
+              [user_id, first_day.isoformat(), last_day.isoformat()] + ([habit_name] if habit_name else []))
+    completions = {}
+    for row_habit_name, week_start, completed_days in c.fetchall():
+        completions.setdefault(row_habit_name, {})[week_start] = completed_days
+    return completions
+
+
+def day_cell(completed):
+    """This function returns the character of a day: 'X' for completed, '.' for not completed and ' ' without data."""
+    if completed is None:
+        return ' '
+    return 'X' if completed else '.'
+
+
+def week_cell(completed_days, habit_periodicity):
+    """This function returns the heatmap character of a week, see HEATMAP_SHADES. A weekly habit only shows whether it
+    was completed in the week."""
+    if completed_days is None:
+        return ' '
+    if habit_periodicity != 'daily':
+        return HEATMAP_SHADES[-1] if completed_days else HEATMAP_SHADES[0]
+    return HEATMAP_SHADES[(completed_days + 1) // 2]
+
+
+def calendar_lines(database, period, day, habit_name=None, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the lines of the grid of the week, month or year that contains the day (a date object),
+    for one habit or for all habits of the user: a title, a header and one line per habit."""
+    first_day, last_day = period_range(period, day)
+    habits = habits_of_grid(database, habit_name, user_id)
+
+    if period == 'year':
+        # One column per week, starting with the Monday on or before the 1st of January. The header shows the first
+        # letter of the month above the first week that starts in that month.
+        week_starts = []
+        week_start = first_day - timedelta(days=first_day.weekday())
+        while week_start <= last_day:
+            week_starts.append(week_start)
+            week_start += timedelta(days=7)
+        header = "".join(calendar.month_abbr[start.month][0] if start.day <= 7 and start.year == day.year else ' '
+                         for start in week_starts)
+        completions = read_weekly_completions(database, week_starts[0], last_day, habit_name, user_id)
+        rows = ["".join(week_cell(completions.get(name, {}).get(start.isoformat()), periodicity)
+                        for start in week_starts) for name, periodicity in habits.items()]
+        title = f"Year {day.year} (one column per week: {' '.join(HEATMAP_SHADES)} = 0, 1-2, 3-4, 5-6, 7 days)"
+    else:
+        days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+        if period == 'week':
+            # One column of 4 characters per day, with the name of the weekday in the header.
+            header = " ".join(f"{calendar.day_abbr[one_day.weekday()]:<3}" for one_day in days)
+            cell_format, separator = '<3', ' '
+            title = f"Week of {first_day.strftime('%A, %d %B %Y')}"
+        else:
+            # One column of 3 characters per day, with the day of the month in the header.
+            header = "".join(f"{one_day.day:>3}" for one_day in days)
+            cell_format, separator = '>3', ''
+            title = first_day.strftime('%B %Y')
+        completions = read_completions(database, first_day, last_day, habit_name, user_id)
+        rows = [separator.join(f"{day_cell(completions.get(name, {}).get(one_day.isoformat())):{cell_format}}"
+                               for one_day in days) for name in habits]
+
+    return [title, f"{'Habit name':<{NAME_WIDTH}} {header}",
+            "-" * (NAME_WIDTH + 1 + len(header))] + \
+        [f"{name:<{NAME_WIDTH}} {row}".rstrip() for name, row in zip(habits, rows)]
+
+
+def print_calendar(database, period, day, habit_name=None, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function prints the grid of the week, month or year that contains the day (see calendar_lines)."""
+    print("")
+    for line in calendar_lines(database, period, day, habit_name, user_id):
+        print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show the history of the habits as a week, month or year grid.")
+    parser.add_argument('period', choices=['week', 'month', 'year'], help="the period of the grid")
+    parser.add_argument('--date', default=date.today().isoformat(), help="a date in the period (YYYY-MM-DD)")
+    parser.add_argument('--habit', help="only show this habit")
+    parser.add_argument('--database', default='Habit_app_database.db', help="the database file")
+    parser.add_argument('--user', default=database_and_table_creation_module.DEFAULT_USER_NAME,
+                        help="the user whose habits are shown")
+    arguments = parser.parse_args()
+    import main_habit_tracker_app
+    main_habit_tracker_app.bootstrap(arguments.database)
+
+    print_calendar(arguments.database, arguments.period, date.fromisoformat(arguments.date), arguments.habit,
+                   user_module.user_id_for_name(arguments.database, arguments.user))
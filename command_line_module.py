@@ -0,0 +1,244 @@
+"""This module is a non-interactive command line interface for the application, for scripts and scheduled jobs. The
+main menu and the progression menu of the application ask for every input with input(). Here, everything is given
+as arguments, and the outcome is printed as JSON:
+
+python command_line_module.py add meditate --description "meditate on the sith code" --periodicity daily
+python command_line_module.py delete meditate
+python command_line_module.py mark meditate "lightsaber training" --date 2024-06-01
+python command_line_module.py mark meditate --date 2024-06-01 --not-done
+python command_line_module.py mark --input check_offs.csv
+python command_line_module.py list --periodicity weekly
+python command_line_module.py streaks
+python command_line_module.py --user anakin add podracing --description "fastest in mos espa" --periodicity weekly
+
+With 'mark --input', many check-offs are read from a file (or from the standard input with '-'), one per line:
+habit_name;date;completed. The lines are read one by one and stored with one executemany, so tens of thousands of
+check-offs are stored quickly.
+
+Every command works on the habits of one user, chosen with --user (see user_module). Without --user, the default
+user is used. Adding a habit for a new user name adds the user as well. With --shards N, the habits are spread over N
+database files, and the command works on the file of the user (see shard_router_module).
+
+Every command runs in one single transaction (see connection_manager_module.transaction): either all of its changes
+are stored, or, if an error occurs, none of them. Invalid input gives a JSON object with an 'error', and exit code 1.
+The input is checked with the same rules as in the main menu.
+"""
+
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+from datetime import date, datetime
+
+import bitmap_storage_module
+import connection_manager_module
+import database_and_table_creation_module
+import habit_health_module
+import habit_module
+import habit_registry_module
+import main_habit_tracker_app
+import progression_import_module
+import progression_module
+import rollup_storage_module
+import shard_router_module
+import streak_table_module
+import user_module
+
+
+def add_habit(database, habit_name, habit_description, habit_periodicity,
+              user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function adds a habit, after checking the input in the same way as the main menu does. It returns the
+    added habit."""
+    habit_name = habit_name.strip().lower()
+    habit_description = habit_description.strip().lower()
+    error = habit_module.Habit.validate_habit_name(habit_name) or \
+        habit_module.Habit.validate_habit_description(habit_description)
+    if error is not None:
+        raise ValueError(error.strip())
+    if habit_module.Habit.habit_exists(database, habit_name, user_id):
+        raise ValueError(f"Habit name '{habit_name}' already exists.")
+    if habit_periodicity not in ('daily', 'weekly'):
+        raise ValueError("The periodicity must be 'daily' or 'weekly'.")
+
+    new_habit = habit_module.Habit(habit_name, habit_description, habit_periodicity,
+                                   datetime.now().strftime('%Y-%m-%d %H:%M'), user_id)
+    new_habit.insert_into_database(database)
+    return {'added': vars(new_habit)}
+
+
+def delete_habit(database, habit_name, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function deletes a habit and its progression."""
+    habit_name = habit_name.strip().lower()
+    if not habit_module.Habit.remove_from_database(database, habit_name, user_id):
+        raise database_and_table_creation_module.NotFoundError(f"Habit name '{habit_name}' not found.")
+    return {'deleted': habit_name}
+
+
+def mark_habits(database, check_offs, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function stores check-offs: (habit_name, date, completed) tuples, in which completed is 1 (done) or 0
+    (not done). The check-offs are checked and stored one by one while they are read, with one executemany, so a
+    large number of check-offs does not have to be in memory at once. The stored streaks and bitmaps of the habits
+    that changed are removed; they are calculated again the next time they are needed.
+    """
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    periodicities = habit_registry_module.habit_periodicities(database, user_id)
+    today = date.today().isoformat()
+    changed_habits = set()
+
+    def progression_rows():
+        for habit_name, day, completed in check_offs:
+            if habit_name not in periodicities:
+                raise database_and_table_creation_module.NotFoundError(f"Habit name '{habit_name}' not found.")
+            if not is_iso_date(day) or not database_and_table_creation_module.FIRST_DATE <= day <= today:
+                raise ValueError(f"Invalid date '{day}': use YYYY-MM-DD, from "
+                                 f"{database_and_table_creation_module.FIRST_DATE} up to today.")
+            if completed not in (0, 1):
+                raise ValueError("Invalid status: use 1 for completed or 0 for not completed.")
+            changed_habits.add(habit_name)
+            yield f"{day} - {habit_name}", habit_name, periodicities[habit_name], day, completed, user_id
+
+    # The progression rows are inserted, or updated if they exist already. Rows of a new habit or a new date that
+    # combine_habits_dates has not created yet, are created here.
+    progression_is_view = database_and_table_creation_module.table_type(database, 'Progression_table') == 'view'
+    changes_before = dbconnection.total_changes
+    c.executemany(progression_import_module.insert_statement('Progression_table', 'update', progression_is_view),
+                  progression_rows())
+    marked = dbconnection.total_changes - changes_before
+
+    for habit_name in changed_habits:
+        streak_table_module.invalidate_streaks(database, habit_name=habit_name, user_id=user_id)
+        bitmap_storage_module.invalidate_bitmaps(database, habit_name=habit_name, user_id=user_id)
+        rollup_storage_module.invalidate_rollups(database, habit_name=habit_name, user_id=user_id)
+        habit_health_module.invalidate_health(database, habit_name=habit_name, user_id=user_id)
+    dbconnection.commit()
+    return {'marked': marked, 'habits': sorted(changed_habits)}
+
+
+def list_habits(database, periodicity=None, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns all habits, or only the habits of the given periodicity, in the order in which they were
+    added."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    if periodicity is None:
+        c.execute("SELECT habit_name, habit_description, habit_periodicity, habit_creation_date FROM Habit_table "
+                  "WHERE user_id = ? ORDER BY rowid", (user_id,))
+    else:
+        c.execute("SELECT habit_name, habit_description, habit_periodicity, habit_creation_date FROM Habit_table "
+                  "WHERE user_id = ? AND habit_periodicity = ? ORDER BY rowid", (user_id, periodicity))
+    columns = ['habit_name', 'habit_description', 'habit_periodicity', 'habit_creation_date']
+    return {'habits': [dict(zip(columns, row)) for row in c.fetchall()]}
+
+
+def habit_streaks(database, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the current streak and the longest streak ever of all habits. Like in the analytics
+    menu, the Progression_table is made complete and up to date first."""
+    progression_module.Progression.combine_habits_dates(database, 'Habit_table', 'Date_table', 'Progression_table')
+    return {'streaks': [{'habit_name': habit_name, 'habit_periodicity': periodicity,
+                         'current_streak': current_streak, 'longest_streak': longest_streak}
+                        for habit_name, periodicity, current_streak, longest_streak in
+                        streak_table_module.read_streaks(database, 'Habit_table', 'Progression_table',
+                                                         user_id=user_id)]}
+
+
+def is_iso_date(text):
+    """This function returns whether the text is a date in the format YYYY-MM-DD."""
+    try:
+        return date.fromisoformat(text).isoformat() == text
+    except ValueError:
+        return False
+
+
+def read_check_offs(lines):
+    """This generator reads check-offs from lines in the format habit_name;date;completed. If completed is left out,
+    the habit is marked as done. Empty lines and lines that start with '#' are skipped. A line without a date raises
+    a ValueError with the number of the line."""
+    reader = csv.reader(lines, delimiter=';')
+    for row in reader:
+        if not row or row[0].startswith('#'):
+            continue
+        if len(row) < 2:
+            raise ValueError(f"Line {reader.line_num} has no date: use habit_name;date;completed.")
+        try:
+            completed = int(row[2]) if len(row) > 2 else 1
+        except ValueError:
+            raise ValueError(f"Invalid status '{row[2]}' on line {reader.line_num}: use 1 for completed or 0 for not "
+                             f"completed.")
+        yield row[0].strip().lower(), row[1].strip(), completed
+
+
+def run_command(arguments):
+    """This function runs the command of the parsed arguments and returns its outcome. The user is looked up by
+    name; only 'add' adds a user that does not exist yet."""
+    database = arguments.database
+    user_id = user_module.user_id_for_name(database, arguments.user, create=arguments.command == 'add')
+    if arguments.command == 'add':
+        return add_habit(database, arguments.habit_name, arguments.description, arguments.periodicity, user_id)
+    if arguments.command == 'delete':
+        return delete_habit(database, arguments.habit_name, user_id)
+    if arguments.command == 'mark':
+        if arguments.input is not None:
+            if arguments.input == '-':
+                return mark_habits(database, read_check_offs(sys.stdin), user_id)
+            with open(arguments.input, newline='', encoding='utf-8') as input_file:
+                return mark_habits(database, read_check_offs(input_file), user_id)
+        completed = 0 if arguments.not_done else 1
+        return mark_habits(database, [(habit_name.strip().lower(), arguments.date, completed)
+                                      for habit_name in arguments.habit_names], user_id)
+    if arguments.command == 'list':
+        return list_habits(database, arguments.periodicity, user_id)
+    return habit_streaks(database, user_id)
+
+
+def main(arguments=None):
+    """This function parses the arguments, prepares the database (see bootstrap in the main module) and runs the
+    command in one transaction. The outcome is printed as JSON. It returns the exit code: 0 if the command
+    succeeded and 1 if it failed, for example because of invalid input, an input file that cannot be read, or a
+    database that is locked or damaged. The error is printed as JSON as well."""
+    parser = argparse.ArgumentParser(description="Non-interactive command line interface of the habit tracker.")
+    parser.add_argument('--database', default='Habit_app_database.db', help="the database file")
+    parser.add_argument('--user', default=database_and_table_creation_module.DEFAULT_USER_NAME,
+                        help="the name of the user whose habits are used")
+    parser.add_argument('--shards', type=int, default=1, help="the number of database files the users are spread over")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = subparsers.add_parser('add', help="add a habit")
+    add_parser.add_argument('habit_name')
+    add_parser.add_argument('--description', required=True)
+    add_parser.add_argument('--periodicity', choices=['daily', 'weekly'], required=True)
+
+    delete_parser = subparsers.add_parser('delete', help="delete a habit and its progression")
+    delete_parser.add_argument('habit_name')
+
+    mark_parser = subparsers.add_parser('mark', help="mark habits as done (or not done) on a date")
+    mark_parser.add_argument('habit_names', nargs='*')
+    mark_parser.add_argument('--date', default=date.today().isoformat(), help="the date (YYYY-MM-DD), default today")
+    mark_parser.add_argument('--not-done', action='store_true', help="mark the habits as not done")
+    mark_parser.add_argument('--input', help="file with lines habit_name;date;completed ('-' for standard input)")
+
+    list_parser = subparsers.add_parser('list', help="list the habits")
+    list_parser.add_argument('--periodicity', choices=['daily', 'weekly'])
+
+    subparsers.add_parser('streaks', help="show the current and longest streaks of all habits")
+    arguments = parser.parse_args(arguments)
+    if arguments.command == 'mark' and not arguments.habit_names and arguments.input is None:
+        parser.error("mark needs at least one habit name, or --input")
+    if arguments.shards < 1:
+        parser.error("--shards must be at least 1")
+    arguments.database = shard_router_module.ShardRouter.for_database(arguments.database, arguments.shards) \
+        .database_for_user(arguments.user)
+
+    try:
+        main_habit_tracker_app.bootstrap(arguments.database)
+        with connection_manager_module.transaction(arguments.database):
+            result = run_command(arguments)
+    except (ValueError, OSError, sqlite3.Error) as error:
+        print(json.dumps({'error': str(error)}))
+        return 1
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
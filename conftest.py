@@ -0,0 +1,32 @@
+"""This module contains the pytest fixtures that are shared by the test modules. pytest loads it automatically before
+the tests are run.
+"""
+import pytest
+import sqlite3
+
+import insert_sample_data_module
+import progression_module
+
+
+@pytest.fixture
+def sample_database():
+    """This fixture empties the test db (its tables and views), inserts the sample data and makes sure the
+    Progression_table contains all dates up to 'today'. It returns the name of the test db."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='view';")
+    for view_name in c.fetchall():
+        c.execute(f"DROP VIEW IF EXISTS {view_name[0]}")
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    dbconnection.commit()
+    dbconnection.close()
+
+    insert_sample_data_module.insert_sample_data_before_distribution_of_app('test_Habit_app_database.db',
+                                                                            'Habit_table', 'Date_table',
+                                                                            'Progression_table')
+    progression_module.Progression.combine_habits_dates('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                        'Progression_table')
+    return 'test_Habit_app_database.db'
@@ -0,0 +1,178 @@
+"""This module manages the connections to the (test)databases of the application. Before, every function opened and
+closed its own connection. Opening a connection and reading the layout of the database (the schema) took more time
+than most of the actual queries. Now, all modules ask this module for a connection through get_connection. The first
+time a database is requested, a connection is opened and the database settings (PRAGMA's) are applied. After that,
+the same connection is reused.
+
+The settings are stored in one place: the PRAGMA_SETTINGS dictionary below. Connections are kept per thread, because
+a SQLite connection may only be used by the thread that opened it. The function connection_statistics reports how many
+connections were opened, which is useful to check that connections are in fact reused.
+
+The function transaction groups the work of several functions into one transaction. Inside a 'with transaction(...)'
+block, the commits of the functions of the application are postponed until the end of the block. If an error occurs,
+everything in the block is rolled back. A block that will write can take the write lock at its start (immediate), so
+that two connections that read first and write later do not block each other halfway; the other connection then waits
+(see busy_timeout) instead of failing with 'database is locked'.
+"""
+
+import atexit
+import contextlib
+import os
+import pathlib
+import sqlite3
+import threading
+
+# The settings that are applied to every new connection:
+# - journal_mode WAL: readers do not block the writer and the writer does not block readers.
+# - synchronous NORMAL: in WAL mode this is safe against corruption and avoids a disk flush on every commit.
+# - cache_size: a negative value is in KiB, so the page cache may use up to 16 MB.
+# - mmap_size: up to 256 MB of the database file is read through memory mapping instead of read calls.
+# - temp_store MEMORY: temporary tables and indexes (for example for sorting) are kept in memory.
+# - busy_timeout: a connection that needs a lock held by another connection waits up to 5 seconds for it, instead of
+#   failing directly with 'database is locked'.
+PRAGMA_SETTINGS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# The PRAGMA synchronous value per durability setting (see set_durability).
+DURABILITY_LEVELS = {'off': 'OFF', 'normal': 'NORMAL', 'full': 'FULL'}
+
+# The open connections, stored per thread in a dictionary with the database name as key. The counter and its lock are
+# shared by all threads.
+_thread_connections = threading.local()
+_statistics_lock = threading.Lock()
+_connections_opened = 0
+
+
+class ManagedConnection(sqlite3.Connection):
+    """This is the class of the connections that get_connection opens. It is a normal SQLite connection, except that
+    commit does nothing while a transaction block (see transaction) is active. Other modules can keep data that
+    belongs to this connection in the dictionary caches (see habit_registry_module); it is removed together with the
+    connection."""
+
+    def __init__(self, *arguments, **keyword_arguments):
+        super().__init__(*arguments, **keyword_arguments)
+        self.transaction_depth = 0
+        self.caches = {}
+
+    def commit(self):
+        if self.transaction_depth == 0:
+            super().commit()
+
+
+@contextlib.contextmanager
+def transaction(database, immediate=False):
+    """This function is a context manager that runs the code in its block as one single transaction on the
+    connection to the database. The commits of the functions that are called in the block are postponed until the
+    block ends. If an exception occurs, all changes of the block are rolled back. Blocks can be nested: only the
+    outer block commits. Functions that start a transaction themselves with BEGIN (like migrate_database) cannot be
+    called in a block.
+
+    With immediate=True, the write lock is taken when the block starts (BEGIN IMMEDIATE). Use it for blocks that read
+    first and write later, when other connections may write at the same time: a block that only takes the write lock
+    when it starts writing can fail with 'database is locked', because SQLite cannot upgrade its read lock while
+    another connection writes. For a nested block, the option of the outer block applies."""
+    connection = get_connection(database)
+    if connection.transaction_depth == 0:
+        connection.commit()
+        connection.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    connection.transaction_depth += 1
+    try:
+        yield connection
+    except BaseException:
+        connection.transaction_depth -= 1
+        if connection.transaction_depth == 0:
+            connection.rollback()
+        raise
+    connection.transaction_depth -= 1
+    if connection.transaction_depth == 0:
+        connection.commit()
+
+
+def get_connection(database):
+    """This function returns the connection to the given database for the current thread. If there is no connection
+    yet, it is opened and the PRAGMA_SETTINGS are applied. If the database file has been removed in the meantime (for
+    example by a test), the old connection is closed and a new connection is opened, which creates a new file. The
+    database can also be a 'file:' URI, such as the name that read_only_database returns.
+    """
+    global _connections_opened
+
+    connections = _connections_for_current_thread()
+    connection = connections.get(database)
+    uri = database.startswith('file:')
+    if connection is not None and (database == ':memory:' or uri or os.path.exists(database)):
+        return connection
+    if connection is not None:
+        connection.close()
+
+    connection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES, factory=ManagedConnection, uri=uri)
+    for pragma, value in PRAGMA_SETTINGS.items():
+        # The journal mode is stored in the database file, so a read-only connection leaves it as it is.
+        if not (pragma == 'journal_mode' and uri and 'mode=ro' in database):
+            connection.execute(f"PRAGMA {pragma} = {value}")
+
+    connections[database] = connection
+    with _statistics_lock:
+        _connections_opened += 1
+    return connection
+
+
+def read_only_database(database):
+    """This function returns the name under which get_connection opens the database file read-only: a 'file:' URI
+    with mode=ro. Every attempt to change the database through that connection fails with 'attempt to write a
+    readonly database', and a file that does not exist is not created."""
+    return pathlib.Path(database).absolute().as_uri() + '?mode=ro'
+
+
+def set_durability(durability):
+    """This function chooses how safely commits are written to disk, by setting PRAGMA synchronous in the
+    PRAGMA_SETTINGS (for new connections) and on the open connections of the current thread. It is called once at
+    startup (see the --durability option of the main module):
+    - 'off': the changes are handed to the operating system, but not flushed to disk. Fastest, but a power failure can
+      lose the most recent commits.
+    - 'normal': in WAL mode the database cannot be corrupted, but a power failure can lose the most recent commits.
+    - 'full': every commit is flushed to disk before it counts as done."""
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError("The durability must be 'off', 'normal' or 'full'.")
+    PRAGMA_SETTINGS['synchronous'] = DURABILITY_LEVELS[durability]
+    for connection in _connections_for_current_thread().values():
+        connection.execute(f"PRAGMA synchronous = {DURABILITY_LEVELS[durability]}")
+
+
+def close_connection(database):
+    """This function closes the connection of the current thread to the given database, if there is one. Pending
+    changes that have not been committed are rolled back."""
+    connection = _connections_for_current_thread().pop(database, None)
+    if connection is not None:
+        connection.close()
+
+
+def close_all_connections():
+    """This function closes all connections of the current thread. It is called automatically when the application
+    shuts down, so that SQLite can clean up its WAL files."""
+    connections = _connections_for_current_thread()
+    for connection in connections.values():
+        connection.close()
+    connections.clear()
+
+
+def connection_statistics():
+    """This function returns how many connections have been opened since the application started (by all threads),
+    and how many connections the current thread has open right now."""
+    return {'connections_opened': _connections_opened,
+            'connections_open': len(_connections_for_current_thread())}
+
+
+def _connections_for_current_thread():
+    """This function returns the dictionary with the open connections of the current thread."""
+    if not hasattr(_thread_connections, 'connections'):
+        _thread_connections.connections = {}
+    return _thread_connections.connections
+
+
+atexit.register(close_all_connections)
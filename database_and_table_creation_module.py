@@ -2,18 +2,47 @@
 for the application exist. If they do not exist, they are created. For the database and each of its tables, the module
 contains one separate function. Additionally, for the Date_table, it inserts the starting value for the table
 (2024-05-01). This module is also called from various test_modules in order to create a test database and tables.
+
+Since version 2 of the database layout (the 'schema'), the tables have primary keys, unique constraints and indexes,
+so that looking up a habit, a date or a habit on a certain date no longer requires reading the whole table. The
+version of the layout is stored in the database itself (PRAGMA user_version). Databases with an older layout are
+upgraded in place by the function migrate_database, which also removes duplicate rows.
+
+Since version 3, one database can hold the habits of many users. The User_table contains the users, and the
+Habit_table, Progression_table (and the tables derived from them) have a user_id column. The keys and indexes of these
+tables start with the user_id, so the habits and progression of one user are stored next to each other in the index,
+and looking them up costs the same whether the database holds 10 users or 100,000. Databases of an older version get
+one user: the default user (DEFAULT_USER_ID), which owns all their habits.
 """
 
 import sqlite3
 
+import connection_manager_module
+
+# The current version of the database layout. Version 1 is the original layout without keys and indexes, version 2
+# added the keys and indexes and version 3 the users.
+SCHEMA_VERSION = 3
+
+# The first date of the Date_table.
+FIRST_DATE = '2024-05-01'
+
+# The user that is used when no user is given, and that owns the habits of databases from before version 3.
+DEFAULT_USER_ID = 1
+DEFAULT_USER_NAME = 'default'
+
+
+class NotFoundError(ValueError):
+    """This error is raised when a user or a habit that is asked for does not exist. It is a ValueError, so code that
+    handles invalid input handles it as well; the api_server_module answers it with status 404."""
+
 
 def check_and_create_database(database_name):
     """This function checks if the (test)database needed exists. If it does not exist yet, it is created. If some
-    error occurs, this is printed to the user.
+    error occurs, this is printed to the user. The connection is opened through the connection_manager_module, so
+    that the following functions can reuse it.
     """
     try:
-        connection = sqlite3.connect(database_name, detect_types=sqlite3.PARSE_DECLTYPES)
-        connection.close()
+        connection_manager_module.get_connection(database_name)
     except sqlite3.Error as error:
         print("")
         print(f"A database error occurred: {error}")
@@ -21,58 +50,354 @@ def check_and_create_database(database_name):
 
 def create_habit_table(table_name, database_name):
     """This function checks first if the table Habit_table does not exist yet. If not, then it creates the table.
-    The table has columns equal to the Habit class.
+    The table has columns equal to the Habit class. The user_id and habit_name together are the primary key, so every
+    habit name can only occur once per user.
     """
-    dbconnection = sqlite3.connect(database_name, detect_types=sqlite3.PARSE_DECLTYPES)
+    dbconnection = connection_manager_module.get_connection(database_name)
+    c = dbconnection.cursor()
+
+    c.execute(habit_table_statement(table_name))
+    for statement in habit_index_statements(table_name):
+        c.execute(statement)
+
+    dbconnection.commit()
+
+
+def create_date_table(table_name, database_name):
+    """This function checks first if the table Date_table does not exist yet. If not, then it creates the table.
+    The table has 1 column, equal to the 1 attribute of the Date class, which is also the primary key. Then, it
+    first checks if the table is empty and insert 2024-05-01 into the table if the table is empty. This to make sure
+    that the function update_dates in the class Date_class can work correctly.
+    """
+    dbconnection = connection_manager_module.get_connection(database_name)
+    c = dbconnection.cursor()
+
+    c.execute(date_table_statement(table_name))
+    c.execute(date_table_start_statement(table_name))
+
+    dbconnection.commit()
+
+
+def create_progression_table(table_name, database_name):
+    """This function creates the Progression_table if it does not exist yet. The table has columns equal to the
+    attributes of the Progression class. The user_id and date_plus_habit_name together are the primary key, and every
+    habit of a user can only occur once per date. The two indexes contain all the columns that the streak calculations
+    (per user and habit, ordered by date) and the day view of the update module (per user and date, ordered by habit)
+    need, so these queries can be answered from the index alone.
+    """
+    # In the sparse storage mode (see sparse_storage_module) the Progression_table is a view, which cannot be
+    # indexed. In that case nothing has to be created.
+    if table_type(database_name, table_name) == 'view':
+        return
+
+    dbconnection = connection_manager_module.get_connection(database_name)
+    c = dbconnection.cursor()
+
+    c.execute(progression_table_statement(table_name))
+    for statement in progression_index_statements(table_name):
+        c.execute(statement)
+
+    dbconnection.commit()
+
+
+def create_user_table(table_name, database):
+    """This function creates the User_table if it does not exist yet, and adds the default user to it. Every user has
+    a number (user_id) and a unique name."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute(user_table_statement(table_name))
+    c.execute(default_user_statement(table_name))
+
+    dbconnection.commit()
+
+
+def create_metadata_table(table_name, database):
+    """This function creates the Metadata_table if it does not exist yet. The table is a simple key/value store for
+    bookkeeping values of the application itself (so not habit data), such as how far the Progression_table has been
+    generated (the 'watermark' used by combine_habits_dates).
+    """
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute(metadata_table_statement(table_name))
+
+    dbconnection.commit()
+
+
+def create_streak_table(table_name, database):
+    """This function creates the Streak_table if it does not exist yet. For every habit of every user, it stores the
+    current streak and the longest streak ever, so that the analytics module does not have to go through the complete
+    history of every habit. The column last_date contains the most recent date that the stored current streak takes
+    into account.
+    """
+    dbconnection = connection_manager_module.get_connection(database)
     c = dbconnection.cursor()
 
     c.execute(f"""CREATE TABLE IF NOT EXISTS {table_name} (
                 habit_name TEXT,
-                habit_description TEXT,
                 habit_periodicity TEXT,
-                habit_creation_date TEXT
+                current_streak INTEGER,
+                longest_streak INTEGER,
+                last_date TEXT,
+                user_id INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID},
+                PRIMARY KEY (user_id, habit_name)
                 )""")
 
     dbconnection.commit()
-    dbconnection.close()
 
 
-def create_date_table(table_name, database_name):
-    """This function checks first if the table Date_table does not exist yet. If not, then it creates the table.
-    The table has 1 column, equal to the 1 attribute of the Date class. Then, it first checks if the table is
-    empty and insert 2024-05-01 into the table if the table is empty. This to make sure that the function
-    update_dates in the class Date_class can work correctly.
+def create_bitmap_table(table_name, database):
+    """This function creates the Bitmap_table if it does not exist yet. For every habit of every user, it stores the
+    completion history as a packed bitmap (see bitmap_storage_module): bit n of the BLOB 'bits' is 1 if the habit was
+    completed on the n-th day after first_date.
     """
-    dbconnection = sqlite3.connect(database_name, detect_types=sqlite3.PARSE_DECLTYPES)
+    dbconnection = connection_manager_module.get_connection(database)
     c = dbconnection.cursor()
 
     c.execute(f"""CREATE TABLE IF NOT EXISTS {table_name} (
-                Date TEXT
+                habit_name TEXT,
+                first_date TEXT,
+                bits BLOB,
+                user_id INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID},
+                PRIMARY KEY (user_id, habit_name)
                 )""")
 
-    c.execute(f"SELECT COUNT(*) FROM {table_name}")
-    count = c.fetchone()[0]
-    if count == 0:
-        c.execute(f"INSERT INTO {table_name} (Date) VALUES ('2024-05-01')")
+    dbconnection.commit()
+
+
+def create_rollup_table(table_name, database):
+    """This function creates the Rollup_table if it does not exist yet. For every habit of every user, it stores the
+    number of completed days per week (weeks start on Monday, like ISO weeks), per month and per year (see
+    rollup_storage_module). The column period is 'week', 'month' or 'year', and period_start is the first date of the
+    period. The column any_completed is calculated by SQLite: 1 if the habit was completed at least once in the period.
+    """
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute(f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                habit_name TEXT,
+                period TEXT,
+                period_start TEXT,
+                completed_days INTEGER NOT NULL DEFAULT 0,
+                any_completed INTEGER GENERATED ALWAYS AS (completed_days > 0) VIRTUAL,
+                user_id INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID},
+                PRIMARY KEY (user_id, habit_name, period, period_start)
+                ) WITHOUT ROWID""")
 
     dbconnection.commit()
-    dbconnection.close()
 
 
-def create_progression_table(table_name, database_name):
-    """This function creates the Progression_table if it does not exist yet. The table has columns equal to the
-    attributes of the Progression class.
+def create_health_table(table_name, database):
+    """This function creates the Health_table if it does not exist yet. For every habit of every user, it stores the
+    values from which the completion rates and the health score are calculated (see habit_health_module), up to and
+    including the date as_of: the number of days with progression (tracked_days), the number of completed days in the
+    last 7, 30 and 90 days, and the exponentially weighted average of the completions (ewma).
     """
-    dbconnection = sqlite3.connect(database_name, detect_types=sqlite3.PARSE_DECLTYPES)
+    dbconnection = connection_manager_module.get_connection(database)
     c = dbconnection.cursor()
 
     c.execute(f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                habit_name TEXT,
+                as_of TEXT NOT NULL,
+                tracked_days INTEGER NOT NULL DEFAULT 0,
+                completed_7 INTEGER NOT NULL DEFAULT 0,
+                completed_30 INTEGER NOT NULL DEFAULT 0,
+                completed_90 INTEGER NOT NULL DEFAULT 0,
+                ewma REAL NOT NULL DEFAULT 0,
+                user_id INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID},
+                PRIMARY KEY (user_id, habit_name)
+                ) WITHOUT ROWID""")
+
+    dbconnection.commit()
+
+
+def table_type(database, table_name):
+    """This function returns whether the given name is a 'table' or a 'view' in the database, or None if it does not
+    exist."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute("SELECT type FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')", (table_name,))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def habit_table_statement(table_name):
+    """This function returns the CREATE TABLE statement of the Habit_table. It is used both when creating a new table
+    and when migrating an existing table."""
+    return f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                habit_name TEXT,
+                habit_description TEXT,
+                habit_periodicity TEXT,
+                habit_creation_date TEXT,
+                user_id INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID},
+                PRIMARY KEY (user_id, habit_name)
+                )"""
+
+
+def habit_index_statements(table_name):
+    """This function returns the CREATE INDEX statements of the Habit_table. The index is used for the lists of
+    habits per periodicity of a user."""
+    return [f"CREATE INDEX IF NOT EXISTS {table_name}_periodicity_index "
+            f"ON {table_name} (user_id, habit_periodicity, habit_name)"]
+
+
+def date_table_statement(table_name):
+    """This function returns the CREATE TABLE statement of the Date_table."""
+    return f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                Date TEXT PRIMARY KEY
+                )"""
+
+
+def date_table_start_statement(table_name):
+    """This function returns the statement that inserts the starting date (FIRST_DATE) into the Date_table, but only
+    if the table is empty."""
+    return f"""INSERT INTO {table_name} (Date) SELECT '{FIRST_DATE}'
+               WHERE NOT EXISTS (SELECT 1 FROM {table_name})"""
+
+
+def progression_table_statement(table_name):
+    """This function returns the CREATE TABLE statement of the Progression_table."""
+    return f"""CREATE TABLE IF NOT EXISTS {table_name} (
                 date_plus_habit_name TEXT,
                 habit_name TEXT,
                 habit_periodicity TEXT,
                 date TEXT,
-                completed INTEGER
-                )""")
+                completed INTEGER,
+                user_id INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID},
+                PRIMARY KEY (user_id, date_plus_habit_name),
+                UNIQUE (user_id, habit_name, date)
+                )"""
 
-    dbconnection.commit()
-    dbconnection.close()
+
+def progression_index_statements(table_name):
+    """This function returns the CREATE INDEX statements of the Progression_table: one for the streak calculations
+    and one for the day view. Both start with the user_id."""
+    return [f"CREATE INDEX IF NOT EXISTS {table_name}_habit_date_index "
+            f"ON {table_name} (user_id, habit_name, date, completed)",
+            f"CREATE INDEX IF NOT EXISTS {table_name}_date_habit_index "
+            f"ON {table_name} (user_id, date, habit_name, completed)"]
+
+
+def user_table_statement(table_name):
+    """This function returns the CREATE TABLE statement of the User_table."""
+    return f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                user_id INTEGER PRIMARY KEY,
+                user_name TEXT NOT NULL UNIQUE,
+                user_creation_date TEXT
+                )"""
+
+
+def default_user_statement(table_name):
+    """This function returns the statement that adds the default user to the User_table, if it is not there yet."""
+    return f"""INSERT OR IGNORE INTO {table_name} (user_id, user_name, user_creation_date)
+               VALUES ({DEFAULT_USER_ID}, '{DEFAULT_USER_NAME}', strftime('%Y-%m-%d %H:%M', 'now', 'localtime'))"""
+
+
+def metadata_table_statement(table_name):
+    """This function returns the CREATE TABLE statement of the Metadata_table."""
+    return f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                key TEXT PRIMARY KEY,
+                value TEXT
+                )"""
+
+
+def schema_statements(habit_table_name, date_table_name, progression_table_name, metadata_table_name='Metadata_table',
+                      include_progression_table=True, user_table_name='User_table'):
+    """This function returns all statements that create the tables and indexes of the application (if they do not
+    exist yet), in the order in which they have to be executed. They are used by the bootstrap of the main module, to
+    create everything in one transaction. In the sparse storage mode the Progression_table is a view, so then
+    include_progression_table is False."""
+    statements = [user_table_statement(user_table_name), default_user_statement(user_table_name)]
+    statements += [habit_table_statement(habit_table_name)] + habit_index_statements(habit_table_name)
+    statements += [date_table_statement(date_table_name), date_table_start_statement(date_table_name)]
+    if include_progression_table:
+        statements += [progression_table_statement(progression_table_name)] + \
+            progression_index_statements(progression_table_name)
+    statements.append(metadata_table_statement(metadata_table_name))
+    return statements
+
+
+def migrate_database(database, habit_table_name, date_table_name, progression_table_name,
+                     user_table_name='User_table', streak_table_name='Streak_table',
+                     completion_table_name='Completion_table', bitmap_table_name='Bitmap_table'):
+    """This function upgrades an existing database to the current layout (SCHEMA_VERSION). It is called when the
+    application starts, directly after the tables have been created. If the database already has the current layout,
+    nothing happens.
+
+    Otherwise, every existing table is renamed, created again with the new layout, and the old rows are copied into
+    the new table. Duplicate rows are skipped while copying (INSERT OR IGNORE): for the Habit_table and Date_table the
+    first row is kept, for the Progression_table a completed row is preferred over a not-completed row so that no
+    check-offs of the user get lost. The rowids of the Habit_table are kept as they are, because combine_habits_dates
+    uses them as a watermark. Everything happens in one transaction, so if something goes wrong the database is left
+    as it was, and the error is raised again, so that the application does not start with the old layout.
+
+    The copied habits and progression get the user_id of the default user, which is added to the User_table. The
+    Streak_table and Bitmap_table only contain values derived from the progression, so they are dropped and calculated
+    again when they are needed. In the sparse storage mode (see sparse_storage_module), the view is first turned into
+    a Progression_table with the completed rows, which is migrated like the other tables, after which the sparse
+    storage is created again.
+    """
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute("PRAGMA user_version")
+    if c.fetchone()[0] >= SCHEMA_VERSION:
+        return
+    sparse_storage = table_type(database, progression_table_name) == 'view'
+
+    # For every table: the new CREATE TABLE statement, the columns to copy and the order in which duplicates are
+    # skipped (the first row in this order is kept).
+    tables = [
+        (habit_table_name, habit_table_statement(habit_table_name),
+         "rowid, habit_name, habit_description, habit_periodicity, habit_creation_date", "rowid"),
+        (date_table_name, date_table_statement(date_table_name), "Date", "rowid"),
+        (progression_table_name, progression_table_statement(progression_table_name),
+         "date_plus_habit_name, habit_name, habit_periodicity, date, completed", "completed DESC, rowid"),
+    ]
+
+    try:
+        dbconnection.commit()
+        c.execute("BEGIN")
+        c.execute(user_table_statement(user_table_name))
+        c.execute(default_user_statement(user_table_name))
+        c.execute(f"DROP TABLE IF EXISTS {streak_table_name}")
+        c.execute(f"DROP TABLE IF EXISTS {bitmap_table_name}")
+        if sparse_storage:
+            c.execute(f"DROP VIEW {progression_table_name}")
+            c.execute(f"""CREATE TABLE {progression_table_name} AS
+                      SELECT date || ' - ' || habit_name AS date_plus_habit_name, habit_name,
+                             NULL AS habit_periodicity, date, 1 AS completed
+                      FROM {completion_table_name}""")
+            c.execute(f"DROP TABLE {completion_table_name}")
+
+        for table_name, create_statement, columns, keep_order in tables:
+            c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+            if c.fetchone() is None:
+                c.execute(create_statement)
+                continue
+            c.execute(f"ALTER TABLE {table_name} RENAME TO {table_name}_old")
+            c.execute(create_statement)
+            c.execute(f"INSERT OR IGNORE INTO {table_name} ({columns}) "
+                      f"SELECT {columns} FROM {table_name}_old ORDER BY {keep_order}")
+            c.execute(f"DROP TABLE {table_name}_old")
+
+        # The indexes are created after the old tables are dropped, because the old tables may still own indexes with
+        # the same names.
+        for statement in habit_index_statements(habit_table_name) + \
+                progression_index_statements(progression_table_name):
+            c.execute(statement)
+        if sparse_storage:
+            import sparse_storage_module
+            sparse_storage_module.create_sparse_storage(c, habit_table_name, date_table_name, progression_table_name,
+                                                        completion_table_name)
+
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        c.execute("COMMIT")
+    except sqlite3.Error as error:
+        # If BEGIN itself failed, there is no transaction to roll back.
+        if dbconnection.in_transaction:
+            c.execute("ROLLBACK")
+        print("")
+        print(f"A database error occurred while upgrading the database: {error}")
+        raise
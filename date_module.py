@@ -6,11 +6,14 @@ complete and up-to-date list of dates to work with. It is also executed in sever
 sure that database operations are performed using an up-to-date table.
 """
 
-import sqlite3
-from datetime import date, timedelta
+from datetime import date
 
+import connection_manager_module
 import database_and_table_creation_module
 
+# The key in the Metadata_table under which the most recent date in the Date_table is stored.
+DATE_WATERMARK_KEY = 'date_table_last_date'
+
 
 class Date:
     """The class 'Date' starts by defining the class, it only takes 'self' as an attribute. Next, it defines the
@@ -21,42 +24,62 @@ class Date:
     def __init__(self):
         self.dates = []
 
-    def update_dates(database, date_table_name):
-        """The function first connects to the Date_table in the database where it selects all rows (dates) in
-        descending order. Then it fetches the first row, which is the most recent date in the table. This value (date)
-        is stored in the variable last_date_in_table.
-
-        Next, the variable most_recent_date is defined by adding 1 day to the variable last_date_in_table. So this
-        is just the most recent date in the table + 1 day. Also, the date is transformed to ISO format (YYYY-MM-DD)
-        because this makes later database querying easier and more reliable in my opinion.
+    def update_dates(database, date_table_name, metadata_table_name='Metadata_table'):
+        """The function makes sure that the Date_table contains all dates up to and including 'the current date'.
 
-        Then, the current_date variable is defined by the 'current' date.
+        First, it reads the most recent date that has been added to the Date_table. This date is stored in the
+        Metadata_table (under the key DATE_WATERMARK_KEY). If this date is already 'the current date', the table is
+        up-to-date and the function returns immediately. This is the normal situation, because the function is
+        called from several modules.
 
-        Finally, using a while loop, the function inserts new values (dates) into the Date_table, and it stops after
-        the most recent date in the table is the current date. Then the insertions are committed and the database is
-        closed.
+        Otherwise, the most recent date in the Date_table itself is looked up (Date is the primary key, so this is a
+        lookup in the index). All missing dates after it, up to and including 'the current date', are generated by
+        SQLite with a recursive query and inserted with one single statement, also when the database has not been
+        opened for months. The dates are in ISO format (YYYY-MM-DD) because this makes later database querying easier
+        and more reliable in my opinion. Finally, 'the current date' is stored in the Metadata_table, and everything
+        is committed at once.
         """
-        # Make sure there is a date_table.
-        database_and_table_creation_module.create_date_table(date_table_name, database)
-
-        # Setting up the database connection.
-        dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
+        # Make sure there is a Metadata_table, and check whether the Date_table is already up-to-date.
+        database_and_table_creation_module.create_metadata_table(metadata_table_name, database)
+        dbconnection = connection_manager_module.get_connection(database)
         c = dbconnection.cursor()
+        if Date.dates_up_to_date(c, metadata_table_name):
+            return
 
-        # Querying the Date_table for the most recent date in it and storing this 1 row in variable last_date_in_table.
-        c.execute(f"SELECT Date FROM {date_table_name} ORDER BY Date DESC LIMIT 1")
-        last_date_in_table = c.fetchone()
+        # Make sure there is a date_table, insert the missing dates and commit everything at once.
+        database_and_table_creation_module.create_date_table(date_table_name, database)
+        Date.catch_up_dates(c, date_table_name, metadata_table_name)
+        dbconnection.commit()
+
+    def dates_up_to_date(c, metadata_table_name):
+        """This function returns True if the most recent date that is stored in the Metadata_table is 'the current
+        date' (or later). It uses the given cursor, so it can also be used inside a transaction."""
+        c.execute(f"SELECT value FROM {metadata_table_name} WHERE key = ?", (DATE_WATERMARK_KEY,))
+        watermark = c.fetchone()
+        return watermark is not None and watermark[0] >= date.today().isoformat()
 
-        most_recent_date = date.fromisoformat(last_date_in_table[0]) + timedelta(days=1)
+    def catch_up_dates(c, date_table_name, metadata_table_name):
+        """This function inserts all missing dates up to and including 'the current date' into the Date_table, and
+        stores 'the current date' in the Metadata_table. It uses the given cursor and does not commit, so the bootstrap
+        of the main module can do this in the same transaction as creating the tables.
+        """
+        current_date = date.today().isoformat()
 
-        current_date = date.today()
+        # Querying the Date_table for the most recent date in it.
+        c.execute(f"SELECT MAX(Date) FROM {date_table_name}")
+        last_date_in_table = c.fetchone()[0]
 
-        # Through the while loop new rows (dates) are added to the Date_table until all dates up to 'the current date'
-        # are in the table.
-        while most_recent_date <= current_date:
-            c.execute(f"INSERT INTO {date_table_name} (Date) VALUES (?)", (most_recent_date.isoformat(),))
-            most_recent_date += timedelta(days=1)
+        # All dates after the most recent date, up to and including 'the current date', are generated by a recursive
+        # query and inserted at once.
+        if last_date_in_table < current_date:
+            c.execute(f"""WITH RECURSIVE missing_dates (Date) AS (
+                          SELECT date(?, '+1 day')
+                          UNION ALL
+                          SELECT date(Date, '+1 day') FROM missing_dates WHERE Date < ?
+                      )
+                      INSERT OR IGNORE INTO {date_table_name} (Date) SELECT Date FROM missing_dates""",
+                      (last_date_in_table, current_date))
 
-        # Closing the database.
-        dbconnection.commit()
-        dbconnection.close()
+        # Storing the most recent date.
+        c.execute(f"INSERT OR REPLACE INTO {metadata_table_name} (key, value) VALUES (?, ?)",
+                  (DATE_WATERMARK_KEY, max(last_date_in_table, current_date)))
@@ -0,0 +1,84 @@
+"""This module contains the day cache of the progression menu. Before, every step to the previous or next day sent a
+new query for the progression of one date. Now, when a date is shown that is not in the cache, the progression of a
+window of days around it (window_days before and after) is read with one range query, which uses the index on
+(user_id, date, habit_name, completed) of the Progression_table. Stepping through the days in the window, or jumping
+to a date in the window, then needs no query at all.
+
+The cache is bounded: it keeps at most max_days days. When more days are read, the days that were used least recently
+are removed. After the user updates the progression of a habit, the cached day is updated in place (see update), so
+the cache never has to be read again because of an update.
+"""
+
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import connection_manager_module
+import database_and_table_creation_module
+
+# The number of days before and after a date that are read together with it.
+DEFAULT_WINDOW_DAYS = 14
+
+# The largest number of days that the cache keeps.
+DEFAULT_MAX_DAYS = 120
+
+
+class DayCache:
+    """This class keeps the progression of the days around the shown date of one user in memory: {date: [(date,
+    habit_name, completed), ...]}, with the rows of a date ordered by habit name, like read_day_progression."""
+
+    def __init__(self, database, user_id=database_and_table_creation_module.DEFAULT_USER_ID,
+                 window_days=DEFAULT_WINDOW_DAYS, max_days=DEFAULT_MAX_DAYS):
+        if max_days < 2 * window_days + 1:
+            raise ValueError("The cache must be able to keep at least one complete window of days.")
+        self.database = database
+        self.user_id = user_id
+        self.window_days = window_days
+        self.max_days = max_days
+        self.days = OrderedDict()
+        self.queries = 0
+
+    def day(self, day):
+        """This function returns the (date, habit_name, completed) rows of a date (YYYY-MM-DD). If the date is not in
+        the cache, the window of days around it is read first."""
+        if day not in self.days:
+            self.prefetch(day)
+        self.days.move_to_end(day)
+        return self.days[day]
+
+    def prefetch(self, day):
+        """This function reads the progression of the window of days around the date with one range query, and
+        stores every day of the window in the cache (also days without rows). Days of the window that are already in
+        the cache are replaced by the stored rows, so the write buffer overlay must be applied on top of them."""
+        center = date.fromisoformat(day)
+        first_day = (center - timedelta(days=self.window_days)).isoformat()
+        last_day = (center + timedelta(days=self.window_days)).isoformat()
+
+        dbconnection = connection_manager_module.get_connection(self.database)
+        c = dbconnection.cursor()
+        c.execute("""SELECT date, habit_name, completed FROM Progression_table
+                  WHERE user_id = ? AND date BETWEEN ? AND ? ORDER BY date, habit_name""",
+                  (self.user_id, first_day, last_day))
+        self.queries += 1
+
+        window = {(center + timedelta(days=offset)).isoformat(): []
+                  for offset in range(-self.window_days, self.window_days + 1)}
+        for row in c.fetchall():
+            window[row[0]].append(row)
+        for window_day, rows in window.items():
+            self.days[window_day] = rows
+            self.days.move_to_end(window_day)
+        while len(self.days) > self.max_days:
+            self.days.popitem(last=False)
+
+    def update(self, day, habit_name, completed):
+        """This function changes the status of a habit on a date in the cache, if the date is cached. It is called
+        after the user has updated the progression of the habit."""
+        rows = self.days.get(day)
+        if rows is None:
+            return
+        self.days[day] = [(row_date, row_habit_name, completed if row_habit_name == habit_name else row_completed)
+                          for row_date, row_habit_name, row_completed in rows]
+
+    def clear(self):
+        """This function removes all days from the cache."""
+        self.days.clear()
@@ -4,19 +4,40 @@ to reset the database and insert (again) the sample data. The reason for this wa
 grading of this project the sample data could be manipulated in every way possible, and then retrieved (again) and
 used if needed.
 """
-import sqlite3
+import connection_manager_module
+import database_and_table_creation_module
+import habit_registry_module
 
 
-def delete_tables_themselves(database, habit_table_name, date_table_name, progression_table_name):
+def delete_tables_themselves(database, habit_table_name, date_table_name, progression_table_name,
+                             metadata_table_name='Metadata_table', streak_table_name='Streak_table',
+                             completion_table_name='Completion_table', bitmap_table_name='Bitmap_table',
+                             user_table_name='User_table', rollup_table_name='Rollup_table',
+                             health_table_name='Health_table'):
     """This function deletes the tables from the input database. It is called from the main menu and allows the
-    user to delete the tables and then insert the sample data (again). It is also used by the test modules.
+    user to delete the tables and then insert the sample data (again). It is also used by the test modules. The
+    Metadata_table, Streak_table, Bitmap_table, Rollup_table, Health_table and User_table are deleted as well,
+    because their contents refer to the data in the deleted tables. In the sparse storage mode, the Progression_table
+    is a view on the Completion_table, so then the view and the Completion_table are deleted.
     """
-    dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
+    progression_table_type = database_and_table_creation_module.table_type(database, progression_table_name)
+
+    dbconnection = connection_manager_module.get_connection(database)
     c = dbconnection.cursor()
 
     c.execute(f"DROP TABLE IF EXISTS {habit_table_name}")
     c.execute(f"DROP TABLE IF EXISTS {date_table_name}")
-    c.execute(f"DROP TABLE IF EXISTS {progression_table_name}")
+    if progression_table_type == 'view':
+        c.execute(f"DROP VIEW {progression_table_name}")
+    else:
+        c.execute(f"DROP TABLE IF EXISTS {progression_table_name}")
+    c.execute(f"DROP TABLE IF EXISTS {completion_table_name}")
+    c.execute(f"DROP TABLE IF EXISTS {metadata_table_name}")
+    c.execute(f"DROP TABLE IF EXISTS {streak_table_name}")
+    c.execute(f"DROP TABLE IF EXISTS {bitmap_table_name}")
+    c.execute(f"DROP TABLE IF EXISTS {rollup_table_name}")
+    c.execute(f"DROP TABLE IF EXISTS {health_table_name}")
+    c.execute(f"DROP TABLE IF EXISTS {user_table_name}")
 
     dbconnection.commit()
-    dbconnection.close()
+    habit_registry_module.invalidate(database)
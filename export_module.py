@@ -0,0 +1,159 @@
+"""This module exports the Habit_table and the Progression_table, for backups and for analysis in other tools. The
+rows are written to a gzip-compressed CSV-file or JSON Lines file (one JSON object per line).
+
+The export is a pipeline of generators: the rows are read from the database in batches with fetchmany, every batch is
+converted to one block of text, and the blocks are written to the compressed file one by one. So only one batch is in
+memory at a time, also when the Progression_table contains hundreds of millions of rows. The filters (date range,
+habit and periodicity) are part of the query, so SQLite uses the indexes of the Progression_table and only the
+requested rows are read. An export contains the habits or progression of one user: the default user, unless a user_id
+is given.
+
+A CSV export of the Progression_table has the layout of Sample_data.csv, so it can be imported again with the
+progression_import_module. From the command line:
+python export_module.py progression backup.csv.gz --from 2024-05-01 --periodicity daily
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+
+import connection_manager_module
+import database_and_table_creation_module
+import user_module
+
+# The columns that are exported per table.
+EXPORT_COLUMNS = {
+    'habits': ['habit_name', 'habit_description', 'habit_periodicity', 'habit_creation_date'],
+    'progression': ['date_plus_habit_name', 'habit_name', 'habit_periodicity', 'date', 'completed'],
+}
+
+# The default number of rows that is read from the database at once.
+DEFAULT_BATCH_SIZE = 10000
+
+
+def export_table(database, table, output_path, output_format='csv', first_date=None, last_date=None, habit_name=None,
+                 periodicity=None, habit_table_name='Habit_table', progression_table_name='Progression_table',
+                 batch_size=DEFAULT_BATCH_SIZE, compress=True,
+                 user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function exports the 'habits' or the 'progression' table to the output file, as 'csv' or as 'jsonl',
+    gzip-compressed unless compress is False. Only the rows of the given habit and/or periodicity are exported, and
+    for the progression only the dates from first_date up to and including last_date (YYYY-MM-DD). It returns the
+    number of exported rows.
+    """
+    if table not in EXPORT_COLUMNS:
+        raise ValueError("The table must be 'habits' or 'progression'.")
+    if output_format not in ('csv', 'jsonl'):
+        raise ValueError("The format must be 'csv' or 'jsonl'.")
+
+    query, parameters = export_query(table, first_date, last_date, habit_name, periodicity, habit_table_name,
+                                     progression_table_name, user_id)
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(query, parameters)
+
+    number_of_rows = 0
+
+    def counted_batches():
+        nonlocal number_of_rows
+        for batch in fetch_batches(c, batch_size):
+            number_of_rows += len(batch)
+            yield batch
+
+    columns = EXPORT_COLUMNS[table]
+    text_blocks = csv_blocks(counted_batches(), columns) if output_format == 'csv' \
+        else json_blocks(counted_batches(), columns)
+    with open_output(output_path, compress) as output_file:
+        for text in text_blocks:
+            output_file.write(text)
+    return number_of_rows
+
+
+def export_query(table, first_date=None, last_date=None, habit_name=None, periodicity=None,
+                 habit_table_name='Habit_table', progression_table_name='Progression_table',
+                 user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the SELECT statement and its parameters for the table and filters. The habits are
+    ordered in the order in which they were added, the progression by date and habit name (the order of the index
+    on the user and date)."""
+    conditions = ["user_id = ?"]
+    parameters = [user_id]
+    if table == 'progression':
+        if first_date is not None:
+            conditions.append("date >= ?")
+            parameters.append(first_date)
+        if last_date is not None:
+            conditions.append("date <= ?")
+            parameters.append(last_date)
+    if habit_name is not None:
+        conditions.append("habit_name = ?")
+        parameters.append(habit_name)
+    if periodicity is not None:
+        conditions.append("habit_periodicity = ?")
+        parameters.append(periodicity)
+
+    where_clause = f"WHERE {' AND '.join(conditions)}"
+    columns = ", ".join(EXPORT_COLUMNS[table])
+    if table == 'habits':
+        return f"SELECT {columns} FROM {habit_table_name} {where_clause} ORDER BY rowid", parameters
+    return f"SELECT {columns} FROM {progression_table_name} {where_clause} ORDER BY date, habit_name", parameters
+
+
+def fetch_batches(cursor, batch_size=DEFAULT_BATCH_SIZE):
+    """This generator yields the rows of an executed query in batches of batch_size rows, read with fetchmany."""
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield batch
+
+
+def csv_blocks(batches, columns, delimiter=';'):
+    """This generator yields the header line, and then the CSV lines of every batch as one block of text. The lines
+    are in the layout of Sample_data.csv."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def json_blocks(batches, columns):
+    """This generator yields the JSON Lines of every batch as one block of text: one JSON object per row, each on
+    its own line."""
+    for batch in batches:
+        yield "".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in batch)
+
+
+def open_output(output_path, compress=True):
+    """This function opens the output file for writing text, gzip-compressed unless compress is False. Compression
+    level 6 is used: it compresses nearly as well as the maximum level, and is much faster."""
+    if compress:
+        return gzip.open(output_path, 'wt', encoding='utf-8', newline='', compresslevel=6)
+    return open(output_path, 'w', encoding='utf-8', newline='')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the habits or the progression to a (compressed) file.")
+    parser.add_argument('table', choices=['habits', 'progression'], help="the table to export")
+    parser.add_argument('output_path', help="the output file, for example backup.csv.gz")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help="the format of the output file")
+    parser.add_argument('--database', default='Habit_app_database.db', help="the database file")
+    parser.add_argument('--from', dest='first_date', help="the first date to export (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='last_date', help="the last date to export (YYYY-MM-DD)")
+    parser.add_argument('--habit', help="only export this habit")
+    parser.add_argument('--periodicity', choices=['daily', 'weekly'], help="only export habits of this periodicity")
+    parser.add_argument('--no-compress', action='store_true', help="write the file without gzip compression")
+    parser.add_argument('--user', default=database_and_table_creation_module.DEFAULT_USER_NAME,
+                        help="the user whose habits or progression are exported")
+    arguments = parser.parse_args()
+
+    number_of_rows = export_table(arguments.database, arguments.table, arguments.output_path, arguments.format,
+                                  arguments.first_date, arguments.last_date, arguments.habit, arguments.periodicity,
+                                  compress=not arguments.no_compress,
+                                  user_id=user_module.user_id_for_name(arguments.database, arguments.user))
+    print(f"Exported {number_of_rows} rows to {arguments.output_path}.")
@@ -0,0 +1,258 @@
+"""This module calculates the health of the habits: the completion rate of the last 7, 30 and 90 days (the share of
+the tracked days on which the habit was completed), and a health score. The health score is an exponentially weighted
+moving average (EWMA) of the completions: every day, the score moves a step (ALPHA) towards 100 if the habit was
+completed and towards 0 if it was not. Recent days therefore count most, and a missed day costs more points when the
+habit was going well. For a young habit, the average is divided by the total weight of its days, so the first days do
+not count as missed.
+
+The values are stored in the Health_table, up to and including a date (as_of), and kept up-to-date incrementally
+instead of being calculated from the whole history every time:
+- a check-off (see update_habit_health) changes the counts of the windows that contain the date, and the average by
+  the weight of the date: a few additions, however long the history is.
+- new days (the 'daily rollover', see roll_over_health) are added when combine_habits_dates adds them, for all habits
+  at once: one query reads the new days and the days of the longest window, the windows are counted again from those
+  days and the average moves forward by the new days.
+The full calculation (compute_health) is used to build the values of a habit the first time, and by verify_health to
+check the stored values. When progression data is changed in another way (importing, marking many check-offs at once,
+deleting a habit), the values of the habit are removed by invalidate_health and built again when needed.
+"""
+
+import argparse
+from datetime import date
+
+import connection_manager_module
+import database_and_table_creation_module
+import streak_table_module
+import user_module
+
+# The windows (in days) of the completion rates. The Health_table has a column completed_<days> per window.
+RATE_WINDOWS = (7, 30, 90)
+
+# The span of the health score in days: the weight of a day is ALPHA, and it shrinks by a factor (1 - ALPHA) per day.
+HEALTH_SPAN_DAYS = 30
+ALPHA = 2 / (HEALTH_SPAN_DAYS + 1)
+
+
+def compute_health(database, habit_name, as_of, progression_table_name='Progression_table',
+                   user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function calculates the stored values of a habit up to and including as_of (a date object) from the whole
+    history of the habit in the Progression_table, and returns them as a dictionary with the columns of the
+    Health_table."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(f"""SELECT date, completed FROM {progression_table_name}
+              WHERE user_id = ? AND habit_name = ? AND date <= ?""", (user_id, habit_name, as_of.isoformat()))
+
+    values = {'as_of': as_of.isoformat(), 'tracked_days': 0, 'ewma': 0.0}
+    values.update({f'completed_{days}': 0 for days in RATE_WINDOWS})
+    for day, completed in c.fetchall():
+        values['tracked_days'] += 1
+        if not completed:
+            continue
+        age = (as_of - date.fromisoformat(day)).days
+        values['ewma'] += ALPHA * (1 - ALPHA) ** age
+        for days in RATE_WINDOWS:
+            if age < days:
+                values[f'completed_{days}'] += 1
+    return values
+
+
+def store_health(database, habit_name, values, health_table_name='Health_table',
+                 user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function stores the values of a habit (a dictionary with the columns of the Health_table) and commits."""
+    dbconnection = connection_manager_module.get_connection(database)
+    dbconnection.execute(f"""INSERT OR REPLACE INTO {health_table_name}
+                         (habit_name, as_of, tracked_days, completed_7, completed_30, completed_90, ewma, user_id)
+                         VALUES (:habit_name, :as_of, :tracked_days, :completed_7, :completed_30, :completed_90, :ewma,
+                                 :user_id)""",
+                         dict(values, habit_name=habit_name, user_id=user_id))
+    dbconnection.commit()
+
+
+def roll_over_health(database, new_date, progression_table_name='Progression_table', health_table_name='Health_table',
+                     user_id=None):
+    """This function moves the stored values of all habits of the given user (or of all users if no user_id is given)
+    whose date (as_of) is before new_date (a date object) forward to new_date. It is called by combine_habits_dates
+    after new dates have been added (the 'daily rollover'), like roll_over_streaks, and by read_health.
+
+    The statuses that are needed are read with one query for all habits: the days after as_of, and the days in the
+    longest window. The completed days of every window are counted from the days in the window, the average moves
+    forward by the number of new days, and every new day is added with its weight. So the number of queries does not
+    depend on the number of days or habits, and nothing is written if all values are up-to-date.
+    """
+    if database_and_table_creation_module.table_type(database, health_table_name) is None:
+        return
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(f"""SELECT s.user_id, s.habit_name, s.as_of, s.tracked_days, s.ewma, p.date, p.completed
+              FROM {health_table_name} AS s
+              LEFT JOIN {progression_table_name} AS p ON p.user_id = s.user_id AND p.habit_name = s.habit_name
+                AND p.date > MIN(s.as_of, date(:new_date, '-{max(RATE_WINDOWS)} days')) AND p.date <= :new_date
+              WHERE s.as_of < :new_date AND s.user_id = COALESCE(:user_id, s.user_id)""",
+              {'new_date': new_date.isoformat(), 'user_id': user_id})
+
+    rolled = {}
+    for row_user_id, row_habit_name, as_of, tracked_days, ewma, day, completed in c.fetchall():
+        values = rolled.get((row_user_id, row_habit_name))
+        if values is None:
+            values = rolled[(row_user_id, row_habit_name)] = {
+                'user_id': row_user_id, 'habit_name': row_habit_name, 'as_of': new_date.isoformat(),
+                'tracked_days': tracked_days, 'ewma': ewma * (1 - ALPHA) ** (new_date - date.fromisoformat(as_of)).days}
+            values.update({f'completed_{days}': 0 for days in RATE_WINDOWS})
+        if day is None:
+            continue
+        age = (new_date - date.fromisoformat(day)).days
+        if day > as_of:
+            values['tracked_days'] += 1
+            values['ewma'] += ALPHA * (1 - ALPHA) ** age * (completed or 0)
+        for days in RATE_WINDOWS:
+            if age < days:
+                values[f'completed_{days}'] += completed or 0
+
+    if rolled:
+        window_columns = "".join(f"completed_{days} = :completed_{days}, " for days in RATE_WINDOWS)
+        c.executemany(f"""UPDATE {health_table_name}
+                      SET as_of = :as_of, tracked_days = :tracked_days, {window_columns}ewma = :ewma
+                      WHERE user_id = :user_id AND habit_name = :habit_name""", rolled.values())
+        dbconnection.commit()
+
+
+def read_health(database, today=None, habit_name=None, habit_table_name='Habit_table',
+                progression_table_name='Progression_table', health_table_name='Health_table',
+                user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the completion rates and the health score of one habit, or of all habits of the user, on
+    today (a date object, by default the current date) as a dictionary: {habit_name: {'rate_7': ..., 'rate_30': ...,
+    'rate_90': ..., 'health': ...}}, all as percentages, in the order in which the habits were added. Stored values of
+    an earlier date are rolled forward to today first (see roll_over_health), and habits without stored values are
+    built with compute_health."""
+    today = today or date.today()
+    database_and_table_creation_module.create_health_table(health_table_name, database)
+    roll_over_health(database, today, progression_table_name, health_table_name, user_id)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(f"""SELECT h.habit_name, s.as_of, s.tracked_days, s.completed_7, s.completed_30, s.completed_90, s.ewma
+              FROM {habit_table_name} AS h
+              LEFT JOIN {health_table_name} AS s ON s.user_id = h.user_id AND s.habit_name = h.habit_name
+              WHERE h.user_id = ? AND h.habit_name = COALESCE(?, h.habit_name)
+              ORDER BY h.rowid""", (user_id, habit_name))
+    columns = [description[0] for description in c.description]
+
+    health = {}
+    for row in c.fetchall():
+        values = dict(zip(columns, row))
+        row_habit_name = values.pop('habit_name')
+        if values['as_of'] is None or values['as_of'] > today.isoformat():
+            values = compute_health(database, row_habit_name, today, progression_table_name, user_id)
+            store_health(database, row_habit_name, values, health_table_name, user_id)
+        health[row_habit_name] = health_scores(values)
+    return health
+
+
+def health_scores(values):
+    """This function returns the completion rates and the health score (as percentages) from the stored values of a
+    habit. The rate of a window is divided by the number of tracked days in the window, and the health score by the
+    total weight of the tracked days."""
+    tracked_days = values['tracked_days']
+    scores = {f'rate_{days}': 100 * values[f'completed_{days}'] / min(days, tracked_days) if tracked_days else 0.0
+              for days in RATE_WINDOWS}
+    scores['health'] = 100 * values['ewma'] / (1 - (1 - ALPHA) ** tracked_days) if tracked_days else 0.0
+    return scores
+
+
+def update_habit_health(database, habit_name, day, old_completed, new_completed, health_table_name='Health_table',
+                        user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function changes the stored values of a habit after its status on a date (YYYY-MM-DD) changed from
+    old_completed to new_completed. Only the windows that contain the date change, and the average changes by the
+    weight of the date. A date after the date of the stored values is not counted yet: roll_over_health reads its
+    status when it gets there. If there is no Health_table or the habit has no stored values, nothing happens."""
+    change = (new_completed or 0) - (old_completed or 0)
+    if change == 0 or database_and_table_creation_module.table_type(database, health_table_name) is None:
+        return
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(f"SELECT as_of FROM {health_table_name} WHERE user_id = ? AND habit_name = ?", (user_id, habit_name))
+    row = c.fetchone()
+    if row is None or day > row[0]:
+        return
+
+    age = (date.fromisoformat(row[0]) - date.fromisoformat(day)).days
+    window_columns = "".join(f"completed_{days} = completed_{days} + ?, " for days in RATE_WINDOWS)
+    c.execute(f"""UPDATE {health_table_name} SET {window_columns}ewma = ewma + ?
+              WHERE user_id = ? AND habit_name = ?""",
+              [change if age < days else 0 for days in RATE_WINDOWS] +
+              [change * ALPHA * (1 - ALPHA) ** age, user_id, habit_name])
+    dbconnection.commit()
+
+
+def invalidate_health(database, health_table_name='Health_table', habit_name=None, user_id=None):
+    """This function removes the stored values of one habit, or of all habits if no habit name is given, of the given
+    user, or of all users if no user_id is given. They are built again by read_health the next time they are needed.
+    """
+    if database_and_table_creation_module.table_type(database, health_table_name) is None:
+        return
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    conditions, parameters = streak_table_module.user_and_habit_conditions(user_id, habit_name)
+    c.execute(f"DELETE FROM {health_table_name} {conditions}", parameters)
+    dbconnection.commit()
+
+
+def verify_health(database, today=None, health_table_name='Health_table',
+                  user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function compares the stored values of the habits of the user (rolled forward to today) with the values
+    of the full calculation. It returns the habits whose values differ: {habit_name: (stored values, calculated
+    values)}; an empty dictionary means that the incremental values are correct."""
+    today = today or date.today()
+    read_health(database, today, health_table_name=health_table_name, user_id=user_id)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(f"""SELECT habit_name, as_of, tracked_days, completed_7, completed_30, completed_90, ewma
+              FROM {health_table_name} WHERE user_id = ?""", (user_id,))
+    columns = [description[0] for description in c.description]
+
+    differences = {}
+    for row in c.fetchall():
+        stored = dict(zip(columns, row))
+        row_habit_name = stored.pop('habit_name')
+        calculated = compute_health(database, row_habit_name, today, user_id=user_id)
+        if any(stored[column] != calculated[column] for column in calculated if column != 'ewma') or \
+                abs(stored['ewma'] - calculated['ewma']) > 1e-9:
+            differences[row_habit_name] = (stored, calculated)
+    return differences
+
+
+def print_health(database, today=None, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function prints the completion rates and the health score of all habits of the user."""
+    health = read_health(database, today, user_id=user_id)
+    print("")
+    print(f"{'Habit name':<31} {'7 days':>7} {'30 days':>8} {'90 days':>8} {'health':>7}")
+    print("-" * 65)
+    for habit_name, scores in health.items():
+        print(f"{habit_name:<31} {scores['rate_7']:>6.0f}% {scores['rate_30']:>7.0f}% {scores['rate_90']:>7.0f}% "
+              f"{scores['health']:>7.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show the completion rates and the health score of the habits.")
+    parser.add_argument('--verify', action='store_true',
+                        help="compare the stored values with a full calculation from the progression")
+    parser.add_argument('--database', default='Habit_app_database.db', help="the database file")
+    parser.add_argument('--user', default=database_and_table_creation_module.DEFAULT_USER_NAME,
+                        help="the user whose habits are shown")
+    arguments = parser.parse_args()
+    import main_habit_tracker_app
+    main_habit_tracker_app.bootstrap(arguments.database)
+
+    user_id = user_module.user_id_for_name(arguments.database, arguments.user)
+    if arguments.verify:
+        differences = verify_health(arguments.database, user_id=user_id)
+        for habit_name, (stored, calculated) in differences.items():
+            print(f"{habit_name}: stored {stored}, calculated {calculated}")
+        print(f"{len(differences)} habit(s) with different values.")
+    else:
+        print_health(arguments.database, user_id=user_id)
@@ -1,22 +1,33 @@
 """This is the Habit_class module. It only contains the class 'Habit'. In this class, the functions for adding a habit,
-storing it into the database, providing habit lists and deleting habits are contained.
+storing it into the database, providing habit lists and deleting habits are contained. Every habit belongs to a user
+(see user_module), and all functions only see the habits of one user: the default user, unless a user_id is given.
 """
 
-import sqlite3
 from datetime import datetime
 
+import bitmap_storage_module
+import connection_manager_module
+import database_and_table_creation_module
+import habit_health_module
+import habit_registry_module
+import progression_module
+import rollup_storage_module
+import streak_table_module
+
 
 class Habit:
     """The class 'Habit' starts by defining the class and its attributes. Next, it defines functions related to
     creating and storing new habits, providing lists of current habits, and deleting habits.
     """
 
-    def __init__(self, habit_name, habit_description, habit_periodicity, habit_creation_date):
+    def __init__(self, habit_name, habit_description, habit_periodicity, habit_creation_date,
+                 user_id=database_and_table_creation_module.DEFAULT_USER_ID):
         """Here the attributes of the class 'Habit' are defined.
         :param habit_name: This is the habit name that the user can give. It is the unique attribute/row and a string.
         :param habit_description: This is the description. This is a string.
         :param habit_periodicity: This is the periodicity, it is either daily or weekly.
         :param habit_creation_date: This is the date and time on which the habit has been created.
+        :param user_id: This is the number of the user to whom the habit belongs. Habit names are unique per user.
 
         Personal reflection: lately during the project I realized that not just the creating date, but also the time
         was required. I had to adjust the code and check whether this had implications for the rest of the app.
@@ -25,9 +36,10 @@ class Habit:
         self.habit_description = habit_description
         self.habit_periodicity = habit_periodicity
         self.habit_creation_date = habit_creation_date
+        self.user_id = user_id
 
     @classmethod
-    def add_habit(cls, database):
+    def add_habit(cls, database, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
         """This function allows the user to create a new habit. It is called upon from the main menu. It prompts
         the user for input on the habit name, description, and periodicity. Several limitations are implemented for
         stability and security: input is limited regarding length and usable characters. Also, the input is trimmed of
@@ -37,7 +49,8 @@ class Habit:
         for the habit_creation_date, which is exact at the minute (which should be exact enough considering its usage).
 
         The created variables are then stored in the variable 'new_habit' which is then stored in the database through
-        the function 'save_to_database'.
+        the function 'save_to_database'. The checks of the input are done by the functions validate_habit_name,
+        habit_exists and validate_habit_description, which are also used by the command_line_module.
         """
         # Input for the habit name.
         while True:
@@ -45,27 +58,20 @@ class Habit:
                                "type 'c' to cancel. ").strip().lower()
             if habit_name == 'c':
                 return
-            elif len(habit_name) > 30 or len(habit_name) < 1:
-                print("Habit name must be between 1 and 30 long. ")
-            elif not habit_name.replace(' ', '').isalnum():
-                print("Habit name must only contain alphabetic characters and numbers. Please try again.")
+            error = cls.validate_habit_name(habit_name)
+            if error is not None:
+                print(error)
+            elif cls.habit_exists(database, habit_name, user_id):
+                print("Habit name already exists. Please enter a different name.")
             else:
-                dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
-                c = dbconnection.cursor()
-                c.execute("SELECT COUNT(*) FROM Habit_table WHERE habit_name = ?", (habit_name,))
-                count = c.fetchone()[0]
-                if count > 0:
-                    print("Habit name already exists. Please enter a different name.")
-                else:
-                    break
+                break
 
         # Input for the habit description.
         while True:
             habit_description = input("Enter the description of the habit (max 45 characters): ").strip().lower()
-            if len(habit_description) > 45:
-                print("Habit description must be 45 characters or fewer. Please try again.")
-            elif not habit_description.replace(' ', '').isalnum():
-                print("Habit description must only contain alphabetic characters and numbers. Please try again.")
+            error = cls.validate_habit_description(habit_description)
+            if error is not None:
+                print(error)
             else:
                 break
 
@@ -86,42 +92,77 @@ class Habit:
         habit_creation_date = datetime.now().strftime('%Y-%m-%d %H:%M')
 
         # Storing the data into the variable new_habit, which is then used by the function save_to_database.
-        new_habit = cls(habit_name, habit_description, habit_periodicity, habit_creation_date)
+        new_habit = cls(habit_name, habit_description, habit_periodicity, habit_creation_date, user_id)
         new_habit.save_to_database(database)
 
+    @staticmethod
+    def validate_habit_name(habit_name):
+        """This function checks whether a habit name (already trimmed and in lower case) has a valid length and only
+        contains letters, numbers and spaces. It returns the error message for the user, or None if the name is
+        valid. Whether the name already exists is checked by habit_exists."""
+        if len(habit_name) > 30 or len(habit_name) < 1:
+            return "Habit name must be between 1 and 30 long. "
+        if not habit_name.replace(' ', '').isalnum():
+            return "Habit name must only contain alphabetic characters and numbers. Please try again."
+        return None
+
+    @staticmethod
+    def validate_habit_description(habit_description):
+        """This function checks whether a habit description has a valid length and only contains letters, numbers
+        and spaces. It returns the error message for the user, or None if the description is valid."""
+        if len(habit_description) > 45:
+            return "Habit description must be 45 characters or fewer. Please try again."
+        if not habit_description.replace(' ', '').isalnum():
+            return "Habit description must only contain alphabetic characters and numbers. Please try again."
+        return None
+
+    @staticmethod
+    def habit_exists(database, habit_name, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+        """This function returns whether the user has a habit with this name in the Habit_table. The names are kept
+        in memory by the habit_registry_module, so the input loop of add_habit does not query the database for every
+        attempt."""
+        return habit_registry_module.habit_exists(database, habit_name, user_id)
+
     def save_to_database(self, database):
         """This function is called upon by the add_habit function which feeds the variable 'new_habit' into the
-        save_to_database function. This variable contains data on the attributes of the new habit. Next, a connection
-        to the database is set up and the new habit(data) is stored into the table 'Habit_table'. Then, the insertion
-        is committed (made definitive) and the database is closed. Finally, a confirmation message is printed which
-        can be seen from the main menu.
+        save_to_database function. This variable contains data on the attributes of the new habit. The habit is stored
+        into the table 'Habit_table' by insert_into_database. Finally, a confirmation message is printed which can be
+        seen from the main menu.
         """
-        dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
-        c = dbconnection.cursor()
-
-        c.execute("INSERT INTO Habit_table (habit_name, habit_description, habit_periodicity, habit_creation_date) "
-                  "VALUES (?, ?, ?, ?)",
-                  (self.habit_name, self.habit_description, self.habit_periodicity, self.habit_creation_date))
+        self.insert_into_database(database)
 
         print("")
         print(f"You have added the habit '{self.habit_name}'. This is a '{self.habit_periodicity}' habit.")
 
+    def insert_into_database(self, database):
+        """This function sets up a connection to the database and stores the habit(data) into the table
+        'Habit_table'. Then, the insertion is committed (made definitive), and the habit registry of the user is
+        invalidated."""
+        dbconnection = connection_manager_module.get_connection(database)
+        c = dbconnection.cursor()
+
+        c.execute("INSERT INTO Habit_table (habit_name, habit_description, habit_periodicity, habit_creation_date, "
+                  "user_id) VALUES (?, ?, ?, ?, ?)",
+                  (self.habit_name, self.habit_description, self.habit_periodicity, self.habit_creation_date,
+                   self.user_id))
+
         dbconnection.commit()
-        dbconnection.close()
+        habit_registry_module.invalidate(database, self.user_id)
 
-    def provide_habit_list(table, database):
+    def provide_habit_list(table, database, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
         """This function is called from the main menu. It does not create an instance or call upon an instance,
         but accesses all instances instead.
-        It first sets up a connection to the database and performs a complete query of the Habit_table. Next, it prints
-        the habit names through a for loop. User-friendly names for the printed columns are used, so not the names
-        of the columns in the table. Then, the database is closed.
+        It first sets up a connection to the database and queries all habits of the user from the Habit_table. Next, it
+        prints the habit names through a for loop. User-friendly names for the printed columns are used, so not the
+        names of the columns in the table.
         """
         # Connect to database.
-        dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
+        dbconnection = connection_manager_module.get_connection(database)
         c = dbconnection.cursor()
 
-        # Query all data from the Habit_table and store this in the variable all_habits.
-        c.execute(f"SELECT * FROM {table}")
+        # Query all habits of the user from the Habit_table and store this in the variable all_habits.
+        c.execute(f"SELECT habit_name, habit_description, habit_periodicity, habit_creation_date FROM {table} "
+                  f"WHERE user_id = ? ORDER BY rowid", (user_id,))
         all_habits = c.fetchall()
 
         # Then, user-friendly column names are printed (not the table column names) and the habit data itself is
@@ -135,14 +176,11 @@ class Habit:
             name, description, periodicity, creation_date = habit
             print(f"{name:<31} {description:<46} {periodicity:<15} {creation_date:<20}")
 
-        # The database is closed.
-        dbconnection.close()
-
-    def provide_habit_list_per_periodicity(table, database):
+    def provide_habit_list_per_periodicity(table, database, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
         """This function is quite similar to the provide_habit_list function. It first prompts the user for whether they
         want an overview of the daily or weekly habits. Next, based on the input of the user, it queries the database
         for either all daily or all weekly habits and prints these. User-friendly names are used, so not the names of
-        the columns in the table. Then, it closes the database.
+        the columns in the table.
         """
         # Prompt user for input on which habits they want to see (daily or weekly).
         print("")
@@ -150,7 +188,7 @@ class Habit:
             "Of which specific periodicity would you like to see all the habits? Type 0 for daily, 1 for weekly: "))
 
         # Connect to database.
-        dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
+        dbconnection = connection_manager_module.get_connection(database)
         c = dbconnection.cursor()
 
         # If the user wants to see all daily habits, all data from Habit_table is queried with a daily periodicity.
@@ -159,7 +197,7 @@ class Habit:
         if specific_periodicity == 0:
             c.execute(
                 f"SELECT habit_name, habit_description, habit_creation_date FROM {table} "
-                f"WHERE habit_periodicity='daily'")
+                f"WHERE user_id = ? AND habit_periodicity='daily'", (user_id,))
             all_daily_habits = c.fetchall()
             print("")
             print("These are all your daily habits, including their description and creation date.")
@@ -175,7 +213,7 @@ class Habit:
         elif specific_periodicity == 1:
             c.execute(
                 f"SELECT habit_name, habit_description, habit_creation_date FROM {table} "
-                f"WHERE habit_periodicity='weekly'")
+                f"WHERE user_id = ? AND habit_periodicity='weekly'", (user_id,))
             all_weekly_habits = c.fetchall()
             print("")
             print("These are all your weekly habits, including their description and creation date.")
@@ -185,11 +223,8 @@ class Habit:
                 name, description, creation_date = habit
                 print(f"{name:<31} {description:<46} {creation_date:<20}")
 
-        # Closing the database.
-        dbconnection.close()
-
     @staticmethod
-    def delete_habit(database):
+    def delete_habit(database, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
         """This function deletes the habit selected by the user. First, it connects to the database, queries the
         Habit_table for all habits, and then prints all habits to the user using a for loop. Next, it prompts the
         user for the habit to be deleted which is stored into the variable 'habit_to_be_deleted'. If the user enters
@@ -200,14 +235,14 @@ class Habit:
         is found, the corresponding row in the Habit_table is deleted. Also, the corresponding row in the
         Progression_table is deleted to make sure that the habit does no longer show up when the user queries the
         database for data on streaks or when the user updates their progress. The deletion is made definitive by
-        committing it to the database. Then, the database is closed.
+        committing it to the database.
         """
         # Connection to the database is set up.
-        dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
+        dbconnection = connection_manager_module.get_connection(database)
         c = dbconnection.cursor()
 
-        # All habit names in the Habit_table are queried and printed.
-        c.execute("SELECT habit_name FROM Habit_table")
+        # All habit names of the user in the Habit_table are queried and printed.
+        c.execute("SELECT habit_name FROM Habit_table WHERE user_id = ? ORDER BY rowid", (user_id,))
         all_habits = c.fetchall()
         print("These are all your habits: ")
         for i in all_habits:
@@ -221,21 +256,37 @@ class Habit:
         # If the user cancels, they go back to main menu.
         if habit_to_be_deleted.lower() == "c":
             print("Cancelled.")
-            dbconnection.close()
             return
 
-        # If the user enters a value different from 'c', the database is checked whether the habit exists. If it
-        # exists, the habit data (all columns) is deleted from both the Habit_table and the Progression_table.
-        c.execute("SELECT 1 FROM Habit_table WHERE habit_name = ?", (habit_to_be_deleted,))
-        exists = c.fetchone() is not None
-        if not exists:
+        # If the user enters a value different from 'c', the habit is deleted by remove_from_database, if it exists.
+        if not Habit.remove_from_database(database, habit_to_be_deleted, user_id):
             print("Habit name not found.")
         else:
-            c.execute("DELETE FROM Habit_table WHERE habit_name = ?", (habit_to_be_deleted,))
-            c.execute("DELETE FROM Progression_table WHERE habit_name = ?", (habit_to_be_deleted,))
-            dbconnection.commit()
             print(f"Habit '{habit_to_be_deleted}' and its related progressions have been deleted.")
 
-        # The database is closed.
-        if dbconnection:
-            dbconnection.close()
+    @staticmethod
+    def remove_from_database(database, habit_name, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+        """This function deletes a habit of the user, and returns False if the user has no such habit. The habit data
+        (all columns) is deleted from both the Habit_table and the Progression_table. The rowid of the habit is passed
+        on to lower_habit_watermark, so that a habit which is added later on (and which may get the same rowid) is
+        still picked up by combine_habits_dates. The stored streaks, bitmap, rollups and health values of the habit are
+        removed as well, and the habit registry of the user is invalidated.
+        """
+        dbconnection = connection_manager_module.get_connection(database)
+        c = dbconnection.cursor()
+
+        c.execute("SELECT rowid FROM Habit_table WHERE user_id = ? AND habit_name = ?", (user_id, habit_name))
+        habit_row = c.fetchone()
+        if habit_row is None:
+            return False
+
+        c.execute("DELETE FROM Habit_table WHERE user_id = ? AND habit_name = ?", (user_id, habit_name))
+        c.execute("DELETE FROM Progression_table WHERE user_id = ? AND habit_name = ?", (user_id, habit_name))
+        dbconnection.commit()
+        habit_registry_module.invalidate(database, user_id)
+        progression_module.Progression.lower_habit_watermark(database, habit_row[0])
+        streak_table_module.invalidate_streaks(database, habit_name=habit_name, user_id=user_id)
+        bitmap_storage_module.invalidate_bitmaps(database, habit_name=habit_name, user_id=user_id)
+        rollup_storage_module.invalidate_rollups(database, habit_name=habit_name, user_id=user_id)
+        habit_health_module.invalidate_health(database, habit_name=habit_name, user_id=user_id)
+        return True
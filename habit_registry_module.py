@@ -0,0 +1,55 @@
+"""This module keeps the habit names of the users in memory: the habit registry. Before, checking whether a habit
+exists meant a query every time: the progression menu even read the habit name of every row of the Progression_table
+(one row per habit per day) into a list, and searched that list. Now the names and periodicities of the habits of a
+user are read from the Habit_table once, and kept in a dictionary, so a check is a single dictionary lookup.
+
+The registries are kept on the connection (in its caches, see connection_manager_module), so every thread has its own
+registries, and they are removed together with the connection when it is closed. A registry is removed (invalidated)
+when the habits change:
+- by the functions of this application: insert_into_database and remove_from_database of the habit_module (used by
+  save_to_database and delete_habit), and the modules that insert the sample data or empty the database, call
+  invalidate.
+- by another connection (another thread, program or process): SQLite raises the data_version of the database when
+  another connection changes it. The registry stores the data_version it was read with, and is read again when it
+  differs.
+"""
+
+import connection_manager_module
+import database_and_table_creation_module
+
+# The key of the registries in the caches of a connection: {user_id: (data_version, {habit_name: habit_periodicity})}.
+REGISTRY_CACHE_KEY = 'habit_registries'
+
+
+def habit_periodicities(database, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the habits of the user as a dictionary: {habit_name: habit_periodicity}. The dictionary
+    is read from the Habit_table the first time, and after the registry has been invalidated. It must not be
+    changed by the caller."""
+    dbconnection = connection_manager_module.get_connection(database)
+    data_version = dbconnection.execute("PRAGMA data_version").fetchone()[0]
+    registries = dbconnection.caches.setdefault(REGISTRY_CACHE_KEY, {})
+    registry = registries.get(user_id)
+    if registry is not None and registry[0] == data_version:
+        return registry[1]
+
+    c = dbconnection.cursor()
+    c.execute("SELECT habit_name, habit_periodicity FROM Habit_table WHERE user_id = ?", (user_id,))
+    habits = dict(c.fetchall())
+    registries[user_id] = (data_version, habits)
+    return habits
+
+
+def habit_exists(database, habit_name, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns whether the user has a habit with this name."""
+    return habit_name in habit_periodicities(database, user_id)
+
+
+def invalidate(database, user_id=None):
+    """This function removes the registry of one user, or of all users if no user_id is given, of the connection of
+    the current thread to the database. It is read again the next time it is needed. The connections of other
+    threads notice the change through the data_version."""
+    registries = connection_manager_module.get_connection(database).caches.get(REGISTRY_CACHE_KEY, {})
+    if user_id is None:
+        registries.clear()
+    else:
+        registries.pop(user_id, None)
@@ -8,11 +8,11 @@ grading of this project the sample data could be manipulated in every way possib
 used if needed.
 """
 
-import sqlite3
-import pandas
-
+import connection_manager_module
 import database_and_table_creation_module
 import date_module
+import habit_registry_module
+import progression_import_module
 
 
 def insert_sample_habit_data_and_dates(database, habit_table_name, date_table_name, progression_table_name):
@@ -27,7 +27,7 @@ def insert_sample_habit_data_and_dates(database, habit_table_name, date_table_na
     date_module.Date.update_dates(database, date_table_name)
 
     # Connecting to the database.
-    dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
+    dbconnection = connection_manager_module.get_connection(database)
     c = dbconnection.cursor()
 
     # Insert the habit data into the Habit_table.
@@ -52,30 +52,23 @@ def insert_sample_habit_data_and_dates(database, habit_table_name, date_table_na
         f"VALUES (?, ?, ?, ?)",
         ('wash robes', 'be sure to use detergent for black fabric', 'weekly', '2024-05-01 14:54'))
 
-    # Close database.
+    # Commit the insertions. The habits have changed, so the habit registry of the database is invalidated.
     dbconnection.commit()
-    dbconnection.close()
+    habit_registry_module.invalidate(database)
 
 
 def insert_sample_progression_data(database, habit_table_name, date_table_name, progression_table_name):
     """This function first makes sure the needed db and tables exist. Then, it inserts the sample progression data
-    from the CSV-file into the (test_)Progression_table."""
+    from the CSV-file into the (test_)Progression_table, through the progression_import_module. The importer also
+    removes any stored streaks, because they do not take the inserted data into account yet."""
     # Generate needed tables.
     database_and_table_creation_module.check_and_create_database(database)
     database_and_table_creation_module.create_habit_table(habit_table_name, database)
     database_and_table_creation_module.create_date_table(date_table_name, database)
     database_and_table_creation_module.create_progression_table(progression_table_name, database)
 
-    # Connecting to the database.
-    dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
-
     # Read the CSV file with the progression data and insert it into the Progression_table. Separation sign is the ';'.
-    pandas.read_csv('Sample_data.csv', sep=';').to_sql(progression_table_name, dbconnection,
-                                                         if_exists='append', index=False)
-
-    # Close database.
-    dbconnection.commit()
-    dbconnection.close()
+    progression_import_module.import_progression_csv(database, 'Sample_data.csv', progression_table_name)
 
 
 def insert_sample_data_before_distribution_of_app(database, habit_table_name, date_table_name, progression_table_name):
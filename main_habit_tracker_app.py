@@ -1,59 +1,106 @@
 """This is the main module of this application. It contains the main menu from which the user can access all other
 modules and functions.
 
-The A_Main_menu module starts by importing the relevant SQL and date modules. Next, it imports all the other
-application's modules. Then, the application checks whether the necessary tables exist and, if not, creates them.
-Finally, before the main_menu() is called, the application makes sure that the Date_table is up-to-date with all
-dates 'up to today'. This is necessary for reliably, accurately and completely performing analyses and updating habit
-progress.
+Importing this module does not change anything. Before the main menu is shown, the function bootstrap is called: it
+checks whether the necessary tables exist and, if not, creates them. It also makes sure that the Date_table is
+up-to-date with all dates 'up to today'. This is necessary for reliably, accurately and completely performing analyses
+and updating habit progress. All of this happens in one transaction on one connection, so the first menu appears
+quickly. The time this takes (the 'cold start') is printed when the application starts.
+
+To keep the start fast, only the modules needed for the bootstrap are imported at the top. The other modules (for
+example the sample data module, which reads a CSV file) are imported when their menu option is chosen for the first
+time.
 
 The main menu contains multiple options regarding adding/deleting habits, retrieving lists of habits, calculating
 streaks, resetting the application and sample data, and quiting the application.
+
+Every action of the main menu is started through the profiling_module. When the application is started with
+--profile (or with the environment variable HABIT_TRACKER_PROFILE set to 1), every action writes a CPU profile and a
+memory summary to the 'profiles' directory.
+
+One database can hold the habits of many users. The menu works with the habits of one user: the default user, or the
+user given with --user (a new user name is added).
 """
 
-# Importing modules necessary for the main menu and/or for the other modules called from the main menu.
-import sqlite3
+# The moment the application started. It is used to report the cold start time.
 import time
+START_TIME = time.perf_counter()
+
+# Importing modules necessary for the main menu and the bootstrap.
 import datetime
+import sqlite3
 
-# Importing the other (relevant) modules from this application.
+# Importing the modules of this application that are needed for the bootstrap. The other modules are imported in the
+# functions that use them.
+import connection_manager_module
 import database_and_table_creation_module
-import habit_module
 import date_module
-import progression_module
-import analysis_current_streak_per_habit
-import analysis_longest_streak_ever
-import update_progression_module
-import insert_sample_data_module
-import empty_database_module
-
-# Print start message.
-print("Starting habit tracker application...")
-time.sleep(1)
-
-# The following lines of code were added at the very last of this project. The test_module kept generating
-# warnings when the tests were executed through Windows Powershell. These warnings were due to 'depreciation' of
-# the datetime adapter/converter. Basically, the lines make sure that conversion from ISO-format to datetime and back
-# in relation to SQL databases is executed correctly.
-sqlite3.register_adapter(datetime.datetime, lambda ts: ts.isoformat())
-sqlite3.register_converter('timestamp', lambda s: datetime.datetime.fromisoformat(s.decode('utf-8')))
-
-# Checking if the operational database and its three necessary tables exist and, if not, creating them.
-database_and_table_creation_module.check_and_create_database('Habit_app_database.db')
-database_and_table_creation_module.create_habit_table('Habit_table', 'Habit_app_database.db')
-database_and_table_creation_module.create_date_table('Date_table', 'Habit_app_database.db')
-database_and_table_creation_module.create_progression_table('Progression_table', 'Habit_app_database.db')
-
-# Updating the Date_table with all dates up to 'the current date' so all other functions work with an up-to-date table.
-date_module.Date.update_dates('Habit_app_database.db', 'Date_table')
-
-
-def main_menu():
+import profiling_module
+
+# The databases that have been bootstrapped by this process.
+_bootstrapped_databases = set()
+
+
+def bootstrap(database='Habit_app_database.db'):
+    """This function prepares the database before the main menu is used. It is called once when the application
+    starts, and main_menu calls it as well (after the first time, it returns immediately).
+
+    First, the datetime adapter/converter for SQLite is registered. These lines were added at the very last of this
+    project: the test_module kept generating warnings when the tests were executed through Windows Powershell, due to
+    'depreciation' of the datetime adapter/converter. They make sure that conversion from ISO-format to datetime and
+    back in relation to SQL databases is executed correctly.
+
+    Next, a database with an older layout is upgraded by migrate_database. Then, in one single transaction, all tables
+    and indexes are created (if they do not exist yet) and the Date_table is updated with all dates up to 'the current
+    date'. A new database gets the current layout version directly, so it never has to be upgraded.
+    """
+    if database in _bootstrapped_databases:
+        return
+    sqlite3.register_adapter(datetime.datetime, lambda ts: ts.isoformat())
+    sqlite3.register_converter('timestamp', lambda s: datetime.datetime.fromisoformat(s.decode('utf-8')))
+
+    # Upgrading the database to the current layout (keys and indexes) if it was created by an older version of the
+    # app. A new (empty) database does not need this.
+    new_database = database_and_table_creation_module.table_type(database, 'Habit_table') is None
+    if not new_database:
+        database_and_table_creation_module.migrate_database(database, 'Habit_table', 'Date_table', 'Progression_table')
+    progression_is_view = database_and_table_creation_module.table_type(database, 'Progression_table') == 'view'
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    try:
+        dbconnection.commit()
+        c.execute("BEGIN")
+        for statement in database_and_table_creation_module.schema_statements(
+                'Habit_table', 'Date_table', 'Progression_table', 'Metadata_table',
+                include_progression_table=not progression_is_view):
+            c.execute(statement)
+        if new_database:
+            c.execute(f"PRAGMA user_version = {database_and_table_creation_module.SCHEMA_VERSION}")
+        if not date_module.Date.dates_up_to_date(c, 'Metadata_table'):
+            date_module.Date.catch_up_dates(c, 'Date_table', 'Metadata_table')
+        c.execute("COMMIT")
+    except sqlite3.Error:
+        c.execute("ROLLBACK")
+        raise
+    _bootstrapped_databases.add(database)
+
+
+def forget_database(database='Habit_app_database.db'):
+    """This function makes bootstrap prepare the database again the next time it is called, for example after the
+    tables have been deleted, or when the database is closed by a process that handles many databases."""
+    _bootstrapped_databases.discard(database)
+
+
+def main_menu(user_id=database_and_table_creation_module.DEFAULT_USER_ID):
     """The main menu contains five options: Adding a habit, deleting a habit, entering the analytics module, resetting
     the database and the sample data, and updating the habit progress. The analytics module of the app contains, again,
     four options: retrieving a list of all current habits, retrieving a list of all current habits per periodicity,
     calculating and printing the streaks of all current habits, and, calculating and printing the longest streak ever
-    of all current habits. The menu also provides options to 'go back' to the main menu and quit the application."""
+    of all current habits. The menu also provides options to 'go back' to the main menu and quit the application. All
+    options work with the habits of the given user."""
+    bootstrap()
+
     print("")
     print("This is the main menu of the Habit Tracker app. ")
     print("What do you want to do? ")
@@ -65,11 +112,14 @@ def main_menu():
     print("- Type 'q' to quit the application. ")
     main_menu_input = (input("Insert your choice: "))
     if main_menu_input == "1":
+        import habit_module
         print("")
-        habit_module.Habit.add_habit('Habit_app_database.db')
+        profiling_module.run_action('add_habit', habit_module.Habit.add_habit, 'Habit_app_database.db', user_id)
     elif main_menu_input == "2":
+        import habit_module
         print("")
-        habit_module.Habit.delete_habit('Habit_app_database.db')
+        profiling_module.run_action('delete_habit', habit_module.Habit.delete_habit, 'Habit_app_database.db',
+                                    user_id)
     elif main_menu_input == "3":
         print("")
         print("This is the analytics module. What do you want to do? ")
@@ -77,84 +127,187 @@ def main_menu():
         print("- Type 2 to show a list of all habits for a specific periodicity. ")
         print("- Type 3 to show the current streaks of all your habits. ")
         print("- Type 4 to show the longest streak ever per habit. ")
+        print("- Type 5 to show a week, month or year calendar of your habits. ")
+        print("- Type 6 to show the completion rates and the health score of your habits. ")
         print("- Type 'm' to return to the main menu. ")
         analytics_module_input = (input("Insert your choice: "))
         if analytics_module_input == "1":
-            habit_module.Habit.provide_habit_list('Habit_table', 'Habit_app_database.db')
+            import habit_module
+            profiling_module.run_action('provide_habit_list', habit_module.Habit.provide_habit_list, 'Habit_table',
+                                        'Habit_app_database.db', user_id)
         elif analytics_module_input == "2":
-            habit_module.Habit.provide_habit_list_per_periodicity('Habit_table', 'Habit_app_database.db')
+            import habit_module
+            profiling_module.run_action('provide_habit_list_per_periodicity',
+                                        habit_module.Habit.provide_habit_list_per_periodicity, 'Habit_table',
+                                        'Habit_app_database.db', user_id)
         elif analytics_module_input == "3":
-            # The combine_habits_dates function is called to make sure that the Progression_table is complete and
-            # up to date before it is analyzed.
-            progression_module.Progression.combine_habits_dates('Habit_app_database.db',
-                                                                 'Habit_table',
-                                                                 'Date_table',
-                                                                 'Progression_table')
-            print("")
-            print("These are all your habits including their daily/weekly streaks. ")
-            analysis_current_streak_per_habit.calculate_and_print_streaks('Habit_app_database.db',
-                                                                            'Habit_table',
-                                                                            'Progression_table')
+            profiling_module.run_action('calculate_and_print_streaks', show_current_streaks, user_id)
         elif analytics_module_input == "4":
-            # The combine_habits_dates function is called to make sure that the Progression_table is complete and
-            # up to date before it is analyzed.
-            progression_module.Progression.combine_habits_dates('Habit_app_database.db',
-                                                                 'Habit_table',
-                                                                 'Date_table',
-                                                                 'Progression_table')
-            print("")
-            print("These are all your habits including their longest daily/weekly streak ever. ")
-            analysis_longest_streak_ever.calculate_and_print_longest_streaks_ever(
-                'Habit_app_database.db', 'Habit_table', 'Progression_table')
+            profiling_module.run_action('calculate_and_print_longest_streaks_ever', show_longest_streaks, user_id)
+        elif analytics_module_input == "5":
+            profiling_module.run_action('print_calendar', show_calendar, user_id)
+        elif analytics_module_input == "6":
+            profiling_module.run_action('print_health', show_health, user_id)
         elif analytics_module_input == "m":
-            main_menu()
+            main_menu(user_id)
         else:
             print("")
-            print("Invalid input, please type '1', '2', '3', '4' or 'm'. ")
+            print("Invalid input, please type '1', '2', '3', '4', '5', '6' or 'm'. ")
 
     elif main_menu_input == "reset":
         print("")
         print("This will delete all your data and progress. The app will start over with sample data.")
         reset_input = (input("Are you sure? Type again 'reset' to reset, type 'c' to cancel the reset: "))
         if reset_input == 'reset':
-            empty_database_module.delete_tables_themselves('Habit_app_database.db',
-                                                                'Habit_table',
-                                                                'Date_table',
-                                                                'Progression_table')
-            insert_sample_data_module.insert_sample_data_before_distribution_of_app('Habit_app_database.db',
-                                                                               'Habit_table',
-                                                                               'Date_table',
-                                                                               'Progression_table')
-            print("")
-            print("Deleting database...")
-            time.sleep(2)
-            print("Database deleted.")
             print("")
-            print("Reinitializing database and loading sample data...")
-            time.sleep(2)
+            print("Deleting database and loading sample data...")
+            profiling_module.run_action('reset', reset_database)
             print("Punch it Chewie!")
-            time.sleep(1)
             print("Database ready.")
         elif reset_input == "c":
-            main_menu()
+            main_menu(user_id)
         else:
             print("")
             print("Invalid input, reset aborted.")
     elif main_menu_input == "4":
-        progression_module.Progression.combine_habits_dates('Habit_app_database.db',
-                                                             'Habit_table', 'Date_table',
-                                                             'Progression_table')
-        update_progression_module.update_function('Habit_app_database.db')
+        profiling_module.run_action('update_function', update_progression, user_id)
     elif main_menu_input == "q":
         print("Application shut down.")
         quit()
     else:
         print("")
         print("Invalid input, please type '1', '2', '3', '4' or 'q'. ")
-    main_menu()
+    main_menu(user_id)
+
 
+def show_current_streaks(user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function is called from the analytics menu. The combine_habits_dates function is called first to make sure
+    that the Progression_table is complete and up to date before it is analyzed. Then the current streaks are printed.
+    """
+    import analysis_current_streak_per_habit
+    import progression_module
 
-# Here the main_menu() function gets called when the application has started and performed all initial imports, checks
-# and updates. A 'main guard' was added to prevent errors when importing this module from the related test module.
+    progression_module.Progression.combine_habits_dates('Habit_app_database.db',
+                                                         'Habit_table',
+                                                         'Date_table',
+                                                         'Progression_table')
+    print("")
+    print("These are all your habits including their daily/weekly streaks. ")
+    analysis_current_streak_per_habit.calculate_and_print_streaks('Habit_app_database.db',
+                                                                    'Habit_table',
+                                                                    'Progression_table',
+                                                                    user_id)
+
+
+def show_longest_streaks(user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function is called from the analytics menu. Like show_current_streaks, it first makes sure that the
+    Progression_table is complete and up to date. Then the longest streaks ever are printed."""
+    import analysis_longest_streak_ever
+    import progression_module
+
+    progression_module.Progression.combine_habits_dates('Habit_app_database.db',
+                                                         'Habit_table',
+                                                         'Date_table',
+                                                         'Progression_table')
+    print("")
+    print("These are all your habits including their longest daily/weekly streak ever. ")
+    analysis_longest_streak_ever.calculate_and_print_longest_streaks_ever(
+        'Habit_app_database.db', 'Habit_table', 'Progression_table', user_id)
+
+
+def show_calendar(user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function is called from the analytics menu. It asks for the period (week, month or year), a date in the
+    period and a habit (or all habits), makes sure that the Progression_table is complete and up to date, and prints
+    the grid of the calendar_view_module."""
+    import calendar_view_module
+    import progression_module
+
+    periods = {'w': 'week', 'm': 'month', 'y': 'year'}
+    period = periods.get(input("Which period do you want to see? Type 'w' for a week, 'm' for a month or 'y' for a "
+                               "year: ").strip().lower())
+    if period is None:
+        print("Invalid input, please type 'w', 'm' or 'y'. ")
+        return
+    day = input("Enter a date in the period (YYYY-MM-DD), or press Enter for today: ").strip()
+    habit_name = input("Enter the name of a habit, or press Enter for all habits: ").strip().lower() or None
+    try:
+        day = datetime.date.fromisoformat(day) if day else datetime.date.today()
+        progression_module.Progression.combine_habits_dates('Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                             'Progression_table')
+        calendar_view_module.print_calendar('Habit_app_database.db', period, day, habit_name, user_id)
+    except ValueError as error:
+        print("")
+        print(f"Invalid input: {error}")
+
+
+def show_health(user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function is called from the analytics menu. It makes sure that the Progression_table is complete and up
+    to date, and prints the completion rates of the last 7, 30 and 90 days and the health score of all habits of the
+    user (see habit_health_module)."""
+    import habit_health_module
+    import progression_module
+
+    progression_module.Progression.combine_habits_dates('Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                         'Progression_table')
+    print("")
+    print("These are the completion rates of your habits (the share of the days on which they were completed) and")
+    print("their health score (0 to 100; recent days count the most). ")
+    habit_health_module.print_health('Habit_app_database.db', user_id=user_id)
+
+
+def reset_database():
+    """This function is called from the main menu. It deletes all tables and inserts the sample data again."""
+    import empty_database_module
+    import insert_sample_data_module
+
+    empty_database_module.delete_tables_themselves('Habit_app_database.db',
+                                                        'Habit_table',
+                                                        'Date_table',
+                                                        'Progression_table')
+    forget_database('Habit_app_database.db')
+    insert_sample_data_module.insert_sample_data_before_distribution_of_app('Habit_app_database.db',
+                                                                       'Habit_table',
+                                                                       'Date_table',
+                                                                       'Progression_table')
+
+
+def update_progression(user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function is called from the main menu. It makes sure that the Progression_table is complete and up to
+    date, and then starts the progression menu of the update_progression_module. When the menu is left, also because
+    of an error, the buffered updates are written (see write_buffer_module)."""
+    import progression_module
+    import update_progression_module
+    import write_buffer_module
+
+    progression_module.Progression.combine_habits_dates('Habit_app_database.db',
+                                                         'Habit_table', 'Date_table',
+                                                         'Progression_table')
+    try:
+        update_progression_module.update_function('Habit_app_database.db', user_id)
+    finally:
+        write_buffer_module.flush_write_buffer('Habit_app_database.db')
+
+
+# Here the main_menu() function gets called after the bootstrap. A 'main guard' was added to prevent errors when
+# importing this module from the related test module.
 if __name__ == '__main__':
-    main_menu()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="The habit tracker application.")
+    parser.add_argument('--profile', action='store_true', help="profile every action of the main menu")
+    parser.add_argument('--profile-dir', default=profiling_module.DEFAULT_PROFILE_DIRECTORY,
+                        help="directory for the profile files")
+    parser.add_argument('--user', default=database_and_table_creation_module.DEFAULT_USER_NAME,
+                        help="the name of the user whose habits are used")
+    parser.add_argument('--durability', choices=list(connection_manager_module.DURABILITY_LEVELS), default='normal',
+                        help="how safely changes are written to disk")
+    arguments = parser.parse_args()
+    if arguments.profile:
+        profiling_module.enable_profiling(arguments.profile_dir)
+    connection_manager_module.set_durability(arguments.durability)
+
+    print("Starting habit tracker application...")
+    bootstrap()
+    print(f"Habit tracker application started in {(time.perf_counter() - START_TIME) * 1000:.0f} ms.")
+    import user_module
+    main_menu(user_module.user_id_for_name('Habit_app_database.db', arguments.user, create=True))
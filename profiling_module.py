@@ -0,0 +1,114 @@
+"""This module provides the profiling mode of the application. When it is enabled, every action of the main menu
+(adding a habit, showing the streaks, updating the progression, the reset, and so on) runs under the CPU profiler of
+Python (cProfile) and under tracemalloc, which traces the memory that is allocated. After every action, two files are
+written to the profile directory, named after the action:
+- <action>_<time>.pstats: the CPU profile. It can be read with the pstats module, or with tools like snakeviz.
+- <action>_<time>.txt: a summary with the duration, the peak memory use, the functions that took the most time, and
+  the lines of code that allocated the most memory.
+
+The profiling mode is enabled with: python main_habit_tracker_app.py --profile, or by setting the environment
+variable HABIT_TRACKER_PROFILE to 1. Note that the time the application waits for the input of the user is part of
+the profile as well (in the built-in function input).
+
+The profiling modules of Python (cProfile, pstats and tracemalloc) are only imported when an action is profiled, so
+they do not slow down the start of the application.
+"""
+
+import os
+import time
+
+# The environment variable that enables the profiling mode, and the default settings.
+PROFILE_ENVIRONMENT_VARIABLE = 'HABIT_TRACKER_PROFILE'
+DEFAULT_PROFILE_DIRECTORY = 'profiles'
+DEFAULT_TOP = 15
+
+# The settings of the profiling mode, as set by enable_profiling, and the number of actions that have been profiled.
+_settings = {'enabled': False, 'directory': DEFAULT_PROFILE_DIRECTORY, 'top': DEFAULT_TOP}
+_profiled_actions = 0
+
+
+def enable_profiling(directory=DEFAULT_PROFILE_DIRECTORY, top=DEFAULT_TOP):
+    """This function enables the profiling mode. The files are written to the given directory, and the summaries
+    contain the 'top' functions and lines of code."""
+    _settings.update(enabled=True, directory=directory, top=top)
+
+
+def disable_profiling():
+    """This function disables the profiling mode."""
+    _settings['enabled'] = False
+
+
+def profiling_enabled():
+    """This function returns whether the profiling mode is enabled, through enable_profiling or through the
+    environment variable."""
+    return _settings['enabled'] or os.environ.get(PROFILE_ENVIRONMENT_VARIABLE, '') not in ('', '0')
+
+
+def run_action(action_name, function, *arguments):
+    """This function calls the function of a menu action with the given arguments, and returns its outcome. If the
+    profiling mode is enabled, the function is profiled and the profile files of the action are written, also when
+    the action ends with an exception (for example when the user quits the application).
+    """
+    if not profiling_enabled():
+        return function(*arguments)
+
+    import cProfile
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        return profiler.runcall(function, *arguments)
+    finally:
+        duration = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        write_profile(action_name, profiler, snapshot, duration, peak_memory)
+
+
+def write_profile(action_name, profiler, snapshot, duration, peak_memory):
+    """This function writes the pstats file and the summary of one profiled action, and prints where they are."""
+    global _profiled_actions
+    _profiled_actions += 1
+    os.makedirs(_settings['directory'], exist_ok=True)
+    base_name = os.path.join(_settings['directory'],
+                             f"{action_name}_{time.strftime('%Y%m%d-%H%M%S')}_{_profiled_actions}")
+
+    profiler.dump_stats(base_name + '.pstats')
+    with open(base_name + '.txt', 'w') as summary_file:
+        summary_file.write(profile_summary(action_name, profiler, snapshot, duration, peak_memory,
+                                           _settings['top']))
+    print(f"[profile] {action_name}: {duration * 1000:.1f} ms, peak memory {peak_memory / 1024:.1f} KiB, "
+          f"written to {base_name}.pstats")
+
+
+def profile_summary(action_name, profiler, snapshot, duration, peak_memory, top=DEFAULT_TOP):
+    """This function returns the text of the summary: the duration, the peak memory, the 'top' functions with the
+    most cumulative time, and the 'top' lines of code that allocated the most memory (without the allocations of
+    tracemalloc itself and of importing modules)."""
+    import io
+    import pstats
+    import tracemalloc
+
+    cpu_report = io.StringIO()
+    pstats.Stats(profiler, stream=cpu_report).sort_stats('cumulative').print_stats(top)
+
+    snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),
+                                       tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                                       tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>')))
+    memory_lines = [f"{number:>3}. {statistic}"
+                    for number, statistic in enumerate(snapshot.statistics('lineno')[:top], start=1)]
+
+    return "\n".join([f"Action: {action_name}",
+                      f"Duration: {duration * 1000:.1f} ms",
+                      f"Peak memory: {peak_memory / 1024:.1f} KiB",
+                      "",
+                      f"Top {top} functions (cumulative time):",
+                      cpu_report.getvalue(),
+                      f"Top {top} memory allocations (by line):"] + memory_lines) + "\n"
@@ -0,0 +1,149 @@
+"""This module imports progression data from a CSV-file into the Progression_table. The file has the same layout as
+Sample_data.csv: a header line, and then one line per habit per date, separated by ';':
+date_plus_habit_name;habit_name;habit_periodicity;date;completed
+
+The file is read line by line with the csv module, so it is never loaded into memory as a whole. The rows are
+inserted in chunks (chunk_size rows per transaction) with executemany, which makes it possible to import very large
+exports of habit history with a limited amount of memory. Rows that already exist in the Progression_table (the same
+habit on the same date) are either skipped, or updated with the values from the file. In the sparse storage mode,
+rows can only be updated. All rows of a file belong to one user: the default user, unless a user_id is given.
+
+The importer is used for the sample data by the insert_sample_data_module. It can also be used from the command
+line, after which it reports how many rows per second were imported:
+python progression_import_module.py my_export.csv --on-conflict update
+"""
+
+import argparse
+import csv
+import itertools
+import time
+
+import bitmap_storage_module
+import connection_manager_module
+import database_and_table_creation_module
+import habit_health_module
+import rollup_storage_module
+import streak_table_module
+import user_module
+
+# The columns of the Progression_table, in the order in which they are inserted.
+PROGRESSION_COLUMNS = ['date_plus_habit_name', 'habit_name', 'habit_periodicity', 'date', 'completed']
+
+# The default number of rows per transaction.
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def import_progression_csv(database, csv_path, progression_table_name='Progression_table', on_conflict='skip',
+                           chunk_size=DEFAULT_CHUNK_SIZE, delimiter=';',
+                           user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function imports the progression data from the CSV-file into the Progression_table, chunk_size rows per
+    transaction. With on_conflict 'skip', rows of a habit on a date that is already in the table are skipped; with
+    'update', the existing rows get the periodicity and completion from the file. In the sparse storage mode (see
+    insert_statement) only 'update' is possible. Afterwards, the stored streaks, bitmaps, rollups and health values of
+    the user are removed, because they do not take the imported data into account yet.
+
+    It returns a dictionary with the number of rows read from the file, the number of rows that were inserted or
+    updated, the duration in seconds and the number of rows per second. A file with missing columns or an invalid
+    row raises a ValueError; the chunks before that row have been imported, so the stored values are removed then as
+    well.
+    """
+    if on_conflict not in ('skip', 'update'):
+        raise ValueError("on_conflict must be 'skip' or 'update'.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    database_and_table_creation_module.create_progression_table(progression_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    statement = insert_statement(progression_table_name, on_conflict,
+                                 database_and_table_creation_module.table_type(database,
+                                                                               progression_table_name) == 'view')
+
+    start = time.perf_counter()
+    rows_read = 0
+    rows_changed = 0
+    try:
+        with open(csv_path, newline='', encoding='utf-8') as csv_file:
+            rows = (row + (user_id,) for row in read_progression_rows(csv_file, delimiter))
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                changes_before = dbconnection.total_changes
+                c.executemany(statement, chunk)
+                dbconnection.commit()
+                rows_read += len(chunk)
+                rows_changed += dbconnection.total_changes - changes_before
+    finally:
+        streak_table_module.invalidate_streaks(database, user_id=user_id)
+        bitmap_storage_module.invalidate_bitmaps(database, user_id=user_id)
+        rollup_storage_module.invalidate_rollups(database, user_id=user_id)
+        habit_health_module.invalidate_health(database, user_id=user_id)
+
+    seconds = time.perf_counter() - start
+    return {'rows_read': rows_read, 'rows_changed': rows_changed, 'seconds': seconds,
+            'rows_per_second': rows_read / seconds if seconds > 0 else 0.0}
+
+
+def insert_statement(progression_table_name, on_conflict, progression_is_view=False):
+    """This function returns the INSERT statement for the chosen conflict handling. Its parameters are the values of
+    PROGRESSION_COLUMNS, followed by the user_id. In the sparse storage mode (see sparse_storage_module) the
+    Progression_table is a view: the trigger of the view always stores the value from the file, so then a normal
+    INSERT is used, and 'skip' raises a ValueError, because the trigger cannot skip existing rows."""
+    columns = ", ".join(PROGRESSION_COLUMNS + ['user_id'])
+    placeholders = ", ".join("?" for _ in PROGRESSION_COLUMNS + ['user_id'])
+    if progression_is_view:
+        if on_conflict == 'skip':
+            raise ValueError("In the sparse storage mode, existing rows cannot be skipped: use on_conflict 'update'.")
+        return f"INSERT INTO {progression_table_name} ({columns}) VALUES ({placeholders})"
+    if on_conflict == 'skip':
+        return f"INSERT OR IGNORE INTO {progression_table_name} ({columns}) VALUES ({placeholders})"
+    return (f"INSERT INTO {progression_table_name} ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT DO UPDATE SET habit_periodicity = excluded.habit_periodicity, "
+            f"completed = excluded.completed")
+
+
+def read_progression_rows(csv_file, delimiter=';'):
+    """This generator reads the CSV-file line by line and yields every row as a tuple in the order of
+    PROGRESSION_COLUMNS. The columns are found by the names in the header, so their order in the file does not
+    matter. The 'completed' column must be 0 or 1."""
+    reader = csv.reader(csv_file, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    missing_columns = [column for column in PROGRESSION_COLUMNS if column not in header]
+    if missing_columns:
+        raise ValueError(f"The CSV-file misses the column(s): {', '.join(missing_columns)}")
+    column_indexes = [header.index(column) for column in PROGRESSION_COLUMNS]
+
+    for line_number, row in enumerate(reader, start=2):
+        if not row:
+            continue
+        try:
+            values = [row[index] for index in column_indexes]
+            values[4] = int(values[4])
+        except (IndexError, ValueError):
+            raise ValueError(f"Invalid row on line {line_number} of the CSV-file: {row}")
+        if values[4] not in (0, 1):
+            raise ValueError(f"Invalid value for 'completed' on line {line_number} of the CSV-file: {values[4]}")
+        yield tuple(values)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import progression data from a CSV-file.")
+    parser.add_argument('csv_path', help="the CSV-file, in the layout of Sample_data.csv")
+    parser.add_argument('--database', default='Habit_app_database.db', help="the database file")
+    parser.add_argument('--on-conflict', choices=['skip', 'update'], default='skip',
+                        help="what to do with rows that already exist")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="number of rows per transaction")
+    parser.add_argument('--user', default=database_and_table_creation_module.DEFAULT_USER_NAME,
+                        help="the user to whom the progression belongs")
+    arguments = parser.parse_args()
+    if arguments.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    result = import_progression_csv(arguments.database, arguments.csv_path, on_conflict=arguments.on_conflict,
+                                    chunk_size=arguments.chunk_size,
+                                    user_id=user_module.user_id_for_name(arguments.database, arguments.user))
+    print(f"Imported {result['rows_read']} rows ({result['rows_changed']} inserted or updated) in "
+          f"{result['seconds']:.2f} seconds: {result['rows_per_second']:.0f} rows per second.")
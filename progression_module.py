@@ -2,16 +2,26 @@
  are to set the attributes for the Progression class, and to define the combine_habits_dates function. This function
  generates the data for the Progression_table based on data from both the Habit_table and Date_table."""
 
-import sqlite3
+from datetime import date
 
+import connection_manager_module
+import database_and_table_creation_module
 import date_module
+import habit_health_module
+import streak_table_module
+
+# The keys under which the watermark of the Progression_table is stored in the Metadata_table.
+WATERMARK_DATE_KEY = 'progression_last_date'
+WATERMARK_HABIT_KEY = 'progression_last_habit_rowid'
 
 
 class Progression:
     """In this class, first the attributes for the Progression class are defined. These exist of
     date_plus_habit_name, habit_name, habit_periodicity, date and completed. Next, the function combine_habits_dates
     is defined. It combines data from the Habit_table and Date_table, creates data for the attribute
-    date_plus_habit_name which is stored in then Progression_table.
+    date_plus_habit_name which is stored in then Progression_table. progression_up_to_date checks whether
+    combine_habits_dates has anything to do. Finally, lower_habit_watermark is defined, which keeps the bookkeeping of
+    combine_habits_dates correct when a habit is deleted.
     """
 
     def __init__(self, date_plus_habit_name, habit_name, habit_periodicity, date, completed):
@@ -30,54 +40,107 @@ class Progression:
         self.date = date
         self.completed = completed
 
-    def combine_habits_dates(database, habit_table_name, date_table_name, progression_table_name):
-        """This first connects to the database. Then, using a for loop, the function combines the habit_name from the
-        Habit_table and the date from the Date_table into one new datapoint for the column date_plus_habit_name.
-        The combine_habits_dates function is called by the main menu before functions regarding analytics and the
-        update of progress are performed. This to make sure that those functions perform operations on a complete and
-        up-to-date table.
-
-        The function also generates a default value of '0' (integer) for the last column of the Progression_table:
-        'completed'. This column represents whether on a certain date a certain habit has been completed (1) or not (0).
-        The default value of 0 means not-completed. This column/value represents the actual progress of the user, which
-        can be updated by the user, analyzed through analytics functions, and/or printed to the user.
+    def combine_habits_dates(database, habit_table_name, date_table_name, progression_table_name,
+                             metadata_table_name='Metadata_table'):
+        """This function makes sure that the Progression_table contains one row for every combination of a habit from
+        the Habit_table and a date from the Date_table. The combine_habits_dates function is called by the main menu
+        before functions regarding analytics and the update of progress are performed. This to make sure that those
+        functions perform operations on a complete and up-to-date table.
+
+        Every new row gets a default value of '0' (integer) for the last column of the Progression_table: 'completed'.
+        This column represents whether on a certain date a certain habit has been completed (1) or not (0). The default
+        value of 0 means not-completed. This column/value represents the actual progress of the user, which can be
+        updated by the user, analyzed through analytics functions, and/or printed to the user.
+
+        Earlier versions of this function checked and inserted every combination of a date and a habit one at a time.
+        With many habits and a long history this took minutes, even when nothing had changed. Now the function keeps
+        a 'watermark' in the Metadata_table: the last date and the last habit (rowid) that have already been
+        generated. Only combinations with a newer date or a newer habit are generated, and this is done in one single
+        INSERT ... SELECT statement. When nothing has changed, no combinations are generated at all.
+
+        The watermark is shared by all users of the database: every habit gets the rows of its own user. So a new date
+        is generated for the habits of all users at once, by the first call on that date.
         """
+        # Update Date_table if necessary, and make sure there is a Metadata_table to store the watermark in.
+        date_module.Date.update_dates(database, date_table_name)
+        database_and_table_creation_module.create_metadata_table(metadata_table_name, database)
+
         # Setting up database connection.
-        dbconnection = sqlite3.connect(database, detect_types=sqlite3.PARSE_DECLTYPES)
+        dbconnection = connection_manager_module.get_connection(database)
         c = dbconnection.cursor()
 
-        # Update Date_table if necessary.
-        date_module.Date.update_dates(database, date_table_name)
+        # Read the watermark. If there is none yet (new database, or data inserted by the sample data module), the
+        # empty string and 0 make sure that all dates and all habits are taken into account.
+        c.execute(f"SELECT key, value FROM {metadata_table_name} WHERE key IN (?, ?)",
+                  (WATERMARK_DATE_KEY, WATERMARK_HABIT_KEY))
+        watermark = dict(c.fetchall())
+        last_date = watermark.get(WATERMARK_DATE_KEY, '')
+        last_habit_rowid = int(watermark.get(WATERMARK_HABIT_KEY, 0))
+
+        # Determine the new watermark before inserting, so that dates or habits which are added in the meantime are
+        # picked up by the next call.
+        c.execute(f"SELECT MAX(Date) FROM {date_table_name}")
+        new_last_date = c.fetchone()[0] or ''
+        c.execute(f"SELECT MAX(rowid) FROM {habit_table_name}")
+        new_last_habit_rowid = c.fetchone()[0] or 0
+
+        # In the sparse storage mode (see sparse_storage_module) the Progression_table is a view that already contains
+        # every combination, so nothing has to be generated.
+        sparse_storage = database_and_table_creation_module.table_type(database, progression_table_name) == 'view'
+
+        # Only when there is a new date or a new habit, the missing combinations are generated. The date and the
+        # habit_name are combined into date_plus_habit_name: the unique identifier of the Progression_table. The LEFT
+        # JOIN makes sure that combinations which already exist (for example from the sample data) are skipped, so
+        # there is never more than 1 occurrence of every habit on every date. The ORDER BY keeps the rows in the same
+        # order as before: per date, all habits in the order in which they were added.
+        if not sparse_storage and (new_last_date > last_date or new_last_habit_rowid > last_habit_rowid):
+            c.execute(f"""INSERT INTO {progression_table_name} (date_plus_habit_name, habit_name, habit_periodicity,
+                      date, completed, user_id)
+                      SELECT d.Date || ' - ' || h.habit_name, h.habit_name, h.habit_periodicity, d.Date, 0, h.user_id
+                      FROM {date_table_name} AS d
+                      CROSS JOIN {habit_table_name} AS h
+                      LEFT JOIN {progression_table_name} AS p
+                        ON p.user_id = h.user_id AND p.date_plus_habit_name = d.Date || ' - ' || h.habit_name
+                      WHERE (d.Date > ? OR h.rowid > ?) AND p.date_plus_habit_name IS NULL
+                      ORDER BY d.Date, h.rowid""",
+                      (last_date, last_habit_rowid))
+
+        # Store the new watermark and commit the insertions to the database. When nothing has changed, nothing is
+        # written, so a call that has nothing to do does not need the write lock.
+        if (new_last_date, new_last_habit_rowid) != (last_date, last_habit_rowid):
+            c.executemany(f"INSERT OR REPLACE INTO {metadata_table_name} (key, value) VALUES (?, ?)",
+                          [(WATERMARK_DATE_KEY, new_last_date), (WATERMARK_HABIT_KEY, str(new_last_habit_rowid))])
+            dbconnection.commit()
+
+        # New dates have been added as 'not completed', so the stored current streaks and health values are rolled
+        # over.
+        if new_last_date > last_date:
+            streak_table_module.roll_over_streaks(database, new_last_date)
+            habit_health_module.roll_over_health(database, date.fromisoformat(new_last_date))
+
+    def progression_up_to_date(c, habit_table_name, metadata_table_name='Metadata_table'):
+        """This function returns True if combine_habits_dates has nothing to do: the watermark contains 'the current
+        date' and the most recent habit. It uses the given cursor and only reads, so it can be used to decide whether a
+        transaction that writes is needed."""
+        c.execute(f"SELECT key, value FROM {metadata_table_name} WHERE key IN (?, ?)",
+                  (WATERMARK_DATE_KEY, WATERMARK_HABIT_KEY))
+        watermark = dict(c.fetchall())
+        c.execute(f"SELECT MAX(rowid) FROM {habit_table_name}")
+        last_habit_rowid = c.fetchone()[0] or 0
+        return (watermark.get(WATERMARK_DATE_KEY, '') >= date.today().isoformat()
+                and int(watermark.get(WATERMARK_HABIT_KEY, 0)) == last_habit_rowid)
+
+    def lower_habit_watermark(database, deleted_habit_rowid, metadata_table_name='Metadata_table'):
+        """This function is called when a habit is deleted. SQLite gives a new row the highest rowid + 1, so when the
+        most recently added habit is deleted, the next new habit gets the same rowid again. To make sure that this new
+        habit is still picked up by combine_habits_dates, the habit watermark is lowered to just below the deleted
+        rowid.
+        """
+        dbconnection = connection_manager_module.get_connection(database)
+        c = dbconnection.cursor()
 
-        # Next, the habit names and periodicity's and fetched from the Habit_table, and the dates from the Date_table.
-        # This data is respectively stored in the variables 'habits' and 'dates'.
-        c.execute(f"SELECT habit_name, habit_periodicity FROM {habit_table_name}")
-        habits = c.fetchall()
-        c.execute(f"SELECT date FROM {date_table_name}")
-        dates = c.fetchall()
-
-        # Here the default value of the completion column is set to 0 (which means the habit is not completed)
-        default_completed_value = 0
-
-        # Through a for loop, for each date in the Date_table, unique combinations are made from the first columns of
-        # both the Date_table and the Habit_table. These are the columns date and habit_name. These are then combined
-        # and stored into the variable date_plus_habit_name: the unique identifier of the Progression_table.
-        for date in dates:
-            for habit in habits:
-                date_plus_habit_name = f"{date[0]} - {habit[0]}"
-
-                # Next, in the table Progression_table, it is checked whether the unique date_plus_habit_name already
-                # exists. If it does not exist (count==0), the date_plus_habit_name is inserted into the table
-                # including the other relevant data. This procedure makes sure that every row in the Progression_table
-                # has a unique identifier (date_plus_habit_name). Namely, there should be not more than 1 occurrence
-                # of every habit on every date.
-                c.execute(f"SELECT COUNT(*) FROM {progression_table_name} WHERE date_plus_habit_name = ?",
-                          (date_plus_habit_name,))
-                if c.fetchone()[0] == 0:
-                    c.execute(f"INSERT INTO {progression_table_name} (date_plus_habit_name, habit_name, "
-                              f"habit_periodicity, date, completed) VALUES (?,?,?,?,?)",
-                              (date_plus_habit_name, habit[0], habit[1], date[0], default_completed_value))
-
-        # Committing insertions to the database and closing the database.
-        dbconnection.commit()
-        dbconnection.close()
+        c.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name=?", (metadata_table_name,))
+        if c.fetchone() is not None:
+            c.execute(f"UPDATE {metadata_table_name} SET value = MIN(CAST(value AS INTEGER), ?) WHERE key = ?",
+                      (deleted_habit_rowid - 1, WATERMARK_HABIT_KEY))
+            dbconnection.commit()
@@ -0,0 +1,188 @@
+"""This module maintains the Rollup_table: for every habit, the number of completed days per week, per month and per
+year, and whether the habit was completed at all in the period (any_completed). Before, every weekly calculation
+grouped the daily rows of the Progression_table into weeks again, and a monthly or yearly summary would need yet another
+pass over all daily rows. With the rollups, a year of a weekly habit is 52 rows instead of 365, and a year summary is
+one row.
+
+Like the bitmaps (see bitmap_storage_module), the rollups are built from the Progression_table the first time they are
+needed, with one statement in which SQLite groups the rows per week, month and year. After that they are kept
+up-to-date incrementally: when the user changes the status of a habit on a date, update_habit_rollups adds or subtracts
+one completed day in the week, the month and the year of that date. That is three rows, however long the history is.
+New dates (the 'daily rollover') are not completed, so they do not change any count; a week, month or year without a
+row has no completed days. When progression data is changed in another way (importing, marking many check-offs at
+once, deleting a habit), the rollups of the habit are removed by invalidate_rollups and built again when needed.
+"""
+
+import argparse
+from datetime import date, timedelta
+
+import connection_manager_module
+import database_and_table_creation_module
+import streak_table_module
+import user_module
+
+# The periods of the rollups, with the SQLite modifiers that give the first date of the period of a date.
+PERIOD_MODIFIERS = {
+    'week': "'weekday 0', '-6 days'",
+    'month': "'start of month'",
+    'year': "'start of year'",
+}
+
+
+def period_start(period, day):
+    """This function returns the first date of the week (Monday), month or year of the day (a date object)."""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    if period == 'year':
+        return day.replace(month=1, day=1)
+    raise ValueError("The period must be 'week', 'month' or 'year'.")
+
+
+def build_rollups(database, progression_table_name='Progression_table', habit_name=None,
+                  rollup_table_name='Rollup_table', user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function builds the rollups of one habit, or of all habits of the user if no habit name is given, from the
+    Progression_table, and stores them in the Rollup_table. The existing rollups of the habit(s) are replaced.
+    """
+    database_and_table_creation_module.create_rollup_table(rollup_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    conditions, parameters = streak_table_module.user_and_habit_conditions(user_id, habit_name)
+    c.execute(f"DELETE FROM {rollup_table_name} {conditions}", parameters)
+    c.execute(f"INSERT INTO {rollup_table_name} (habit_name, period, period_start, completed_days, user_id) " +
+              " UNION ALL ".join(
+                  f"SELECT habit_name, '{period}', date(date, {modifiers}) AS period_start, SUM(completed), user_id "
+                  f"FROM {progression_table_name} {conditions} GROUP BY habit_name, period_start"
+                  for period, modifiers in PERIOD_MODIFIERS.items()),
+              parameters * len(PERIOD_MODIFIERS))
+    dbconnection.commit()
+
+
+def read_rollups(database, period, first_day=None, last_day=None, habit_name=None,
+                 habit_table_name='Habit_table', progression_table_name='Progression_table',
+                 rollup_table_name='Rollup_table', user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the number of completed days per period ('week', 'month' or 'year') of one habit, or of
+    all habits of the user, as a dictionary: {habit_name: {period_start (YYYY-MM-DD): completed_days}}. Only the periods
+    that start from first_day up to and including last_day (date objects) are returned, if they are given. Habits that
+    have no rollups yet, are built first.
+    """
+    if period not in PERIOD_MODIFIERS:
+        raise ValueError("The period must be 'week', 'month' or 'year'.")
+    database_and_table_creation_module.create_rollup_table(rollup_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    habit_filter = "AND h.habit_name = ?" if habit_name is not None else ""
+    habit_parameters = [habit_name] if habit_name is not None else []
+    c.execute(f"""SELECT h.habit_name FROM {habit_table_name} AS h
+              WHERE h.user_id = ? {habit_filter} AND NOT EXISTS (
+                  SELECT 1 FROM {rollup_table_name} AS r
+                  WHERE r.user_id = h.user_id AND r.habit_name = h.habit_name)""",
+              [user_id] + habit_parameters)
+    missing_habits = [row[0] for row in c.fetchall()]
+    if len(missing_habits) > 1:
+        build_rollups(database, progression_table_name, rollup_table_name=rollup_table_name, user_id=user_id)
+    elif missing_habits:
+        build_rollups(database, progression_table_name, missing_habits[0], rollup_table_name, user_id)
+
+    c.execute(f"""SELECT habit_name, period_start, completed_days FROM {rollup_table_name}
+              WHERE user_id = ? AND habit_name = COALESCE(?, habit_name) AND period = ?
+                AND period_start BETWEEN ? AND ?
+              ORDER BY habit_name, period_start""",
+              (user_id, habit_name, period, first_day.isoformat() if first_day else '',
+               last_day.isoformat() if last_day else '9999-12-31'))
+    rollups = {}
+    for row_habit_name, row_period_start, completed_days in c.fetchall():
+        rollups.setdefault(row_habit_name, {})[row_period_start] = completed_days
+    return rollups
+
+
+def update_habit_rollups(database, habit_name, day, old_completed, new_completed, rollup_table_name='Rollup_table',
+                         user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function changes the rollups of a habit after its status on a date (YYYY-MM-DD) changed from old_completed
+    to new_completed: the week, month and year of the date get one completed day more or less. If there is no
+    Rollup_table or the habit has no rollups yet, nothing happens: they are built the next time they are needed.
+    """
+    change = (new_completed or 0) - (old_completed or 0)
+    if change == 0 or database_and_table_creation_module.table_type(database, rollup_table_name) is None:
+        return
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    the_day = date.fromisoformat(day)
+    c.executemany(f"""INSERT INTO {rollup_table_name} (habit_name, period, period_start, completed_days, user_id)
+                  SELECT :habit_name, :period, :period_start, MAX(:change, 0), :user_id
+                  WHERE EXISTS (SELECT 1 FROM {rollup_table_name} WHERE user_id = :user_id AND habit_name = :habit_name)
+                  ON CONFLICT (user_id, habit_name, period, period_start)
+                  DO UPDATE SET completed_days = MAX(completed_days + :change, 0)""",
+                  [{'habit_name': habit_name, 'period': period,
+                    'period_start': period_start(period, the_day).isoformat(), 'change': change, 'user_id': user_id}
+                   for period in PERIOD_MODIFIERS])
+    dbconnection.commit()
+
+
+def invalidate_rollups(database, rollup_table_name='Rollup_table', habit_name=None, user_id=None):
+    """This function removes the rollups of one habit, or of all habits if no habit name is given, of the given user,
+    or of all users if no user_id is given. It is used when progression data has been changed without going through
+    the update module. The removed rollups are built again by read_rollups the next time they are needed.
+    """
+    if database_and_table_creation_module.table_type(database, rollup_table_name) is None:
+        return
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    conditions, parameters = streak_table_module.user_and_habit_conditions(user_id, habit_name)
+    c.execute(f"DELETE FROM {rollup_table_name} {conditions}", parameters)
+    dbconnection.commit()
+
+
+def weekly_streaks(database, habit_name, today=None, habit_table_name='Habit_table',
+                   progression_table_name='Progression_table',
+                   user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the current and the longest weekly streak of a habit, from the week rollups: (current
+    streak, longest streak). A week counts if the habit was completed at least once in it; a week without a rollup
+    row has no completions. The current streak is the number of completed weeks up to and including the week of
+    'today' (so it is 0 if the habit was not completed yet this week), like count_weekly_streak of the analysis module.
+    It is used by streak_table_module.refresh_habit_streak for the stored streaks of weekly habits.
+    """
+    today = today or date.today()
+    weeks = read_rollups(database, 'week', last_day=today, habit_name=habit_name, habit_table_name=habit_table_name,
+                         progression_table_name=progression_table_name, user_id=user_id).get(habit_name, {})
+    if not weeks:
+        return 0, 0
+
+    current_streak = longest_streak = 0
+    week_start = date.fromisoformat(min(weeks))
+    last_week_start = period_start('week', today)
+    while week_start <= last_week_start:
+        current_streak = current_streak + 1 if weeks.get(week_start.isoformat(), 0) > 0 else 0
+        longest_streak = max(longest_streak, current_streak)
+        week_start += timedelta(days=7)
+    return current_streak, longest_streak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show the number of completed days per week, month or year.")
+    parser.add_argument('period', choices=list(PERIOD_MODIFIERS), help="the period of the summary")
+    parser.add_argument('--habit', help="only show this habit")
+    parser.add_argument('--from', dest='first_date', help="the first period to show (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='last_date', help="the last period to show (YYYY-MM-DD)")
+    parser.add_argument('--database', default='Habit_app_database.db', help="the database file")
+    parser.add_argument('--user', default=database_and_table_creation_module.DEFAULT_USER_NAME,
+                        help="the user whose habits are shown")
+    arguments = parser.parse_args()
+    import main_habit_tracker_app
+    main_habit_tracker_app.bootstrap(arguments.database)
+
+    summary = read_rollups(arguments.database, arguments.period,
+                           date.fromisoformat(arguments.first_date) if arguments.first_date else None,
+                           date.fromisoformat(arguments.last_date) if arguments.last_date else None, arguments.habit,
+                           user_id=user_module.user_id_for_name(arguments.database, arguments.user))
+    for summary_habit_name, periods in summary.items():
+        print(f"{summary_habit_name}:")
+        for summary_period_start, completed_days in periods.items():
+            print(f"  {summary_period_start}  {completed_days:>3} completed days")
@@ -0,0 +1,146 @@
+"""This module spreads the habits and progression over several database files ('shards') and routes every action to
+the right file. One SQLite database has one writer at a time: while one user's check-offs are written, the check-offs
+of every other user wait. With N shards there are N independent writers, so writes of users on different shards are
+done at the same time.
+
+The shard key is the user name. The checksum of the name (zlib.crc32, which gives the same number on every computer
+and in every Python process, unlike the built-in hash) modulo the number of shards gives the shard of the user. All
+habits, progression, streaks and bitmaps of one user are in the same shard, so every function of the other modules
+keeps working unchanged: it is simply given the database file of the shard and the user_id of the user in that shard.
+Every shard is a complete database of its own (with its own User_table), so a user_id only has a meaning within its
+shard; across shards, users are identified by their name.
+
+The ShardRouter offers:
+- database_for_user and user_id: the shard and the user_id of a user (routing).
+- run_for_user: run a function of another module for one user, in one transaction on the shard of the user.
+- run_in_parallel: run many such functions, one thread per shard, so writes to different shards proceed in parallel.
+- scatter and gather_users: run a function on all shards at once and combine the outcomes (scatter-gather), for
+  analytics over all users, such as longest_streaks_per_user.
+
+The command line uses the router when it is started with --shards, for example:
+python command_line_module.py --shards 4 --user anakin mark podracing
+"""
+
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import analysis_longest_streak_ever
+import connection_manager_module
+import main_habit_tracker_app
+import user_module
+
+# The number of shards that is used when no number is given.
+DEFAULT_SHARD_COUNT = 4
+
+
+def shard_databases(database='Habit_app_database.db', shard_count=DEFAULT_SHARD_COUNT):
+    """This function returns the file names of the shards of a database: 'Habit_app_database_shard0.db',
+    'Habit_app_database_shard1.db', and so on. With one shard, the database itself is the only shard."""
+    if shard_count < 1:
+        raise ValueError("The number of shards must be at least 1.")
+    if shard_count == 1:
+        return [database]
+    stem, extension = os.path.splitext(database)
+    return [f"{stem}_shard{index}{extension}" for index in range(shard_count)]
+
+
+class ShardRouter:
+    """This class routes the actions of a user to the shard (database file) of that user, and runs actions on all
+    shards at once."""
+
+    def __init__(self, databases):
+        if not databases:
+            raise ValueError("A shard router needs at least one database.")
+        self.databases = list(databases)
+
+    @classmethod
+    def for_database(cls, database='Habit_app_database.db', shard_count=DEFAULT_SHARD_COUNT):
+        """This function returns a router over the shards of the given database (see shard_databases)."""
+        return cls(shard_databases(database, shard_count))
+
+    def shard_index(self, user_name):
+        """This function returns the number of the shard of a user. The name is normalised in the same way as in the
+        user_module, so 'Anakin ' and 'anakin' are in the same shard."""
+        return zlib.crc32(user_name.strip().lower().encode('utf-8')) % len(self.databases)
+
+    def database_for_user(self, user_name):
+        """This function returns the database file of the shard of a user."""
+        return self.databases[self.shard_index(user_name)]
+
+    def bootstrap(self):
+        """This function prepares every shard in the same way as a single database (see bootstrap in the main
+        module). The shards are prepared in parallel."""
+        self.scatter(main_habit_tracker_app.bootstrap)
+
+    def user_id(self, user_name, create=False):
+        """This function returns the database file of the shard of a user and the user_id of the user in that shard.
+        If the user does not exist, it is added when create is True, and otherwise a ValueError is raised."""
+        database = self.database_for_user(user_name)
+        return database, user_module.user_id_for_name(database, user_name, create)
+
+    def run_for_user(self, user_name, function, *arguments, create=False):
+        """This function calls function(database, *arguments, user_id=...) for the user, with the database of the
+        shard of the user, in one transaction on that shard. It returns the outcome of the function. Functions of the
+        other modules that take a database and a user_id can be used, for example habit_module.Habit.habit_exists or
+        command_line_module.mark_habits."""
+        database = self.database_for_user(user_name)
+        with connection_manager_module.transaction(database):
+            user_id = user_module.user_id_for_name(database, user_name, create)
+            return function(database, *arguments, user_id=user_id)
+
+    def run_in_parallel(self, actions, create=False):
+        """This function runs many actions, given as (user_name, function, arguments) tuples, and returns their
+        outcomes in the same order. The actions are grouped per shard. Every shard gets its own thread (with its own
+        connection) and runs its actions, in their original order, in one transaction. Because the shards are
+        separate files, the writes of different shards do not wait for each other. If an action fails, the changes
+        of its shard are rolled back and the exception is raised; the other shards are not affected."""
+        actions = list(actions)
+        actions_per_shard = {}
+        for position, (user_name, function, arguments) in enumerate(actions):
+            actions_per_shard.setdefault(self.shard_index(user_name), []).append(
+                (position, user_name, function, arguments))
+
+        def run_shard(shard_index):
+            database = self.databases[shard_index]
+            outcomes = []
+            with connection_manager_module.transaction(database):
+                for position, user_name, function, arguments in actions_per_shard[shard_index]:
+                    user_id = user_module.user_id_for_name(database, user_name, create)
+                    outcomes.append((position, function(database, *arguments, user_id=user_id)))
+            return outcomes
+
+        results = [None] * len(actions)
+        with ThreadPoolExecutor(max_workers=len(actions_per_shard) or 1, thread_name_prefix='habit-shard') \
+                as executor:
+            for outcomes in list(executor.map(run_shard, actions_per_shard)):
+                for position, outcome in outcomes:
+                    results[position] = outcome
+        return results
+
+    def scatter(self, function, *arguments):
+        """This function calls function(database, *arguments) for every shard at the same time, one thread per shard,
+        and returns the outcomes as a list, in the order of the shards."""
+        with ThreadPoolExecutor(max_workers=len(self.databases), thread_name_prefix='habit-shard') as executor:
+            return list(executor.map(lambda database: function(database, *arguments), self.databases))
+
+    def gather_users(self, function, *arguments):
+        """This function calls function(database, *arguments, user_id=...) for every user of every shard, with the
+        shards handled at the same time (scatter), and combines the outcomes in one dictionary with the user name as
+        key (gather). Users that are found in a shard that is not their own (such as the default user, which every
+        shard contains) are skipped, so every user appears once."""
+        def gather_shard(database):
+            return {user_name: function(database, *arguments, user_id=user_id)
+                    for user_id, user_name, user_creation_date in user_module.list_users(database)
+                    if self.database_for_user(user_name) == database}
+
+        gathered = {}
+        for outcomes in self.scatter(gather_shard):
+            gathered.update(outcomes)
+        return gathered
+
+    def longest_streaks_per_user(self, habit_table_name='Habit_table', progression_table_name='Progression_table'):
+        """This function returns the longest streak ever of every habit of every user, over all shards, as a
+        dictionary: {user_name: {habit: (streak, periodicity)}}."""
+        return self.gather_users(analysis_longest_streak_ever.calculate_longest_streaks, habit_table_name,
+                                 progression_table_name)
@@ -0,0 +1,151 @@
+"""This module provides an alternative way of storing the progression data: the 'sparse' storage mode. In the
+normal ('dense') mode, combine_habits_dates writes one row for every habit on every date into the Progression_table,
+and almost all of these rows are 'not completed'. Every row also repeats the habit name, the periodicity and the
+date_plus_habit_name.
+
+In the sparse mode only the completions are stored, in the Completion_table (one row per habit of a user per completed
+date).
+The Progression_table is replaced by a view with the same name and the same columns. The view combines the
+Habit_table, the Date_table and the Completion_table, so the days that are not completed are derived when the data is
+read. Because the view has the same name and columns, all existing queries (the day view, the streak calculations,
+deleting habits) keep working. Triggers on the view translate changes (UPDATE, INSERT and DELETE) into changes of
+the Completion_table. combine_habits_dates does not have to generate any rows anymore in this mode.
+
+The mode can be switched with enable_sparse_storage and disable_sparse_storage, or from the command line:
+python sparse_storage_module.py enable Habit_app_database.db
+"""
+
+import argparse
+
+import connection_manager_module
+import database_and_table_creation_module
+
+# The key under which the storage mode is stored in the Metadata_table.
+STORAGE_MODE_KEY = 'progression_storage'
+
+
+def storage_mode(database, progression_table_name):
+    """This function returns 'sparse' if the Progression_table is the view of the sparse storage mode, and 'dense'
+    otherwise."""
+    return 'sparse' if database_and_table_creation_module.table_type(database, progression_table_name) == 'view' \
+        else 'dense'
+
+
+def enable_sparse_storage(database, habit_table_name, date_table_name, progression_table_name,
+                          completion_table_name='Completion_table', metadata_table_name='Metadata_table'):
+    """This function switches the database to the sparse storage mode. In one transaction, the completed rows of the
+    Progression_table are copied into the Completion_table, the Progression_table is dropped, and the view and its
+    triggers are created. If the database already uses the sparse mode, nothing happens.
+    """
+    if storage_mode(database, progression_table_name) == 'sparse':
+        return
+    database_and_table_creation_module.create_metadata_table(metadata_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    dbconnection.commit()
+
+    try:
+        c.execute("BEGIN")
+        create_sparse_storage(c, habit_table_name, date_table_name, progression_table_name, completion_table_name)
+        c.execute(f"INSERT OR REPLACE INTO {metadata_table_name} (key, value) VALUES (?, 'sparse')",
+                  (STORAGE_MODE_KEY,))
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+
+
+def create_sparse_storage(c, habit_table_name, date_table_name, progression_table_name, completion_table_name):
+    """This function contains the statements of enable_sparse_storage. It is given the cursor of the transaction."""
+    c.execute(f"""CREATE TABLE IF NOT EXISTS {completion_table_name} (
+                habit_name TEXT,
+                date TEXT,
+                user_id INTEGER NOT NULL DEFAULT {database_and_table_creation_module.DEFAULT_USER_ID},
+                PRIMARY KEY (user_id, habit_name, date)
+                ) WITHOUT ROWID""")
+    c.execute(f"CREATE INDEX IF NOT EXISTS {completion_table_name}_date_index "
+              f"ON {completion_table_name} (user_id, date, habit_name)")
+    c.execute(f"INSERT OR IGNORE INTO {completion_table_name} (habit_name, date, user_id) "
+              f"SELECT habit_name, date, user_id FROM {progression_table_name} WHERE completed = 1")
+    c.execute(f"DROP TABLE {progression_table_name}")
+
+    # The view has exactly the same columns as the Progression_table. Every habit is combined with every date, and
+    # only with the completions of its own user.
+    c.execute(f"""CREATE VIEW {progression_table_name} AS
+              SELECT d.Date || ' - ' || h.habit_name AS date_plus_habit_name, h.habit_name, h.habit_periodicity,
+                     d.Date AS date, CASE WHEN c.habit_name IS NULL THEN 0 ELSE 1 END AS completed, h.user_id
+              FROM {date_table_name} AS d
+              CROSS JOIN {habit_table_name} AS h
+              LEFT JOIN {completion_table_name} AS c
+                ON c.user_id = h.user_id AND c.habit_name = h.habit_name AND c.date = d.Date""")
+
+    # Setting a habit on a date to completed stores a completion, setting it to not completed removes it. Inserted
+    # rows are handled in the same way, and deleted rows remove their completion. A view has no default values, so
+    # inserted rows without a user_id belong to the default user.
+    new_user_id = f"COALESCE(NEW.user_id, {database_and_table_creation_module.DEFAULT_USER_ID})"
+    c.execute(f"""CREATE TRIGGER {progression_table_name}_update INSTEAD OF UPDATE ON {progression_table_name}
+              BEGIN
+                  DELETE FROM {completion_table_name}
+                  WHERE user_id = OLD.user_id AND habit_name = OLD.habit_name AND date = OLD.date;
+                  INSERT OR IGNORE INTO {completion_table_name} (habit_name, date, user_id)
+                  SELECT NEW.habit_name, NEW.date, {new_user_id} WHERE NEW.completed = 1;
+              END""")
+    c.execute(f"""CREATE TRIGGER {progression_table_name}_insert INSTEAD OF INSERT ON {progression_table_name}
+              BEGIN
+                  DELETE FROM {completion_table_name}
+                  WHERE user_id = {new_user_id} AND habit_name = NEW.habit_name AND date = NEW.date;
+                  INSERT OR IGNORE INTO {completion_table_name} (habit_name, date, user_id)
+                  SELECT NEW.habit_name, NEW.date, {new_user_id} WHERE NEW.completed = 1;
+              END""")
+    c.execute(f"""CREATE TRIGGER {progression_table_name}_delete INSTEAD OF DELETE ON {progression_table_name}
+              BEGIN
+                  DELETE FROM {completion_table_name}
+                  WHERE user_id = OLD.user_id AND habit_name = OLD.habit_name AND date = OLD.date;
+              END""")
+
+
+def disable_sparse_storage(database, habit_table_name, date_table_name, progression_table_name,
+                           completion_table_name='Completion_table', metadata_table_name='Metadata_table'):
+    """This function switches the database back to the normal (dense) storage mode. In one transaction, all rows of
+    the view are written into a new Progression_table, after which the view, its triggers and the Completion_table
+    are dropped. If the database does not use the sparse mode, nothing happens.
+    """
+    if storage_mode(database, progression_table_name) == 'dense':
+        return
+    database_and_table_creation_module.create_metadata_table(metadata_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    dbconnection.commit()
+
+    try:
+        c.execute("BEGIN")
+        c.execute(f"CREATE TEMP TABLE dense_progression AS SELECT * FROM {progression_table_name} "
+                  f"ORDER BY date, habit_name")
+        c.execute(f"DROP VIEW {progression_table_name}")
+        c.execute(database_and_table_creation_module.progression_table_statement(progression_table_name))
+        c.execute(f"INSERT INTO {progression_table_name} SELECT * FROM temp.dense_progression")
+        for statement in database_and_table_creation_module.progression_index_statements(progression_table_name):
+            c.execute(statement)
+        c.execute("DROP TABLE temp.dense_progression")
+        c.execute(f"DROP TABLE {completion_table_name}")
+        c.execute(f"INSERT OR REPLACE INTO {metadata_table_name} (key, value) VALUES (?, 'dense')",
+                  (STORAGE_MODE_KEY,))
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Switch the storage mode of the progression data.")
+    parser.add_argument('mode', choices=['enable', 'disable'], help="enable or disable the sparse storage mode")
+    parser.add_argument('database', nargs='?', default='Habit_app_database.db', help="the database file")
+    arguments = parser.parse_args()
+
+    if arguments.mode == 'enable':
+        enable_sparse_storage(arguments.database, 'Habit_table', 'Date_table', 'Progression_table')
+    else:
+        disable_sparse_storage(arguments.database, 'Habit_table', 'Date_table', 'Progression_table')
+    print(f"The progression data is stored in {storage_mode(arguments.database, 'Progression_table')} mode.")
@@ -0,0 +1,125 @@
+"""This module calculates the current streak and the longest streak ever of all habits in one single SQL statement.
+The analysis modules calculate the streaks in Python: for every habit the complete history is queried and counted row
+by row. Here, SQLite does all the counting and only the final numbers per habit are returned to Python.
+
+The statement uses the following techniques:
+- Daily habits: the longest streak is found by grouping consecutive completed days. For completed days only, the
+  'day number' minus the 'row number' (window function ROW_NUMBER) is the same for all days of one unbroken series, so
+  counting the days per group gives the length of every series.
+- Weekly habits: the days are first grouped per week (weeks start on Monday, like ISO weeks). A week counts if the
+  habit was completed at least once. The longest series of such weeks is found in the same way as for daily habits.
+- Current streaks: for every habit the most recent miss (a day or week that was not completed) is looked up. The
+  current streak is the number of completed days or weeks after that miss. For daily habits the index on
+  (user_id, habit_name, date, completed) of the Progression_table is used to find this miss.
+
+The statement only reads the habits and progression of one user, through the indexes that start with the user_id.
+
+The outcome is the same as the outcome of the functions in analysis_current_streak_per_habit and
+analysis_longest_streak_ever.
+"""
+
+from datetime import datetime
+
+import connection_manager_module
+import database_and_table_creation_module
+
+
+def streak_query(habit_table_name, progression_table_name, single_habit=False):
+    """This function returns the SQL statement that calculates the streaks. The statement has the parameters :today
+    (the last date that counts for the current streak, as YYYY-MM-DD), :user_id and, if single_habit is True,
+    :habit_name.
+    Every row of the outcome contains: habit_name, habit_periodicity, current_streak, longest_streak and last_date
+    (the most recent date up to :today that the current streak takes into account). The rows are in the order in
+    which the habits were added.
+    """
+    habit_filter = "AND habit_name = :habit_name" if single_habit else ""
+
+    return f"""
+        WITH habits AS (
+            SELECT rowid AS habit_order, habit_name, habit_periodicity FROM {habit_table_name}
+            WHERE user_id = :user_id {habit_filter}
+        ),
+        history AS (
+            SELECT p.habit_name, h.habit_periodicity, p.date, p.completed
+            FROM habits AS h
+            JOIN {progression_table_name} AS p ON p.user_id = :user_id AND p.habit_name = h.habit_name
+        ),
+        daily_series AS (
+            SELECT habit_name, julianday(date) - ROW_NUMBER() OVER (PARTITION BY habit_name ORDER BY date) AS series
+            FROM history
+            WHERE habit_periodicity = 'daily' AND completed = 1
+        ),
+        weeks AS (
+            SELECT habit_name, date(date, 'weekday 0', '-6 days') AS week_start,
+                   MAX(completed = 1) AS completed, MAX(date <= :today) AS up_to_today,
+                   MAX(completed = 1 AND date <= :today) AS completed_up_to_today
+            FROM history
+            WHERE habit_periodicity <> 'daily'
+            GROUP BY habit_name, week_start
+        ),
+        weekly_series AS (
+            SELECT habit_name, completed,
+                   ROW_NUMBER() OVER (PARTITION BY habit_name ORDER BY week_start)
+                   - ROW_NUMBER() OVER (PARTITION BY habit_name, completed ORDER BY week_start) AS series
+            FROM weeks
+        ),
+        longest AS (
+            SELECT habit_name, MAX(series_length) AS longest_streak
+            FROM (SELECT habit_name, COUNT(*) AS series_length FROM daily_series GROUP BY habit_name, series
+                  UNION ALL
+                  SELECT habit_name, COUNT(*) FROM weekly_series WHERE completed = 1 GROUP BY habit_name, series)
+            GROUP BY habit_name
+        ),
+        last_weekly_miss AS (
+            SELECT habit_name, MAX(week_start) AS week_start
+            FROM weeks
+            WHERE up_to_today = 1 AND completed_up_to_today = 0
+            GROUP BY habit_name
+        ),
+        weekly_current AS (
+            SELECT w.habit_name, COUNT(*) AS current_streak
+            FROM weeks AS w
+            LEFT JOIN last_weekly_miss AS m ON m.habit_name = w.habit_name
+            WHERE w.completed_up_to_today = 1 AND w.week_start > COALESCE(m.week_start, '')
+            GROUP BY w.habit_name
+        ),
+        daily_current AS (
+            SELECT h.habit_name,
+                   (SELECT COUNT(*) FROM {progression_table_name} AS p
+                    WHERE p.user_id = :user_id AND p.habit_name = h.habit_name AND p.date <= :today
+                      AND p.completed = 1
+                      AND p.date > COALESCE(
+                          (SELECT m.date FROM {progression_table_name} AS m
+                           WHERE m.user_id = :user_id AND m.habit_name = h.habit_name AND m.date <= :today
+                             AND m.completed IS NOT 1
+                           ORDER BY m.date DESC LIMIT 1), '')) AS current_streak
+            FROM habits AS h
+            WHERE h.habit_periodicity = 'daily'
+        )
+        SELECT h.habit_name, h.habit_periodicity,
+               COALESCE(dc.current_streak, wc.current_streak, 0) AS current_streak,
+               COALESCE(l.longest_streak, 0) AS longest_streak,
+               (SELECT MAX(p.date) FROM {progression_table_name} AS p
+                WHERE p.user_id = :user_id AND p.habit_name = h.habit_name AND p.date <= :today) AS last_date
+        FROM habits AS h
+        LEFT JOIN daily_current AS dc ON dc.habit_name = h.habit_name
+        LEFT JOIN weekly_current AS wc ON wc.habit_name = h.habit_name
+        LEFT JOIN longest AS l ON l.habit_name = h.habit_name
+        ORDER BY h.habit_order
+        """
+
+
+def calculate_streaks(database, habit_table_name, progression_table_name, habit_name=None, today=None,
+                      user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function runs the streak statement and returns its rows: (habit_name, habit_periodicity, current_streak,
+    longest_streak, last_date) for every habit of the user, or only for the given habit. The current streaks are
+    calculated up to and including 'today', unless a different date (YYYY-MM-DD) is given.
+    """
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    parameters = {'today': today or datetime.today().strftime('%Y-%m-%d'), 'habit_name': habit_name,
+                  'user_id': user_id}
+    c.execute(streak_query(habit_table_name, progression_table_name, single_habit=habit_name is not None),
+              parameters)
+    return c.fetchall()
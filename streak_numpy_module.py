@@ -0,0 +1,149 @@
+"""This module is an optional backend for the streak calculations that uses NumPy. Instead of going through the
+history of every habit row by row (with datetime.strptime and timedelta for every row), the completions of all habits
+are loaded into one matrix: one row per habit and one column per day, with a 1 for a completed day and a 0 otherwise.
+The streaks of all habits are then calculated at once with array operations:
+- cumsum: the running number of completions per habit. Subtracting the value at the most recent miss (found with
+  maximum.accumulate) gives, for every day, the length of the series of completed days that ends on that day.
+- reshape by week: the day columns are padded so that the first column is a Monday, and then reshaped into weeks of 7
+  days. A week counts if the habit was completed on any day of the week, after which the same calculation is used.
+
+The functions calculate_daily_and_weekly_streaks and calculate_longest_streaks return the same dictionaries as the
+functions with the same name in the analysis modules. In the application every habit has a row for every date (see
+combine_habits_dates), and a date without a row is treated as not completed.
+
+NumPy is not needed for the rest of the application. If it is not installed, calling this module raises an
+ImportError with an explanation.
+"""
+
+from datetime import date
+
+import connection_manager_module
+import database_and_table_creation_module
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def calculate_daily_and_weekly_streaks(database, habit_table_name, progression_table_name,
+                                       user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the current streak of every habit as a dictionary: {habit: (periodicity, streak)}."""
+    habits, periodicities, current_streaks, longest_streaks = calculate_streak_arrays(
+        database, habit_table_name, progression_table_name, user_id=user_id)
+    return {habit: (periodicity, int(current_streak))
+            for habit, periodicity, current_streak in zip(habits, periodicities, current_streaks)}
+
+
+def calculate_longest_streaks(database, habit_table_name, progression_table_name,
+                              user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the longest streak ever of every habit as a dictionary: {habit: (streak, periodicity)}."""
+    habits, periodicities, current_streaks, longest_streaks = calculate_streak_arrays(
+        database, habit_table_name, progression_table_name, user_id=user_id)
+    return {habit: (int(longest_streak), periodicity)
+            for habit, periodicity, longest_streak in zip(habits, periodicities, longest_streaks)}
+
+
+def calculate_streak_arrays(database, habit_table_name, progression_table_name, today=None,
+                            user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function loads the completion matrix and calculates the current and longest streaks of all habits of the
+    user. It returns the habit names, their periodicities, and two arrays with the current and longest streaks. The
+    current streaks are calculated up to and including 'today', unless a different date is given.
+    """
+    if numpy is None:
+        raise ImportError("The NumPy streak backend needs the numpy package. Install it with: pip install numpy")
+
+    today = today or date.today()
+    habits, periodicities, first_date, completions, last_day_indexes = load_completion_matrix(
+        database, habit_table_name, progression_table_name, today, user_id)
+
+    is_daily = numpy.array([periodicity == 'daily' for periodicity in periodicities], dtype=bool)
+    current_streaks = numpy.zeros(len(habits), dtype=numpy.int64)
+    longest_streaks = numpy.zeros(len(habits), dtype=numpy.int64)
+    if completions.shape[1] == 0:
+        return habits, periodicities, current_streaks, longest_streaks
+    has_history = last_day_indexes >= 0
+    today_index = min((today - first_date).days, completions.shape[1] - 1)
+
+    # Daily habits: the series length per day, the longest over all days, and the current at the last date.
+    daily_series = series_lengths(completions)
+    longest_streaks[is_daily] = daily_series[is_daily].max(axis=1)
+    rows = numpy.flatnonzero(is_daily & has_history)
+    current_streaks[rows] = daily_series[rows, last_day_indexes[rows]]
+
+    # Weekly habits: the same, after grouping the days into weeks (Monday to Sunday). For the current streak only the
+    # days up to 'today' count, so these weeks are calculated separately.
+    offset = first_date.weekday()
+    weekly_series = series_lengths(completed_per_week(completions, offset))
+    longest_streaks[~is_daily] = weekly_series[~is_daily].max(axis=1)
+    if today_index >= 0:
+        weekly_series_up_to_today = series_lengths(completed_per_week(completions[:, :today_index + 1], offset))
+        rows = numpy.flatnonzero(~is_daily & has_history)
+        current_streaks[rows] = weekly_series_up_to_today[rows, (last_day_indexes[rows] + offset) // 7]
+
+    return habits, periodicities, current_streaks, longest_streaks
+
+
+def load_completion_matrix(database, habit_table_name, progression_table_name, today,
+                           user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function queries the database for the habits of the user and returns: the habit names and periodicities
+    (in the order in which they were added), the first date of the user in the Progression_table, the completion
+    matrix (int8, habits x days), and for every habit the column of its most recent date up to 'today' (or -1 if the
+    habit has no rows).
+    """
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute(f"SELECT habit_name, habit_periodicity FROM {habit_table_name} WHERE user_id = ? ORDER BY rowid",
+              (user_id,))
+    habit_rows = c.fetchall()
+    habits = [row[0] for row in habit_rows]
+    periodicities = [row[1] for row in habit_rows]
+    habit_indexes = {habit: index for index, habit in enumerate(habits)}
+
+    c.execute(f"SELECT MIN(date), MAX(date) FROM {progression_table_name} WHERE user_id = ?", (user_id,))
+    first, last = c.fetchone()
+    if first is None:
+        return habits, periodicities, today, numpy.zeros((len(habits), 0), dtype=numpy.int8), \
+            numpy.full(len(habits), -1)
+    first_date = date.fromisoformat(first)
+    number_of_days = (date.fromisoformat(last) - first_date).days + 1
+
+    # Only the completed days are loaded. The day column is calculated by SQLite, so no dates are parsed in Python.
+    completions = numpy.zeros((len(habits), number_of_days), dtype=numpy.int8)
+    c.execute(f"""SELECT habit_name, CAST(julianday(date) - julianday(?) AS INTEGER)
+              FROM {progression_table_name} WHERE user_id = ? AND completed = 1""", (first, user_id))
+    completed_cells = [(habit_indexes[habit], day) for habit, day in c.fetchall() if habit in habit_indexes]
+    if completed_cells:
+        habit_column, day_column = numpy.array(completed_cells).T
+        completions[habit_column, day_column] = 1
+
+    last_day_indexes = numpy.full(len(habits), -1)
+    c.execute(f"""SELECT habit_name, CAST(julianday(MAX(date)) - julianday(?) AS INTEGER)
+              FROM {progression_table_name} WHERE user_id = ? AND date <= ? GROUP BY habit_name""",
+              (first, user_id, today.isoformat()))
+    for habit, day in c.fetchall():
+        if habit in habit_indexes:
+            last_day_indexes[habit_indexes[habit]] = day
+
+    return habits, periodicities, first_date, completions, last_day_indexes
+
+
+def series_lengths(completions):
+    """This function returns, for every habit and every column, the length of the series of completed columns that
+    ends in that column (0 if the column itself is not completed). The running total of completions minus the running
+    total at the most recent miss gives this length."""
+    running_total = numpy.cumsum(completions, axis=1, dtype=numpy.int64)
+    total_at_misses = numpy.where(completions == 0, running_total, 0)
+    return running_total - numpy.maximum.accumulate(total_at_misses, axis=1)
+
+
+def completed_per_week(completions, offset):
+    """This function groups the day columns into weeks. The matrix is padded with 'offset' columns at the start (so
+    that the first column is a Monday) and with columns at the end to complete the last week. A week is completed (1)
+    if any day in the week is completed."""
+    number_of_days = completions.shape[1]
+    number_of_weeks = (offset + number_of_days + 6) // 7
+    padded = numpy.zeros((completions.shape[0], number_of_weeks * 7), dtype=numpy.int8)
+    padded[:, offset:offset + number_of_days] = completions
+    return padded.reshape(completions.shape[0], number_of_weeks, 7).max(axis=2)
@@ -0,0 +1,170 @@
+"""This module maintains the Streak_table: a table with, for every habit, the current streak and the longest streak
+ever. Before, the analytics module went through the complete history of every habit every time the streaks were
+printed. Now the streaks are stored, and only updated when something changes:
+- When the user updates the progression of a habit (also on a date in the past), the streaks of that one habit are
+  calculated again by refresh_habit_streak. For a weekly habit, this uses its week rollups (see
+  rollup_storage_module), so one row per week is read instead of one row per day.
+- When new dates are added to the Progression_table (the 'daily rollover'), roll_over_streaks updates all stored
+  current streaks at once, without reading any history.
+- When progression data is changed in another way (sample data, deleting a habit), the stored streaks are removed by
+  invalidate_streaks. They are calculated again the next time they are needed.
+
+The streaks themselves are calculated by the single SQL statement of the streak_engine_module, and stored with an
+INSERT ... SELECT. So the history of a habit never has to be loaded into Python. The streaks are stored per user; the
+functions read and calculate the streaks of one user (the default user, unless a user_id is given).
+"""
+
+from datetime import date, datetime
+
+import connection_manager_module
+import database_and_table_creation_module
+import streak_engine_module
+
+
+def read_streaks(database, habit_table_name, progression_table_name, streak_table_name='Streak_table',
+                 user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the stored streaks of all habits of the user as a list of (habit_name, periodicity,
+    current streak, longest streak), in the order in which the habits were added. Habits that have no stored streaks
+    yet, are calculated and stored first. Because the rest is read from the Streak_table, this costs one row per habit.
+    """
+    database_and_table_creation_module.create_streak_table(streak_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    # First, calculate the streaks of the habits that are not in the Streak_table yet. If the user has no stored
+    # streaks at all (for example after new sample data), the streaks of all their habits are calculated and stored in
+    # one statement.
+    c.execute(f"SELECT EXISTS (SELECT 1 FROM {streak_table_name} WHERE user_id = ?)", (user_id,))
+    if not c.fetchone()[0]:
+        store_streaks(database, habit_table_name, progression_table_name, streak_table_name=streak_table_name,
+                      user_id=user_id)
+    else:
+        c.execute(f"""SELECT h.habit_name FROM {habit_table_name} AS h
+                  LEFT JOIN {streak_table_name} AS s ON s.user_id = h.user_id AND s.habit_name = h.habit_name
+                  WHERE h.user_id = ? AND s.habit_name IS NULL""", (user_id,))
+        for (habit_name,) in c.fetchall():
+            refresh_habit_streak(database, habit_table_name, progression_table_name, habit_name, streak_table_name,
+                                 user_id)
+
+    # Then, read all the stored streaks.
+    c.execute(f"""SELECT h.habit_name, h.habit_periodicity, s.current_streak, s.longest_streak
+              FROM {habit_table_name} AS h
+              JOIN {streak_table_name} AS s ON s.user_id = h.user_id AND s.habit_name = h.habit_name
+              WHERE h.user_id = ?
+              ORDER BY h.rowid""", (user_id,))
+    return c.fetchall()
+
+
+def refresh_habit_streak(database, habit_table_name, progression_table_name, habit_name,
+                         streak_table_name='Streak_table', user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function calculates the current streak and the longest streak ever of one habit, and stores them in the
+    Streak_table. It is called after the progression of the habit has been updated. Because the complete history of
+    this one habit is used, also changes on dates in the past result in correct streaks.
+
+    The streaks of a daily habit are calculated by store_streaks. The streaks of a weekly habit are calculated from its
+    week rollups by rollup_storage_module.weekly_streaks, so the days do not have to be grouped into weeks again. The
+    update module keeps the rollups up-to-date, and calls this function after it has updated them.
+    """
+    # The rollup_storage_module imports this module as well, so it is imported here.
+    import rollup_storage_module
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(f"SELECT habit_periodicity FROM {habit_table_name} WHERE user_id = ? AND habit_name = ?",
+              (user_id, habit_name))
+    row = c.fetchone()
+    if row is None or row[0] == 'daily':
+        store_streaks(database, habit_table_name, progression_table_name, habit_name, streak_table_name, user_id)
+        return
+
+    today = date.today()
+    current_streak, longest_streak = rollup_storage_module.weekly_streaks(
+        database, habit_name, today, habit_table_name, progression_table_name, user_id=user_id)
+    c.execute(f"SELECT MAX(date) FROM {progression_table_name} WHERE user_id = ? AND habit_name = ? AND date <= ?",
+              (user_id, habit_name, today.isoformat()))
+    last_date = c.fetchone()[0]
+
+    database_and_table_creation_module.create_streak_table(streak_table_name, database)
+    c.execute(f"INSERT OR REPLACE INTO {streak_table_name} (habit_name, habit_periodicity, current_streak, "
+              f"longest_streak, last_date, user_id) VALUES (?, ?, ?, ?, ?, ?)",
+              (habit_name, row[0], current_streak, longest_streak, last_date, user_id))
+    dbconnection.commit()
+
+
+def store_streaks(database, habit_table_name, progression_table_name, habit_name=None,
+                  streak_table_name='Streak_table', user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function calculates the streaks of one habit, or of all habits of the user if no habit name is given, with
+    the statement of the streak_engine_module, and stores the outcome directly in the Streak_table. Besides the
+    streaks, the most recent date that the current streak takes into account is stored, so that roll_over_streaks
+    knows from which date on new (not completed) dates have been added.
+    """
+    database_and_table_creation_module.create_streak_table(streak_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    query = streak_engine_module.streak_query(habit_table_name, progression_table_name,
+                                              single_habit=habit_name is not None)
+    c.execute(f"INSERT OR REPLACE INTO {streak_table_name} (habit_name, habit_periodicity, current_streak, "
+              f"longest_streak, last_date, user_id) SELECT *, :user_id FROM ({query})",
+              {'today': datetime.today().strftime('%Y-%m-%d'), 'habit_name': habit_name, 'user_id': user_id})
+    dbconnection.commit()
+
+
+def roll_over_streaks(database, new_last_date, streak_table_name='Streak_table'):
+    """This function is called by combine_habits_dates after new dates (with 'not completed' rows) have been added
+    to the Progression_table. A new date that is not completed breaks every daily streak. A weekly streak is only
+    broken when the new date is in a new week (weeks start on Monday), because the habit can still be completed
+    during the rest of the week. The longest streaks ever do not change. This takes one row per habit (of all users,
+    once per new date), and no history has to be read.
+    """
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (streak_table_name,))
+    if c.fetchone() is None:
+        return
+
+    # The expression date(..., 'weekday 0', '-6 days') gives the Monday of the week of a date.
+    c.execute(f"""UPDATE {streak_table_name}
+              SET current_streak = CASE
+                    WHEN habit_periodicity = 'daily' THEN 0
+                    WHEN date(last_date, 'weekday 0', '-6 days') <> date(:new_date, 'weekday 0', '-6 days') THEN 0
+                    ELSE current_streak END,
+                  last_date = :new_date
+              WHERE last_date < :new_date""",
+              {'new_date': new_last_date})
+    dbconnection.commit()
+
+
+def invalidate_streaks(database, streak_table_name='Streak_table', habit_name=None, user_id=None):
+    """This function removes the stored streaks of one habit, or of all habits if no habit name is given, of the
+    given user, or of all users if no user_id is given. It is used when progression data has been changed without
+    going through the update module, for example when the sample data is inserted. The removed streaks are calculated
+    again by read_streaks the next time they are needed.
+    """
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (streak_table_name,))
+    if c.fetchone() is None:
+        return
+
+    conditions, parameters = user_and_habit_conditions(user_id, habit_name)
+    c.execute(f"DELETE FROM {streak_table_name} {conditions}", parameters)
+    dbconnection.commit()
+
+
+def user_and_habit_conditions(user_id=None, habit_name=None):
+    """This function returns the WHERE clause and its parameters for the rows of a user and/or habit. Without a user
+    and habit, the clause is empty (all rows)."""
+    conditions = []
+    parameters = []
+    if user_id is not None:
+        conditions.append("user_id = ?")
+        parameters.append(user_id)
+    if habit_name is not None:
+        conditions.append("habit_name = ?")
+        parameters.append(habit_name)
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), parameters
@@ -0,0 +1,172 @@
+"""In this test module, the api_server_module is tested. The requests are handled directly with handle_request, and
+one test sends real HTTP requests to a running server.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import date
+
+import api_server_module
+import connection_manager_module
+import insert_sample_data_module
+import main_habit_tracker_app
+
+
+def set_up_test_database():
+    """This function empties the test db and inserts the sample data."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    dbconnection.commit()
+    dbconnection.close()
+    main_habit_tracker_app.forget_database('test_Habit_app_database.db')
+
+    insert_sample_data_module.insert_sample_data_before_distribution_of_app('test_Habit_app_database.db',
+                                                                            'Habit_table', 'Date_table',
+                                                                            'Progression_table')
+
+
+def request(method, path, body=None, query=None):
+    """This function handles one request with the test db."""
+    return api_server_module.handle_request('test_Habit_app_database.db', method, path, query or {},
+                                            json.dumps(body).encode() if body is not None else b'')
+
+
+def test_habit_requests():
+    """This test function adds, lists and deletes a habit. Invalid input should give status 400, and an unknown path,
+    habit or user status 404."""
+    set_up_test_database()
+
+    status, outcome = request('POST', '/habits', {'habit_name': 'Force Push', 'habit_description': 'on the sith code',
+                                                  'habit_periodicity': 'daily'})
+    assert status == 201
+    assert outcome['added']['habit_name'] == 'force push'
+    assert request('POST', '/habits', {'habit_name': 'force push', 'habit_description': 'again',
+                                       'habit_periodicity': 'daily'})[0] == 400
+
+    status, outcome = request('GET', '/habits', query={'periodicity': ['daily']})
+    assert status == 200
+    assert 'force push' in [habit['habit_name'] for habit in outcome['habits']]
+    assert all(habit['habit_periodicity'] == 'daily' for habit in outcome['habits'])
+
+    assert request('DELETE', '/habits/force push') == (200, {'deleted': 'force push'})
+    assert request('DELETE', '/habits/force push')[0] == 404
+    assert request('GET', '/unknown')[0] == 404
+    assert request('GET', '/habits', query={'user': ['palpatine']})[0] == 404
+
+
+def test_progression_requests():
+    """This test function updates the progression of a day, and asserts whether the day and the streaks show it."""
+    set_up_test_database()
+
+    status, outcome = request('POST', '/progression/2024-06-01', [{'habit_name': 'meditate', 'completed': 0},
+                                                                  {'habit_name': 'lightsaber training'}])
+    assert status == 200
+    assert outcome['habits'] == ['lightsaber training', 'meditate']
+
+    status, outcome = request('GET', '/progression/2024-06-01')
+    day = {row['habit_name']: row['completed'] for row in outcome['progression']}
+    assert day['meditate'] == 0 and day['lightsaber training'] == 1
+    assert request('GET', '/progression/june')[0] == 400
+    assert request('POST', '/progression/2024-06-01', {'habit_name': 'unknown'})[0] == 404
+
+    status, outcome = request('GET', '/streaks')
+    assert status == 200
+    assert 'meditate' in [streak['habit_name'] for streak in outcome['streaks']]
+
+
+def test_reading_requests_do_not_take_the_write_lock():
+    """This test function lets another connection hold the write lock, and asserts whether the progression and the
+    streaks can still be read once the dates and rows are up to date."""
+    set_up_test_database()
+    main_habit_tracker_app.bootstrap('test_Habit_app_database.db')
+    assert request('GET', '/streaks')[0] == 200
+
+    writer = sqlite3.connect('test_Habit_app_database.db', timeout=0)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        connection_manager_module.get_connection('test_Habit_app_database.db').execute("PRAGMA busy_timeout = 0")
+        assert request('GET', f'/progression/{date.today().isoformat()}')[0] == 200
+        assert request('GET', '/streaks')[0] == 200
+    finally:
+        writer.rollback()
+        writer.close()
+        connection_manager_module.close_connection('test_Habit_app_database.db')
+
+
+def test_concurrent_progression_requests():
+    """This test function sends progression updates from 8 threads at the same time (every thread has its own
+    connection, like the worker threads of the server). None of them should fail with 'database is locked'."""
+    set_up_test_database()
+    main_habit_tracker_app.bootstrap('test_Habit_app_database.db')
+    today = date.today().isoformat()
+    statuses = []
+
+    def send_requests(thread_number):
+        try:
+            for number in range(20):
+                statuses.append(request('POST', f'/progression/{today}',
+                                        {'habit_name': 'meditate', 'completed': (thread_number + number) % 2})[0])
+        finally:
+            connection_manager_module.close_connection('test_Habit_app_database.db')
+
+    threads = [threading.Thread(target=send_requests, args=(thread_number,)) for thread_number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200] * 160
+
+
+def test_http_round_trip():
+    """This test function starts the server on a free port and sends two requests over one connection."""
+    set_up_test_database()
+
+    async def round_trip():
+        server, executor = await api_server_module.start_server('test_Habit_app_database.db', port=0, workers=2)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        for path in ('/habits', '/streaks'):
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            status_line = await reader.readline()
+            headers = {}
+            while (line := await reader.readline()) != b'\r\n':
+                name, _, value = line.decode().partition(':')
+                headers[name.lower()] = value.strip()
+            responses.append((status_line.split()[1], json.loads(await reader.readexactly(
+                int(headers['content-length'])))))
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        executor.shutdown(wait=True)
+        return responses
+
+    (habits_status, habits), (streaks_status, streaks) = asyncio.run(round_trip())
+    assert habits_status == b'200' and len(habits['habits']) > 0
+    assert streaks_status == b'200' and len(streaks['streaks']) == len(habits['habits'])
+
+
+def test_invalid_http_requests():
+    """This test function sends a malformed request line and an invalid Content-Length to a running server. Both
+    should get status 400 instead of a closed connection."""
+    set_up_test_database()
+
+    async def send(raw_request):
+        server, executor = await api_server_module.start_server('test_Habit_app_database.db', port=0, workers=1)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+        writer.write(raw_request)
+        status_line = await reader.readline()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        executor.shutdown(wait=True)
+        return status_line.split()[1:2]
+
+    assert asyncio.run(send(b"GARBAGE\r\n\r\n")) == [b'400']
+    assert asyncio.run(send(b"POST /habits HTTP/1.1\r\nContent-Length: -1\r\n\r\n")) == [b'400']
+    assert asyncio.run(send(b"POST /habits HTTP/1.1\r\nContent-Length: ten\r\n\r\n")) == [b'400']
@@ -0,0 +1,93 @@
+"""In this test module, the batch_analytics_module is tested. The databases are created in a temporary directory, so
+the test databases of the other test modules are not changed.
+"""
+import json
+import os
+import pytest
+from datetime import date
+
+import analysis_longest_streak_ever
+import batch_analytics_module
+import connection_manager_module
+import insert_sample_data_module
+import main_habit_tracker_app
+
+
+def create_sample_databases(directory, number_of_databases):
+    """This function creates databases with the sample data in the directory, prepared by the application, and
+    returns their file names."""
+    databases = []
+    for number in range(number_of_databases):
+        database = str(directory / f"user_{number}.db")
+        insert_sample_data_module.insert_sample_data_before_distribution_of_app(database, 'Habit_table', 'Date_table',
+                                                                                'Progression_table')
+        main_habit_tracker_app.bootstrap(database)
+        main_habit_tracker_app.forget_database(database)
+        connection_manager_module.close_connection(database)
+        databases.append(database)
+    return databases
+
+
+def test_database_files(tmp_path):
+    """This test function asserts whether a directory gives its .db files, sorted, and whether files are kept."""
+    for name in ('b.db', 'a.db', 'a.db-wal', 'notes.txt'):
+        (tmp_path / name).write_text('')
+    assert batch_analytics_module.database_files([str(tmp_path), 'other.db']) == \
+        [str(tmp_path / 'a.db'), str(tmp_path / 'b.db'), 'other.db']
+
+
+def test_run_batch(tmp_path):
+    """This test function analyses three sample databases and one invalid file with two worker processes, and
+    asserts whether the output file has one line per database, in order, with the same longest streaks as the
+    analysis module, and whether the invalid file is reported as an error."""
+    databases = create_sample_databases(tmp_path, 3)
+    invalid_database = tmp_path / 'invalid.db'
+    invalid_database.write_text('this is not a database')
+    output_path = str(tmp_path / 'streaks.jsonl')
+    with open(databases[1], 'rb') as database_file:
+        database_contents = database_file.read()
+
+    result = batch_analytics_module.run_batch(databases + [str(invalid_database)], output_path, workers=2,
+                                              chunk_size=2)
+    assert result['databases'] == 4
+    assert result['errors'] == 1
+    assert result['databases_per_second'] > 0
+
+    with open(output_path, encoding='utf-8') as output_file:
+        outcomes = [json.loads(line) for line in output_file]
+    assert [outcome['database'] for outcome in outcomes] == databases + [str(invalid_database)]
+    assert 'error' in outcomes[3]
+
+    with open(databases[1], 'rb') as database_file:
+        assert database_file.read() == database_contents
+    longest_streaks = analysis_longest_streak_ever.calculate_longest_streaks(databases[0], 'Habit_table',
+                                                                             'Progression_table')
+    for outcome in outcomes[:3]:
+        [user] = outcome['users']
+        assert user['user_name'] == 'default'
+        assert {habit['habit_name']: habit['longest_streak'] for habit in user['habits']} == \
+            {habit_name: streak for habit_name, (streak, periodicity) in longest_streaks.items()}
+
+
+def test_older_layout_and_missing_dates(tmp_path):
+    """This test function asserts whether a database with an older layout is reported with an error instead of being
+    upgraded, and whether the dates that are not stored yet count as not completed."""
+    database = str(tmp_path / 'old.db')
+    insert_sample_data_module.insert_sample_data_before_distribution_of_app(database, 'Habit_table', 'Date_table',
+                                                                            'Progression_table')
+    connection_manager_module.close_connection(database)
+    size_before = os.path.getsize(database)
+    outcome = batch_analytics_module.analyse_database(database)
+    assert 'older layout' in outcome['error']
+    assert os.path.getsize(database) == size_before
+
+    today = date(2024, 6, 5)
+    assert batch_analytics_module.current_streak_up_to_today('daily', 3, '2024-06-05', today) == 3
+    assert batch_analytics_module.current_streak_up_to_today('daily', 3, '2024-06-04', today) == 0
+    assert batch_analytics_module.current_streak_up_to_today('weekly', 2, '2024-06-03', today) == 2
+    assert batch_analytics_module.current_streak_up_to_today('weekly', 2, '2024-06-02', today) == 0
+    assert batch_analytics_module.current_streak_up_to_today('weekly', 2, None, today) == 0
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,38 @@
+"""In this test module, the benchmark_module is tested on a very small scale. It asserts whether every hot path is
+timed, and whether the benchmarks leave the synthetic database in a consistent state.
+"""
+import pytest
+
+import benchmark_module
+import connection_manager_module
+
+
+def test_benchmark_hot_paths():
+    """This test function builds a small synthetic database, times the hot paths once, and asserts whether a time is
+    given for every hot path. After the catch-up benchmarks, the Progression_table should contain every habit on
+    every date again."""
+    benchmark_module.build_synthetic_database('test_Habit_app_database2.db', 4, 60)
+    hot_paths = benchmark_module.benchmark_hot_paths('test_Habit_app_database2.db', repeat=1)
+
+    assert set(hot_paths) == {'update_dates_up_to_date', 'update_dates_catch_up', 'combine_habits_dates_up_to_date',
+                              'combine_habits_dates_catch_up', 'read_streaks', 'provide_habit_list', 'day_navigation',
+                              'update_progression'}
+    assert all(seconds >= 0 for seconds in hot_paths.values())
+
+    c = connection_manager_module.get_connection('test_Habit_app_database2.db').cursor()
+    c.execute("SELECT COUNT(*) FROM Progression_table")
+    assert c.fetchone()[0] == 4 * 60
+
+
+def test_run_benchmarks():
+    """This test function runs the complete benchmark for one small scale, with the python streak backend skipped."""
+    results = benchmark_module.run_benchmarks([3], [10], 'test_Habit_app_database2.db', repeat=1, python_limit=0)
+
+    assert len(results) == 1
+    assert results[0]['progression_rows'] == 30
+    assert results[0]['streak_backends']['python'] is None
+    assert results[0]['streak_backends']['sql_engine'] >= 0
+
+
+if __name__ == '__main__':
+    pytest.main()
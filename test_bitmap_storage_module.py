@@ -0,0 +1,81 @@
+"""In this test module, the bitmap_storage_module is tested. It asserts whether the streaks and completion counts
+that are calculated with the bitmaps are the same as the ones from the Progression_table, also after the user updated
+their progression.
+"""
+import pytest
+
+from datetime import date, datetime, timedelta
+
+import analysis_current_streak_per_habit
+import analysis_longest_streak_ever
+import bitmap_storage_module
+import connection_manager_module
+import update_progression_module
+
+
+def test_bitmap_streaks_equal_stored_streaks(sample_database):
+    """This test function asserts whether the streaks from the bitmaps are the same as the streaks of the analysis
+    modules, before and after 'meditate' is checked off today."""
+    today = datetime.today().strftime('%Y-%m-%d')
+
+    for new_status in (None, 1):
+        if new_status is not None:
+            update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', today,
+                                                             new_status)
+        assert bitmap_storage_module.calculate_daily_and_weekly_streaks(
+            'test_Habit_app_database.db', 'Habit_table', 'Date_table', 'Progression_table') == \
+            analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks('test_Habit_app_database.db',
+                                                                                 'Habit_table', 'Progression_table')
+        assert bitmap_storage_module.calculate_longest_streaks(
+            'test_Habit_app_database.db', 'Habit_table', 'Date_table', 'Progression_table') == \
+            analysis_longest_streak_ever.calculate_longest_streaks('test_Habit_app_database.db', 'Habit_table',
+                                                                   'Progression_table')
+
+
+def test_check_off_removes_bitmap(sample_database):
+    """This test function asserts whether a check-off removes the bitmap of the habit instead of rewriting it, and
+    whether a check-off on a date without a row in the Progression_table leaves the bitmap as it is."""
+    bitmap_storage_module.build_bitmaps('test_Habit_app_database.db', 'Habit_table', 'Date_table', 'Progression_table')
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2000-01-01', 1)
+    c.execute("SELECT COUNT(*) FROM Bitmap_table WHERE habit_name = 'meditate'")
+    assert c.fetchone()[0] == 1
+
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2024-06-01', 1)
+    c.execute("SELECT habit_name FROM Bitmap_table ORDER BY habit_name")
+    assert 'meditate' not in [row[0] for row in c.fetchall()]
+
+
+def test_completion_counts(sample_database):
+    """This test function asserts whether the number of completed days per habit from the bitmaps is the same as the
+    count from the Progression_table, for all days and for the last week."""
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+    week_ago = date.today() - timedelta(days=6)
+
+    c.execute("SELECT habit_name, SUM(completed) FROM Progression_table GROUP BY habit_name")
+    assert bitmap_storage_module.completion_counts('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                   'Progression_table') == dict(c.fetchall())
+
+    c.execute("SELECT habit_name, SUM(completed) FROM Progression_table WHERE date BETWEEN ? AND ? "
+              "GROUP BY habit_name", (week_ago.isoformat(), date.today().isoformat()))
+    assert bitmap_storage_module.completion_counts('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                   'Progression_table', week_ago, date.today()) == dict(c.fetchall())
+
+
+def test_bit_operations():
+    """This test function asserts the bit operations on a small bitmap: the days 0, 1, 2, 5 and 6 are completed, and
+    the first day is a Wednesday (so the first week contains the days 0 to 4)."""
+    bits = 0b1100111
+    assert bitmap_storage_module.longest_run(bits) == 3
+    assert bitmap_storage_module.current_run(bits, 6) == 2
+    assert bitmap_storage_module.current_run(bits, 4) == 0
+    assert bitmap_storage_module.from_bytes(bitmap_storage_module.to_bytes(bits)) == bits
+    weeks = bitmap_storage_module.weeks_completed(bits, 2)
+    assert weeks == 0b10000001
+    assert bitmap_storage_module.longest_run(weeks, 7) == 2
+    assert bitmap_storage_module.week_completed(bits, date(2024, 1, 3), date(2024, 1, 8))
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,62 @@
+"""In this test module, the calendar_view_module is tested. It asserts whether the week, month and year grids show
+the sample progression, and whether every grid is made with one query on the Progression_table.
+"""
+import pytest
+
+from datetime import date
+
+import calendar_view_module
+import connection_manager_module
+
+
+def grid_rows(lines):
+    """This function returns the lines of the habits of a grid as a dictionary: {habit_name: cells}."""
+    return {line[:calendar_view_module.NAME_WIDTH].strip(): line[calendar_view_module.NAME_WIDTH + 1:]
+            for line in lines[3:]}
+
+
+def test_period_range():
+    """This test function asserts whether the first and last dates of a week, month and year are correct."""
+    assert calendar_view_module.period_range('week', date(2024, 5, 22)) == (date(2024, 5, 20), date(2024, 5, 26))
+    assert calendar_view_module.period_range('month', date(2024, 2, 10)) == (date(2024, 2, 1), date(2024, 2, 29))
+    assert calendar_view_module.period_range('year', date(2024, 5, 22)) == (date(2024, 1, 1), date(2024, 12, 31))
+    with pytest.raises(ValueError):
+        calendar_view_module.period_range('decade', date(2024, 5, 22))
+
+
+def test_week_and_month_grids(sample_database):
+    """This test function asserts whether the week and month grids show the sample progression of 'meditate': done
+    from the 1st up to and including the 24th of May 2024, and not done after that."""
+    week = grid_rows(calendar_view_module.calendar_lines('test_Habit_app_database.db', 'week', date(2024, 5, 22)))
+    assert len(week) == 5
+    assert week['meditate'].split() == ['X', 'X', 'X', 'X', 'X', '.', '.']
+
+    month = grid_rows(calendar_view_module.calendar_lines('test_Habit_app_database.db', 'month', date(2024, 5, 22),
+                                                          'meditate'))
+    assert list(month) == ['meditate']
+    assert month['meditate'].split() == ['X'] * 24 + ['.'] * 7
+    with pytest.raises(ValueError):
+        calendar_view_module.calendar_lines('test_Habit_app_database.db', 'month', date(2024, 5, 22), 'force choke')
+
+
+def test_year_grid_uses_one_query(sample_database):
+    """This test function asserts whether the year grid has a column per week, shows the weeks before the sample
+    data as empty, and is made with one query on the Progression_table."""
+    statements = []
+    dbconnection = connection_manager_module.get_connection('test_Habit_app_database.db')
+    dbconnection.set_trace_callback(statements.append)
+    try:
+        lines = calendar_view_module.calendar_lines('test_Habit_app_database.db', 'year', date(2024, 5, 22))
+    finally:
+        dbconnection.set_trace_callback(None)
+    assert len([statement for statement in statements if 'Progression_table' in statement]) == 1
+
+    year = grid_rows(lines)
+    # The 1st of January 2024 is a Monday, so the week of the 20th of May is the 21st column.
+    assert year['meditate'][20] == '*'
+    assert year['meditate'][:17].strip() == ''
+    assert year['practice force lightning'][20] == '#'
+
+
+if __name__ == '__main__':
+    pytest.main()
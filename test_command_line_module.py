@@ -0,0 +1,122 @@
+"""In this test module, the command_line_module is tested. It runs the commands like a script would, and asserts
+whether the printed JSON and the database are as expected.
+"""
+import json
+import pytest
+import sqlite3
+
+import command_line_module
+import connection_manager_module
+import insert_sample_data_module
+import main_habit_tracker_app
+
+
+def set_up_test_database():
+    """This function empties the test db and inserts the sample data."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    dbconnection.commit()
+    dbconnection.close()
+    main_habit_tracker_app.forget_database('test_Habit_app_database.db')
+
+    insert_sample_data_module.insert_sample_data_before_distribution_of_app('test_Habit_app_database.db',
+                                                                            'Habit_table', 'Date_table',
+                                                                            'Progression_table')
+
+
+def run(capsys, *arguments):
+    """This function runs the command line with the test db, and returns the exit code and the printed JSON."""
+    exit_code = command_line_module.main(['--database', 'test_Habit_app_database.db'] + list(arguments))
+    return exit_code, json.loads(capsys.readouterr().out)
+
+
+def test_add_list_and_delete_habit(capsys):
+    """This test function adds a habit, asserts whether it is listed, and deletes it again. Adding a habit with the
+    same name, or with an invalid name, should give an error."""
+    set_up_test_database()
+    exit_code, output = run(capsys, 'add', 'Read', '--description', 'a chapter a day', '--periodicity', 'daily')
+    assert exit_code == 0
+    assert output['added']['habit_name'] == 'read'
+
+    assert run(capsys, 'add', 'read', '--description', 'again', '--periodicity', 'daily')[0] == 1
+    assert run(capsys, 'add', 'read!', '--description', 'invalid', '--periodicity', 'daily')[0] == 1
+
+    exit_code, output = run(capsys, 'list', '--periodicity', 'daily')
+    assert 'read' in [habit['habit_name'] for habit in output['habits']]
+    assert all(habit['habit_periodicity'] == 'daily' for habit in output['habits'])
+
+    assert run(capsys, 'delete', 'read') == (0, {'deleted': 'read'})
+    assert run(capsys, 'delete', 'read')[0] == 1
+
+
+def test_mark_and_streaks(capsys, tmp_path):
+    """This test function marks 'meditate' as done on two dates from a file, and asserts whether the progression is
+    stored. A file with an unknown habit should store nothing at all, because every command is one transaction."""
+    set_up_test_database()
+    check_offs = tmp_path / 'check_offs.csv'
+    check_offs.write_text("# habit;date;completed\nmeditate;2024-06-01;1\nmeditate;2024-06-02\n", encoding='utf-8')
+    exit_code, output = run(capsys, 'mark', '--input', str(check_offs))
+    assert exit_code == 0
+    assert output == {'marked': 2, 'habits': ['meditate']}
+
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+    c.execute("SELECT date, completed FROM Progression_table WHERE habit_name = 'meditate' "
+              "AND date IN ('2024-06-01', '2024-06-02') ORDER BY date")
+    assert c.fetchall() == [('2024-06-01', 1), ('2024-06-02', 1)]
+
+    invalid_check_offs = tmp_path / 'invalid.csv'
+    invalid_check_offs.write_text("meditate;2024-06-03;1\nunknown habit;2024-06-03;1\n", encoding='utf-8')
+    exit_code, output = run(capsys, 'mark', '--input', str(invalid_check_offs))
+    assert exit_code == 1 and 'unknown habit' in output['error']
+    c.execute("SELECT completed FROM Progression_table WHERE habit_name = 'meditate' AND date = '2024-06-03'")
+    assert c.fetchone() in (None, (0,))
+
+    without_date = tmp_path / 'without_date.csv'
+    without_date.write_text("meditate;2024-06-03\nmeditate\n", encoding='utf-8')
+    exit_code, output = run(capsys, 'mark', '--input', str(without_date))
+    assert exit_code == 1 and output['error'].startswith("Line 2 has no date")
+
+    assert run(capsys, 'mark', 'meditate', '--date', '2024-06-02', '--not-done')[0] == 0
+    assert run(capsys, 'mark', 'meditate', '--date', '2999-01-01')[0] == 1
+
+    exit_code, output = run(capsys, 'streaks')
+    streaks = {streak['habit_name']: streak for streak in output['streaks']}
+    assert streaks['meditate']['longest_streak'] == 24
+
+
+def test_commands_per_user(capsys):
+    """This test function adds a habit for a new user with --user, and asserts whether the commands of that user only
+    see their own habits. Other commands for an unknown user should give an error."""
+    set_up_test_database()
+    exit_code, output = run(capsys, '--user', 'anakin', 'add', 'meditate', '--description', 'jedi code',
+                            '--periodicity', 'daily')
+    assert exit_code == 0
+
+    exit_code, output = run(capsys, '--user', 'anakin', 'list')
+    assert [habit['habit_name'] for habit in output['habits']] == ['meditate']
+    assert len(run(capsys, 'list')[1]['habits']) == 5
+    assert run(capsys, '--user', 'anakin', 'mark', 'meditate', '--date', '2024-06-01') == \
+        (0, {'marked': 1, 'habits': ['meditate']})
+
+    exit_code, output = run(capsys, '--user', 'anakin', 'streaks')
+    assert [streak['habit_name'] for streak in output['streaks']] == ['meditate']
+    assert run(capsys, '--user', 'padme', 'list')[0] == 1
+
+
+def test_damaged_database(capsys, tmp_path):
+    """This test function runs a command on a file that is not a database. It should print a JSON error and return
+    exit code 1 instead of raising the error."""
+    damaged_database = tmp_path / 'damaged.db'
+    damaged_database.write_text('this is not a database')
+    exit_code = command_line_module.main(['--database', str(damaged_database), 'list'])
+    assert exit_code == 1
+    assert 'error' in json.loads(capsys.readouterr().out)
+    connection_manager_module.close_connection(str(damaged_database))
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,64 @@
+"""In this test module, the connection_manager_module is tested. It asserts whether connections are reused, whether
+the database settings (PRAGMA's) are applied and whether the number of opened connections is reported correctly.
+"""
+import pytest
+import sqlite3
+
+import connection_manager_module
+
+
+def test_get_connection_reuses_connection():
+    """This test function requests a connection to the test db twice and asserts whether the same connection is
+    returned, and whether only one new connection has been opened."""
+    connection_manager_module.close_connection('test_Habit_app_database.db')
+    opened_before = connection_manager_module.connection_statistics()['connections_opened']
+
+    first_connection = connection_manager_module.get_connection('test_Habit_app_database.db')
+    second_connection = connection_manager_module.get_connection('test_Habit_app_database.db')
+
+    assert first_connection is second_connection
+    assert connection_manager_module.connection_statistics()['connections_opened'] == opened_before + 1
+
+
+def test_get_connection_applies_pragma_settings():
+    """This test function asserts whether the settings from PRAGMA_SETTINGS are applied to a new connection."""
+    connection_manager_module.close_connection('test_Habit_app_database.db')
+    connection = connection_manager_module.get_connection('test_Habit_app_database.db')
+
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert connection.execute("PRAGMA cache_size").fetchone()[0] == \
+        connection_manager_module.PRAGMA_SETTINGS['cache_size']
+    # A temp_store value of 2 stands for MEMORY.
+    assert connection.execute("PRAGMA temp_store").fetchone()[0] == 2
+
+
+def test_transaction_postpones_commits():
+    """This test function inserts rows in a transaction block, in which commit is called as well. A second connection
+    should only see the rows after the block. When an error occurs in a block, its rows should be rolled back."""
+    connection = connection_manager_module.get_connection('test_Habit_app_database.db')
+    connection.execute("CREATE TABLE IF NOT EXISTS Transaction_test_table (value INTEGER)")
+    connection.execute("DELETE FROM Transaction_test_table")
+    connection.commit()
+    other_connection = sqlite3.connect('test_Habit_app_database.db')
+
+    with connection_manager_module.transaction('test_Habit_app_database.db'):
+        connection.execute("INSERT INTO Transaction_test_table (value) VALUES (1)")
+        connection.commit()
+        with connection_manager_module.transaction('test_Habit_app_database.db'):
+            connection.execute("INSERT INTO Transaction_test_table (value) VALUES (2)")
+        assert other_connection.execute("SELECT COUNT(*) FROM Transaction_test_table").fetchone()[0] == 0
+    assert other_connection.execute("SELECT COUNT(*) FROM Transaction_test_table").fetchone()[0] == 2
+
+    with pytest.raises(ValueError):
+        with connection_manager_module.transaction('test_Habit_app_database.db'):
+            connection.execute("INSERT INTO Transaction_test_table (value) VALUES (3)")
+            raise ValueError("error in the block")
+    assert other_connection.execute("SELECT COUNT(*) FROM Transaction_test_table").fetchone()[0] == 2
+
+    connection.execute("DROP TABLE Transaction_test_table")
+    connection.commit()
+    other_connection.close()
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -10,13 +10,16 @@ import os
 import sqlite3
 import pytest
 
+import connection_manager_module
 import database_and_table_creation_module
 
 
 def test_check_and_create_database():
     """The test_db is first created, then removed, and then created again. Next, it is tested whether the inserted
-    database name exists."""
+    database name exists. The connection that the connection_manager_module keeps open is closed before removing
+    the file, because an open file cannot be removed on Windows."""
     database_and_table_creation_module.check_and_create_database('test_Habit_app_database.db')
+    connection_manager_module.close_connection('test_Habit_app_database.db')
     os.remove('test_Habit_app_database.db')
     database_and_table_creation_module.check_and_create_database('test_Habit_app_database.db')
     assert os.path.exists('test_Habit_app_database.db')
@@ -94,5 +97,144 @@ def test_create_progression_table():
     assert table is not None
 
 
+def test_failed_migration_is_raised():
+    """This test function lets the upgrade fail halfway (a table with the temporary name of the Habit_table already
+    exists), and asserts whether the error is raised and the database is left with the old layout."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    for table_name in c.fetchall():
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    c.execute("PRAGMA user_version = 0")
+    c.execute("CREATE TABLE Habit_table (habit_name TEXT, habit_description TEXT, habit_periodicity TEXT, "
+              "habit_creation_date TEXT)")
+    c.execute("CREATE TABLE Habit_table_old (habit_name TEXT)")
+    dbconnection.commit()
+    dbconnection.close()
+
+    with pytest.raises(sqlite3.Error):
+        database_and_table_creation_module.migrate_database('test_Habit_app_database.db', 'Habit_table',
+                                                            'Date_table', 'Progression_table')
+
+    conn = sqlite3.connect('test_Habit_app_database.db')
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'User_table'").fetchone() is None
+    conn.execute("DROP TABLE Habit_table_old")
+    conn.commit()
+    conn.close()
+
+
+def test_migrate_database():
+    """This test function creates tables with the original layout (without keys and indexes) and fills them with
+    duplicate rows. Then, the database is migrated, and the test asserts whether the duplicates are removed, the
+    check-off of the user is kept, the indexes exist and the version of the layout is stored in the database.
+    """
+    # First, it is made sure that the test_db is emptied for a fresh start.
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    c.execute("PRAGMA user_version = 0")
+
+    # Then, the tables are created with the original layout and duplicate rows are inserted.
+    c.execute("CREATE TABLE Habit_table (habit_name TEXT, habit_description TEXT, habit_periodicity TEXT, "
+              "habit_creation_date TEXT)")
+    c.execute("CREATE TABLE Date_table (Date TEXT)")
+    c.execute("CREATE TABLE Progression_table (date_plus_habit_name TEXT, habit_name TEXT, habit_periodicity TEXT, "
+              "date TEXT, completed INTEGER)")
+    c.executemany("INSERT INTO Habit_table VALUES (?, ?, ?, ?)",
+                  [('meditate', 'sith code', 'daily', '2024-05-01 14:51')] * 2)
+    c.executemany("INSERT INTO Date_table VALUES (?)", [('2024-05-01',), ('2024-05-01',), ('2024-05-02',)])
+    c.executemany("INSERT INTO Progression_table VALUES (?, ?, ?, ?, ?)",
+                  [('2024-05-01 - meditate', 'meditate', 'daily', '2024-05-01', 0),
+                   ('2024-05-01 - meditate', 'meditate', 'daily', '2024-05-01', 1)])
+    dbconnection.commit()
+    dbconnection.close()
+
+    database_and_table_creation_module.migrate_database('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                        'Progression_table')
+
+    # Assert whether the duplicates are gone, and the completed row has been kept.
+    conn = sqlite3.connect('test_Habit_app_database.db')
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Habit_table")
+    assert cursor.fetchone()[0] == 1
+    cursor.execute("SELECT COUNT(*) FROM Date_table")
+    assert cursor.fetchone()[0] == 2
+    cursor.execute("SELECT completed FROM Progression_table")
+    assert cursor.fetchall() == [(1,)]
+
+    # Assert whether the habits and progression belong to the default user.
+    cursor.execute("SELECT user_id, user_name FROM User_table")
+    assert cursor.fetchall() == [(database_and_table_creation_module.DEFAULT_USER_ID, 'default')]
+    cursor.execute("SELECT DISTINCT user_id FROM Habit_table UNION SELECT DISTINCT user_id FROM Progression_table")
+    assert cursor.fetchall() == [(database_and_table_creation_module.DEFAULT_USER_ID,)]
+
+    # Assert whether the indexes exist and the version is stored.
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name NOT LIKE 'sqlite_autoindex%'")
+    index_names = {row[0] for row in cursor.fetchall()}
+    assert 'Progression_table_habit_date_index' in index_names
+    assert 'Progression_table_date_habit_index' in index_names
+    cursor.execute("PRAGMA user_version")
+    assert cursor.fetchone()[0] == database_and_table_creation_module.SCHEMA_VERSION
+
+    # Inserting a duplicate habit is no longer possible for the same user, but it is for another user.
+    with pytest.raises(sqlite3.IntegrityError):
+        cursor.execute("INSERT INTO Habit_table (habit_name, habit_description, habit_periodicity, "
+                       "habit_creation_date) VALUES ('meditate', 'again', 'daily', '2024-05-01 14:52')")
+    cursor.execute("INSERT INTO Habit_table (habit_name, habit_description, habit_periodicity, habit_creation_date, "
+                   "user_id) VALUES ('meditate', 'again', 'daily', '2024-05-01 14:52', 2)")
+    conn.close()
+
+
+def test_migrate_sparse_database():
+    """This test function creates a database of version 2 in the sparse storage mode: a view on a Completion_table
+    without users. After migrating, the view should still show the completion, now for the default user, and new
+    completions should be stored through the view as before."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='view';")
+    for view_name in c.fetchall():
+        c.execute(f"DROP VIEW IF EXISTS {view_name[0]}")
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    for table_name in c.fetchall():
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    c.execute("PRAGMA user_version = 2")
+
+    c.execute("CREATE TABLE Habit_table (habit_name TEXT PRIMARY KEY, habit_description TEXT, habit_periodicity TEXT, "
+              "habit_creation_date TEXT)")
+    c.execute("CREATE TABLE Date_table (Date TEXT PRIMARY KEY)")
+    c.execute("CREATE TABLE Completion_table (habit_name TEXT, date TEXT, PRIMARY KEY (habit_name, date)) "
+              "WITHOUT ROWID")
+    c.execute("""CREATE VIEW Progression_table AS
+              SELECT d.Date || ' - ' || h.habit_name AS date_plus_habit_name, h.habit_name, h.habit_periodicity,
+                     d.Date AS date, CASE WHEN c.habit_name IS NULL THEN 0 ELSE 1 END AS completed
+              FROM Date_table AS d CROSS JOIN Habit_table AS h
+              LEFT JOIN Completion_table AS c ON c.habit_name = h.habit_name AND c.date = d.Date""")
+    c.execute("INSERT INTO Habit_table VALUES ('meditate', 'sith code', 'daily', '2024-05-01 14:51')")
+    c.executemany("INSERT INTO Date_table VALUES (?)", [('2024-05-01',), ('2024-05-02',)])
+    c.execute("INSERT INTO Completion_table VALUES ('meditate', '2024-05-02')")
+    dbconnection.commit()
+    dbconnection.close()
+
+    database_and_table_creation_module.migrate_database('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                        'Progression_table')
+
+    conn = sqlite3.connect('test_Habit_app_database.db')
+    cursor = conn.cursor()
+    assert database_and_table_creation_module.table_type('test_Habit_app_database.db', 'Progression_table') == 'view'
+    cursor.execute("SELECT date, completed, user_id FROM Progression_table ORDER BY date")
+    assert cursor.fetchall() == [('2024-05-01', 0, 1), ('2024-05-02', 1, 1)]
+    cursor.execute("UPDATE Progression_table SET completed = 1 WHERE user_id = 1 AND date = '2024-05-01'")
+    conn.commit()
+    cursor.execute("SELECT habit_name, date, user_id FROM Completion_table ORDER BY date")
+    assert cursor.fetchall() == [('meditate', '2024-05-01', 1), ('meditate', '2024-05-02', 1)]
+    cursor.execute("DROP VIEW Progression_table")
+    conn.commit()
+    conn.close()
+
+
 if __name__ == '__main__':
     pytest.main()
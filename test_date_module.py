@@ -71,5 +71,29 @@ def test_update_dates():
     c.close()
 
 
+def test_update_dates_fills_gap():
+    """This test function removes the most recent dates from the Date_table and the stored most recent date from the
+    Metadata_table, as if the application has not been opened for a while. The update_dates function should insert
+    the missing dates again, and store 'the current date' in the Metadata_table. A second call should not change
+    anything."""
+    date_module.Date.update_dates('test_Habit_app_database.db', 'Date_table')
+    dbconnection = sqlite3.connect('test_Habit_app_database.db')
+    c = dbconnection.cursor()
+    c.execute("SELECT COUNT(*) FROM Date_table")
+    number_of_dates = c.fetchone()[0]
+    c.execute("DELETE FROM Date_table WHERE Date > '2024-06-01'")
+    c.execute("DELETE FROM Metadata_table WHERE key = ?", (date_module.DATE_WATERMARK_KEY,))
+    dbconnection.commit()
+
+    date_module.Date.update_dates('test_Habit_app_database.db', 'Date_table')
+    date_module.Date.update_dates('test_Habit_app_database.db', 'Date_table')
+
+    c.execute("SELECT COUNT(*), MAX(Date) FROM Date_table")
+    assert c.fetchone() == (number_of_dates, date.today().isoformat())
+    c.execute("SELECT value FROM Metadata_table WHERE key = ?", (date_module.DATE_WATERMARK_KEY,))
+    assert c.fetchone()[0] == date.today().isoformat()
+    dbconnection.close()
+
+
 if __name__ == '__main__':
     pytest.main()
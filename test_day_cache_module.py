@@ -0,0 +1,57 @@
+"""In this test module, the day_cache_module is tested. It asserts whether a window of days is read with one query,
+whether the cache stays within its size, and whether updates are applied in place. It also tests the 'jump to date'
+command of the progression menu.
+"""
+import pytest
+
+from datetime import date, timedelta
+from unittest import mock
+
+import day_cache_module
+import update_progression_module
+
+
+def test_window_is_read_once(sample_database):
+    """This test function steps through six days of the sample data and asserts whether the days are the same as
+    those of read_day_progression, while only one query was needed."""
+    day_cache = day_cache_module.DayCache('test_Habit_app_database.db', window_days=7, max_days=30)
+    for offset in range(-3, 3):
+        day = (date(2024, 5, 15) + timedelta(days=offset)).isoformat()
+        assert day_cache.day(day) == update_progression_module.read_day_progression('test_Habit_app_database.db', day)
+    assert day_cache.queries == 1
+    assert day_cache.day('2024-04-20') == []
+    assert day_cache.queries == 2
+
+
+def test_bounded_size_and_update_in_place(sample_database):
+    """This test function asserts whether the least recently used days are removed when the cache is full, and
+    whether an update changes the cached day without a new query."""
+    day_cache = day_cache_module.DayCache('test_Habit_app_database.db', window_days=2, max_days=8)
+    for day in ('2024-05-03', '2024-05-10', '2024-05-20'):
+        day_cache.day(day)
+    assert len(day_cache.days) == 8
+    assert '2024-05-20' in day_cache.days and '2024-05-03' not in day_cache.days
+
+    day_cache.update('2024-05-20', 'meditate', 0)
+    assert ('2024-05-20', 'meditate', 0) in day_cache.day('2024-05-20')
+    assert day_cache.queries == 3
+    with pytest.raises(ValueError):
+        day_cache_module.DayCache('test_Habit_app_database.db', window_days=10, max_days=5)
+
+
+def test_jump_to_date(sample_database, capsys):
+    """This test function jumps to a date in the progression menu, updates a habit on that date and asserts whether
+    the update is stored. Invalid dates should give an error message."""
+    with mock.patch('builtins.input', side_effect=['4', '2024-05-20', '3', 'meditate', '0', '4', '2023-01-01', '4',
+                                                   'yesterday', 'm']):
+        update_progression_module.update_function('test_Habit_app_database.db')
+    output = capsys.readouterr().out
+    assert "Monday, 20 May 2024" in output
+    assert "The date must be between 01-05-2024 and today." in output
+    assert "Invalid date. Please use the format YYYY-MM-DD." in output
+    assert ('2024-05-20', 'meditate', 0) in update_progression_module.read_day_progression(
+        'test_Habit_app_database.db', '2024-05-20')
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,81 @@
+"""In this test module, the export_module is tested. It asserts whether the habits and the progression are exported
+to compressed CSV and JSON Lines files, whether the filters work, and whether an export can be imported again.
+"""
+import csv
+import gzip
+import json
+import pytest
+import sqlite3
+
+import connection_manager_module
+import export_module
+import insert_sample_data_module
+import progression_import_module
+
+
+def set_up_test_database():
+    """This function empties the test db and inserts the sample data."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    dbconnection.commit()
+    dbconnection.close()
+
+    insert_sample_data_module.insert_sample_data_before_distribution_of_app('test_Habit_app_database.db',
+                                                                            'Habit_table', 'Date_table',
+                                                                            'Progression_table')
+
+
+def test_export_progression_csv(tmp_path):
+    """This test function exports the sample progression as compressed CSV, in small batches, and asserts whether
+    all 180 rows are in the file. Then, the file is imported into an empty Progression_table, which should give the
+    same rows."""
+    set_up_test_database()
+    output_path = str(tmp_path / 'progression.csv.gz')
+    assert export_module.export_table('test_Habit_app_database.db', 'progression', output_path, batch_size=7) == 180
+
+    with gzip.open(output_path, 'rt', encoding='utf-8', newline='') as export_file:
+        rows = list(csv.reader(export_file, delimiter=';'))
+    assert rows[0] == export_module.EXPORT_COLUMNS['progression']
+    assert len(rows) == 181
+
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+    c.execute("SELECT * FROM Progression_table ORDER BY date, habit_name")
+    original_rows = c.fetchall()
+    c.execute("DELETE FROM Progression_table")
+    c.connection.commit()
+
+    with gzip.open(output_path, 'rt', encoding='utf-8', newline='') as export_file:
+        uncompressed_path = tmp_path / 'progression.csv'
+        uncompressed_path.write_text(export_file.read(), encoding='utf-8')
+    progression_import_module.import_progression_csv('test_Habit_app_database.db', str(uncompressed_path))
+    c.execute("SELECT * FROM Progression_table ORDER BY date, habit_name")
+    assert c.fetchall() == original_rows
+
+
+def test_export_with_filters(tmp_path):
+    """This test function exports the progression of 'meditate' in May 2024 as JSON Lines, and the weekly habits."""
+    set_up_test_database()
+    output_path = str(tmp_path / 'meditate.jsonl.gz')
+    assert export_module.export_table('test_Habit_app_database.db', 'progression', output_path, 'jsonl',
+                                      first_date='2024-05-10', last_date='2024-05-19', habit_name='meditate') == 10
+
+    with gzip.open(output_path, 'rt', encoding='utf-8') as export_file:
+        rows = [json.loads(line) for line in export_file]
+    assert {row['habit_name'] for row in rows} == {'meditate'}
+    assert rows[0]['date'] == '2024-05-10' and rows[-1]['date'] == '2024-05-19'
+
+    output_path = str(tmp_path / 'weekly.jsonl')
+    number_of_rows = export_module.export_table('test_Habit_app_database.db', 'habits', output_path, 'jsonl',
+                                                periodicity='weekly', compress=False)
+    with open(output_path, encoding='utf-8') as export_file:
+        habits = [json.loads(line) for line in export_file]
+    assert number_of_rows == len(habits) > 0
+    assert all(habit['habit_periodicity'] == 'weekly' for habit in habits)
+
+
+if __name__ == '__main__':
+    pytest.main()
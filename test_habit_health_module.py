@@ -0,0 +1,102 @@
+"""In this test module, the habit_health_module is tested. It asserts whether the completion rates and health scores
+that are kept up-to-date incrementally (after check-offs and new days) are the same as the ones of the full
+calculation.
+"""
+import pytest
+
+from datetime import date, timedelta
+
+import connection_manager_module
+import habit_health_module
+import progression_module
+import update_progression_module
+import write_buffer_module
+
+
+def test_rates_of_sample_data(sample_database):
+    """This test function asserts the rates and the health score of 'meditate', which was completed every day from
+    2024-05-01 up to and including 2024-05-24, on the last of those days and a week later."""
+    health = habit_health_module.read_health('test_Habit_app_database.db', date(2024, 5, 24), 'meditate')
+    assert health['meditate']['rate_7'] == health['meditate']['rate_30'] == 100
+    assert health['meditate']['health'] == pytest.approx(100)
+
+    health = habit_health_module.read_health('test_Habit_app_database.db', date(2024, 5, 31), 'meditate')
+    assert health['meditate']['rate_7'] == 0
+    assert health['meditate']['rate_30'] == pytest.approx(100 * 23 / 30)
+    assert 0 < health['meditate']['health'] < 100
+
+
+def test_incremental_values_equal_full_calculation(sample_database):
+    """This test function rolls the values of all habits forward day by day through May 2024, with check-offs
+    (directly and through the write buffer) on the way, and asserts whether they are the same as the full
+    calculation."""
+    day = date(2024, 5, 1)
+    habit_health_module.read_health('test_Habit_app_database.db', day)
+
+    write_buffer = write_buffer_module.ProgressionWriteBuffer('test_Habit_app_database.db', max_size=10)
+    while day < date(2024, 5, 31):
+        day += timedelta(days=1)
+        habit_health_module.read_health('test_Habit_app_database.db', day)
+        update_progression_module.save_habit_progression('test_Habit_app_database.db', 'wash robes',
+                                                         day.isoformat(), day.day % 3 == 0)
+        write_buffer.add('meditate', (day - timedelta(days=day.day % 5)).isoformat(), day.day % 2)
+        assert habit_health_module.verify_health('test_Habit_app_database.db', day) == {}
+    write_buffer.flush()
+    assert habit_health_module.verify_health('test_Habit_app_database.db', day) == {}
+
+
+def test_update_after_stored_date_is_counted_by_roll_over(sample_database):
+    """This test function asserts whether a check-off after the date of the stored values is not counted twice: it
+    is ignored by update_habit_health and counted once when the values are rolled over."""
+    habit_health_module.read_health('test_Habit_app_database.db', date(2024, 5, 24), 'meditate')
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2024-05-26', 1)
+    health = habit_health_module.read_health('test_Habit_app_database.db', date(2024, 5, 26), 'meditate')
+
+    assert health['meditate']['rate_7'] == pytest.approx(100 * 6 / 7)
+    assert habit_health_module.verify_health('test_Habit_app_database.db', date(2024, 5, 26)) == {}
+
+
+def test_daily_rollover_of_all_habits(sample_database):
+    """This test function stores the values of all habits on 2024-05-24, and asserts whether the daily rollover of
+    combine_habits_dates moves them forward to today with one query for all habits, whatever the number of days, and
+    whether the habits are in the order of the Habit_table."""
+    habit_health_module.read_health('test_Habit_app_database.db', date(2024, 5, 24))
+    dbconnection = connection_manager_module.get_connection('test_Habit_app_database.db')
+    dbconnection.execute("UPDATE Metadata_table SET value = '2024-05-24' WHERE key = ?",
+                         (progression_module.WATERMARK_DATE_KEY,))
+    dbconnection.commit()
+
+    statements = []
+    dbconnection.set_trace_callback(statements.append)
+    try:
+        progression_module.Progression.combine_habits_dates('test_Habit_app_database.db', 'Habit_table',
+                                                            'Date_table', 'Progression_table')
+    finally:
+        dbconnection.set_trace_callback(None)
+    assert len([statement for statement in statements
+                if 'Health_table' in statement and 'Progression_table' in statement]) == 1
+
+    c = dbconnection.cursor()
+    c.execute("SELECT DISTINCT as_of FROM Health_table")
+    assert c.fetchall() == [(date.today().isoformat(),)]
+    assert habit_health_module.verify_health('test_Habit_app_database.db') == {}
+
+    c.execute("SELECT habit_name FROM Habit_table ORDER BY rowid")
+    assert list(habit_health_module.read_health('test_Habit_app_database.db')) == [row[0] for row in c.fetchall()]
+
+
+def test_invalidated_values_are_built_again(sample_database):
+    """This test function asserts whether invalidate_health removes the stored values of a habit, and whether they
+    are built again by read_health."""
+    habit_health_module.read_health('test_Habit_app_database.db', date(2024, 5, 24))
+    habit_health_module.invalidate_health('test_Habit_app_database.db', habit_name='meditate')
+
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+    c.execute("SELECT habit_name FROM Health_table WHERE habit_name = 'meditate'")
+    assert c.fetchall() == []
+    assert habit_health_module.read_health('test_Habit_app_database.db', date(2024, 5, 24), 'meditate')[
+        'meditate']['rate_7'] == 100
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,79 @@
+"""In this test module, the habit_registry_module is tested. It asserts whether habit names are looked up without
+querying the Habit_table again, and whether the registry is read again after the habits have been changed by the
+application or by another connection.
+"""
+import pytest
+import sqlite3
+
+import connection_manager_module
+import habit_module
+import habit_registry_module
+import insert_sample_data_module
+
+
+def set_up_test_database():
+    """This function empties the test db and inserts the sample data."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    dbconnection.commit()
+    dbconnection.close()
+
+    insert_sample_data_module.insert_sample_data_before_distribution_of_app('test_Habit_app_database.db',
+                                                                            'Habit_table', 'Date_table',
+                                                                            'Progression_table')
+
+
+def test_lookups_use_the_registry():
+    """This test function asserts whether the Habit_table is queried once for many lookups."""
+    set_up_test_database()
+    statements = []
+    dbconnection = connection_manager_module.get_connection('test_Habit_app_database.db')
+    dbconnection.set_trace_callback(statements.append)
+    try:
+        for attempt in range(100):
+            assert habit_module.Habit.habit_exists('test_Habit_app_database.db', 'meditate')
+            assert not habit_module.Habit.habit_exists('test_Habit_app_database.db', 'force choke')
+    finally:
+        dbconnection.set_trace_callback(None)
+    assert len([statement for statement in statements if 'Habit_table' in statement]) == 1
+    assert habit_registry_module.habit_periodicities('test_Habit_app_database.db')['wash robes'] == 'weekly'
+
+
+def test_registry_is_invalidated():
+    """This test function adds and removes a habit through the habit_module, and changes a habit with another
+    connection, and asserts whether the registry follows every change."""
+    set_up_test_database()
+    assert not habit_registry_module.habit_exists('test_Habit_app_database.db', 'force push')
+    habit_module.Habit('force push', 'jedi training', 'daily', '2024-06-01 10:00').insert_into_database(
+        'test_Habit_app_database.db')
+    assert habit_registry_module.habit_exists('test_Habit_app_database.db', 'force push')
+    habit_module.Habit.remove_from_database('test_Habit_app_database.db', 'force push')
+    assert not habit_registry_module.habit_exists('test_Habit_app_database.db', 'force push')
+
+    other_connection = sqlite3.connect('test_Habit_app_database.db')
+    other_connection.execute("UPDATE Habit_table SET habit_periodicity = 'weekly' WHERE habit_name = 'meditate'")
+    other_connection.commit()
+    other_connection.close()
+    assert habit_registry_module.habit_periodicities('test_Habit_app_database.db')['meditate'] == 'weekly'
+
+
+def test_registry_belongs_to_the_connection():
+    """This test function asserts whether a new connection (after the old one was closed) does not use the registry
+    of the old connection, also though the data_version of a new connection starts again."""
+    set_up_test_database()
+    assert habit_registry_module.habit_exists('test_Habit_app_database.db', 'meditate')
+    connection_manager_module.close_connection('test_Habit_app_database.db')
+
+    other_connection = sqlite3.connect('test_Habit_app_database.db')
+    other_connection.execute("DELETE FROM Habit_table WHERE habit_name = 'meditate'")
+    other_connection.commit()
+    other_connection.close()
+    assert not habit_registry_module.habit_exists('test_Habit_app_database.db', 'meditate')
+
+
+if __name__ == '__main__':
+    pytest.main()
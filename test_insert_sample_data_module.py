@@ -33,24 +33,25 @@ def test_insert_sample_data_before_distribution_of_app():
     conn = sqlite3.connect('test_Habit_app_database.db')
     cursor = conn.cursor()
 
-    # 1. Assert that the database contains the three expected tables.
+    # 1. Assert that the database contains the three expected tables, and the Metadata_table of update_dates.
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
     tables = cursor.fetchall()
     table_names = [table[0] for table in tables]
     assert 'Habit_table' in table_names
     assert 'Date_table' in table_names
     assert 'Progression_table' in table_names
-    assert len(table_names) == 3
+    assert 'Metadata_table' in table_names
+    assert len(table_names) == 4
 
-    # 2. Assert that the Habit_table has 4 columns.
+    # 2. Assert that the Habit_table has 5 columns (including the user_id).
     cursor.execute("SELECT * FROM Habit_table LIMIT 1;")
     habit_table_column_count = len(cursor.description)
-    assert habit_table_column_count == 4
+    assert habit_table_column_count == 5
 
-    # 3. Assert that the Progression_table has 5 columns.
+    # 3. Assert that the Progression_table has 6 columns (including the user_id).
     cursor.execute("SELECT * FROM Progression_table LIMIT 1;")
     progression_table_column_count = len(cursor.description)
-    assert progression_table_column_count == 5
+    assert progression_table_column_count == 6
 
     # 4. Assert that Habit_table has 5 rows.
     cursor.execute("SELECT COUNT(*) FROM Habit_table;")
@@ -94,6 +94,29 @@ def test_calling_calculate_and_print_longest_streaks_ever(mock_calculate_and_pri
     stored_print = capsys.readouterr()
 
 
+@patch('builtins.input', side_effect=['3', '5', 'm', '2024-05-20', 'meditate', 'q'])
+@patch('calendar_view_module.print_calendar')
+def test_calling_print_calendar(mock_print_calendar, mock_input, capsys):
+    """This function asserts whether the expected functions are called when mocking certain input. """
+    with pytest.raises(SystemExit):
+        main_habit_tracker_app.main_menu()
+
+    mock_print_calendar.assert_called_with('Habit_app_database.db', 'month', datetime.date(2024, 5, 20), 'meditate',
+                                           1)
+    stored_print = capsys.readouterr()
+
+
+@patch('builtins.input', side_effect=['3', '6', 'q'])
+@patch('habit_health_module.print_health')
+def test_calling_print_health(mock_print_health, mock_input, capsys):
+    """This function asserts whether the expected functions are called when mocking certain input. """
+    with pytest.raises(SystemExit):
+        main_habit_tracker_app.main_menu()
+
+    mock_print_health.assert_called_with('Habit_app_database.db', user_id=1)
+    stored_print = capsys.readouterr()
+
+
 @patch('builtins.input', side_effect=['4', 'q'])
 @patch('update_progression_module.update_function')
 def test_calling_update_function(mock_update_function, mock_input, capsys):
@@ -154,9 +177,35 @@ def test_menu_invalid_input(capsys):
     stored_print = capsys.readouterr()
     assert "This is the main menu of the Habit Tracker app." in stored_print.out
     assert "Invalid input, please type '1', '2', '3', '4' or 'q'. " in stored_print.out
-    assert "Invalid input, please type '1', '2', '3', '4' or 'm'." in stored_print.out
+    assert "Invalid input, please type '1', '2', '3', '4', '5', '6' or 'm'." in stored_print.out
     assert "Invalid input, reset aborted." in stored_print.out
 
 
+def test_bootstrap():
+    """This function empties the test db and asserts whether the bootstrap creates all tables in the current layout,
+    and fills the Date_table up to 'the current date'. Importing the main module itself should not have created
+    anything in the test db."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db')
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    for table_name in c.fetchall():
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    c.execute("PRAGMA user_version = 0")
+    dbconnection.commit()
+
+    main_habit_tracker_app.forget_database('test_Habit_app_database.db')
+    main_habit_tracker_app.bootstrap('test_Habit_app_database.db')
+    main_habit_tracker_app.bootstrap('test_Habit_app_database.db')
+
+    c.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;")
+    assert [row[0] for row in c.fetchall()] == ['Date_table', 'Habit_table', 'Metadata_table', 'Progression_table',
+                                                'User_table']
+    c.execute("PRAGMA user_version")
+    assert c.fetchone()[0] == main_habit_tracker_app.database_and_table_creation_module.SCHEMA_VERSION
+    c.execute("SELECT MIN(Date), MAX(Date) FROM Date_table")
+    assert c.fetchone() == ('2024-05-01', datetime.date.today().isoformat())
+    dbconnection.close()
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -0,0 +1,54 @@
+"""In this test module, the profiling_module is tested. It asserts whether a profiled action writes its CPU profile
+and memory summary, and whether actions are not profiled when the profiling mode is disabled.
+"""
+import os
+import pstats
+import pytest
+from unittest import mock
+
+import profiling_module
+
+
+def allocate_habits(number_of_habits):
+    """This function is the 'action' that is profiled in the tests. It allocates a list of habit names."""
+    return [f"habit {number}" for number in range(number_of_habits)]
+
+
+def test_run_action_writes_profile(tmp_path, capsys):
+    """This test function profiles an action and asserts whether the pstats file can be read, and whether the
+    summary contains the duration, the peak memory and the profiled function."""
+    profiling_module.enable_profiling(str(tmp_path), top=5)
+    try:
+        habits = profiling_module.run_action('allocate_habits', allocate_habits, 1000)
+    finally:
+        profiling_module.disable_profiling()
+
+    assert len(habits) == 1000
+    pstats_files = [name for name in os.listdir(tmp_path) if name.endswith('.pstats')]
+    summary_files = [name for name in os.listdir(tmp_path) if name.endswith('.txt')]
+    assert len(pstats_files) == 1 and pstats_files[0].startswith('allocate_habits_')
+    assert len(summary_files) == 1
+
+    stats = pstats.Stats(str(tmp_path / pstats_files[0]))
+    assert any(function_name == 'allocate_habits' for file_name, line, function_name in stats.stats)
+
+    with open(tmp_path / summary_files[0]) as summary_file:
+        summary = summary_file.read()
+    assert "Action: allocate_habits" in summary
+    assert "Peak memory:" in summary
+    assert "Top 5 memory allocations (by line):" in summary
+    assert "[profile] allocate_habits:" in capsys.readouterr().out
+
+
+def test_run_action_without_profiling(tmp_path):
+    """This test function asserts whether an action only gets called, without writing files, when the profiling mode
+    is disabled. The environment variable enables the profiling mode as well."""
+    with mock.patch.dict(os.environ, {profiling_module.PROFILE_ENVIRONMENT_VARIABLE: '0'}):
+        assert not profiling_module.profiling_enabled()
+        assert profiling_module.run_action('allocate_habits', allocate_habits, 3) == ['habit 0', 'habit 1', 'habit 2']
+    with mock.patch.dict(os.environ, {profiling_module.PROFILE_ENVIRONMENT_VARIABLE: '1'}):
+        assert profiling_module.profiling_enabled()
+
+
+if __name__ == '__main__':
+    pytest.main()
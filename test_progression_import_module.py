@@ -0,0 +1,136 @@
+"""In this test module, the progression_import_module is tested. It asserts whether a CSV-file is imported in chunks,
+whether existing rows are skipped or updated, and whether invalid files are refused.
+"""
+import pytest
+import sqlite3
+
+import connection_manager_module
+import database_and_table_creation_module
+import progression_import_module
+import sparse_storage_module
+
+
+def set_up_test_database():
+    """This function empties the test db and creates an empty Progression_table."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    dbconnection.commit()
+    dbconnection.close()
+    database_and_table_creation_module.create_progression_table('Progression_table', 'test_Habit_app_database.db')
+
+
+def write_csv(path, lines):
+    """This function writes a CSV-file in the layout of Sample_data.csv with the given progression lines."""
+    path.write_text("\n".join(["date_plus_habit_name;habit_name;habit_periodicity;date;completed"] + lines) + "\n",
+                    encoding='utf-8')
+    return str(path)
+
+
+def test_import_sample_data_in_chunks():
+    """This test function imports Sample_data.csv in chunks of 7 rows, and asserts whether all 180 rows are in the
+    Progression_table. A second import should skip all rows."""
+    set_up_test_database()
+    result = progression_import_module.import_progression_csv('test_Habit_app_database.db', 'Sample_data.csv',
+                                                              chunk_size=7)
+    assert result['rows_read'] == 180
+    assert result['rows_changed'] == 180
+    assert result['rows_per_second'] > 0
+
+    result = progression_import_module.import_progression_csv('test_Habit_app_database.db', 'Sample_data.csv')
+    assert result['rows_changed'] == 0
+
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+    c.execute("SELECT COUNT(*), SUM(completed) FROM Progression_table")
+    assert c.fetchone() == (180, 91)
+
+
+def test_import_skip_or_update(tmp_path):
+    """This test function imports a row, and then imports a file with the same row completed. With 'skip' the row
+    stays not completed, with 'update' it becomes completed."""
+    set_up_test_database()
+    progression_import_module.import_progression_csv(
+        'test_Habit_app_database.db', write_csv(tmp_path / 'first.csv', ["2024-06-01 - run;run;daily;2024-06-01;0"]))
+    changed_file = write_csv(tmp_path / 'changed.csv', ["2024-06-01 - run;run;daily;2024-06-01;1",
+                                                         "2024-06-02 - run;run;daily;2024-06-02;1"])
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+
+    progression_import_module.import_progression_csv('test_Habit_app_database.db', changed_file, on_conflict='skip')
+    c.execute("SELECT date, completed FROM Progression_table ORDER BY date")
+    assert c.fetchall() == [('2024-06-01', 0), ('2024-06-02', 1)]
+
+    progression_import_module.import_progression_csv('test_Habit_app_database.db', changed_file,
+                                                     on_conflict='update')
+    c.execute("SELECT date, completed FROM Progression_table ORDER BY date")
+    assert c.fetchall() == [('2024-06-01', 1), ('2024-06-02', 1)]
+
+
+def test_import_invalid_file(tmp_path):
+    """This test function asserts whether a file with a missing column, or with an invalid value for 'completed',
+    and a chunk size below 1 raise a ValueError."""
+    set_up_test_database()
+    missing_column = tmp_path / 'missing.csv'
+    missing_column.write_text("habit_name;date;completed\nrun;2024-06-01;1\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="misses the column"):
+        progression_import_module.import_progression_csv('test_Habit_app_database.db', str(missing_column))
+
+    with pytest.raises(ValueError, match="line 2"):
+        progression_import_module.import_progression_csv(
+            'test_Habit_app_database.db', write_csv(tmp_path / 'invalid.csv',
+                                                    ["2024-06-01 - run;run;daily;2024-06-01;yes"]))
+
+    for chunk_size in (0, -1):
+        with pytest.raises(ValueError, match="chunk_size must be at least 1"):
+            progression_import_module.import_progression_csv('test_Habit_app_database.db', 'Sample_data.csv',
+                                                             chunk_size=chunk_size)
+
+
+def test_invalid_row_removes_stored_values(tmp_path):
+    """This test function imports a file with an invalid fifth row in chunks of 2 rows. The first chunks are
+    imported, so the stored values of the user (here a rollup) must be removed, also though the import failed."""
+    set_up_test_database()
+    database_and_table_creation_module.create_rollup_table('Rollup_table', 'test_Habit_app_database.db')
+    dbconnection = connection_manager_module.get_connection('test_Habit_app_database.db')
+    dbconnection.execute("INSERT INTO Rollup_table (habit_name, period, period_start, completed_days) "
+                         "VALUES ('run', 'year', '2024-01-01', 0)")
+    dbconnection.commit()
+
+    lines = [f"2024-06-0{day} - run;run;daily;2024-06-0{day};1" for day in range(1, 5)] + \
+        ["2024-06-05 - run;run;daily;2024-06-05;yes"]
+    with pytest.raises(ValueError, match="line 6"):
+        progression_import_module.import_progression_csv('test_Habit_app_database.db',
+                                                         write_csv(tmp_path / 'invalid.csv', lines), chunk_size=2)
+
+    c = dbconnection.cursor()
+    c.execute("SELECT SUM(completed) FROM Progression_table")
+    assert c.fetchone()[0] == 4
+    c.execute("SELECT COUNT(*) FROM Rollup_table")
+    assert c.fetchone()[0] == 0
+
+
+def test_skip_is_refused_in_sparse_mode(tmp_path):
+    """This test function asserts whether 'skip' raises a ValueError when the Progression_table is the view of the
+    sparse storage mode, and whether 'update' still works."""
+    set_up_test_database()
+    database_and_table_creation_module.create_habit_table('Habit_table', 'test_Habit_app_database.db')
+    database_and_table_creation_module.create_date_table('Date_table', 'test_Habit_app_database.db')
+    sparse_storage_module.enable_sparse_storage('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                'Progression_table')
+    csv_path = write_csv(tmp_path / 'run.csv', ["2024-06-01 - run;run;daily;2024-06-01;1"])
+
+    try:
+        with pytest.raises(ValueError, match="sparse storage mode"):
+            progression_import_module.import_progression_csv('test_Habit_app_database.db', csv_path)
+        assert progression_import_module.import_progression_csv('test_Habit_app_database.db', csv_path,
+                                                                on_conflict='update')['rows_read'] == 1
+    finally:
+        # The other test modules only drop tables, so the view is replaced by a table again.
+        sparse_storage_module.disable_sparse_storage('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                     'Progression_table')
+
+
+if __name__ == '__main__':
+    pytest.main()
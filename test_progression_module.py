@@ -6,10 +6,16 @@ Next, the to be tested combine_habits_dates function is called. The parameters a
 
 Next, the actual assertion tests whether the Progression_table in test_db (with hard-inserted sample data) and the
 Progression_table in test_db2 (with data generated through the tested function) are, in fact, equal.
+
+The second test function asserts whether the watermark of combine_habits_dates works: calling the function again
+should not generate any rows, while a newly added habit should still get a row for every date.
 """
 import pytest
 import sqlite3
 
+from unittest import mock
+
+import habit_module
 import progression_module
 import insert_sample_data_module
 
@@ -97,5 +103,56 @@ def test_combine_habits_dates():
     assert data1_sorted == data2_sorted
 
 
+def test_combine_habits_dates_watermark():
+    """This test function asserts whether combine_habits_dates only generates the missing rows. First, the
+    Progression_table is generated for the sample habits. Calling the function a second time should not add any rows.
+    Then, the most recently added habit is deleted and a new habit is added. Because SQLite re-uses the rowid of the
+    deleted habit, this checks whether the watermark is correctly lowered by the delete_habit function.
+    """
+    # First, it is made sure that the test_db is emptied for a fresh start.
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    dbconnection.commit()
+    dbconnection.close()
+
+    # Insert the sample habits and generate the Progression_table twice. The number of rows should be equal to the
+    # number of habits times the number of dates, also after the second call.
+    insert_sample_data_module.insert_sample_habit_data_and_dates('test_Habit_app_database.db', 'Habit_table',
+                                                                 'Date_table', 'Progression_table')
+    progression_module.Progression.combine_habits_dates('test_Habit_app_database.db', 'Habit_table',
+                                                        'Date_table', 'Progression_table')
+    progression_module.Progression.combine_habits_dates('test_Habit_app_database.db', 'Habit_table',
+                                                        'Date_table', 'Progression_table')
+
+    conn = sqlite3.connect('test_Habit_app_database.db')
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Date_table")
+    number_of_dates = cursor.fetchone()[0]
+    cursor.execute("SELECT COUNT(*) FROM Progression_table")
+    assert cursor.fetchone()[0] == 5 * number_of_dates
+    conn.close()
+
+    # Delete the last sample habit and add a new habit, which gets the same rowid as the deleted habit.
+    with mock.patch('builtins.input', side_effect=['wash robes']):
+        habit_module.Habit.delete_habit('test_Habit_app_database.db')
+    with mock.patch('builtins.input', side_effect=['polish helmet', 'shiny', '0']):
+        habit_module.Habit.add_habit('test_Habit_app_database.db')
+    progression_module.Progression.combine_habits_dates('test_Habit_app_database.db', 'Habit_table',
+                                                        'Date_table', 'Progression_table')
+
+    # The new habit should have a row for every date, and the deleted habit should have no rows anymore.
+    conn = sqlite3.connect('test_Habit_app_database.db')
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Progression_table WHERE habit_name = 'polish helmet'")
+    assert cursor.fetchone()[0] == number_of_dates
+    cursor.execute("SELECT COUNT(*) FROM Progression_table WHERE habit_name = 'wash robes'")
+    assert cursor.fetchone()[0] == 0
+    conn.close()
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -0,0 +1,106 @@
+"""In this test module, the rollup_storage_module is tested. It asserts whether the week, month and year counts are
+the same as the counts of the Progression_table, and whether the weekly streaks from the rollups are the same as the
+ones of the analysis modules, also after the user updated their progression.
+"""
+import pytest
+
+from datetime import date, datetime
+
+import analysis_current_streak_per_habit
+import analysis_longest_streak_ever
+import connection_manager_module
+import rollup_storage_module
+import streak_engine_module
+import update_progression_module
+import write_buffer_module
+
+
+def stored_rollups():
+    """This function returns all rows of the Rollup_table, ordered, so that two states can be compared."""
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+    c.execute("""SELECT habit_name, period, period_start, completed_days, any_completed FROM Rollup_table
+              ORDER BY habit_name, period, period_start""")
+    return c.fetchall()
+
+
+def test_rollups_equal_progression_counts(sample_database):
+    """This test function asserts whether the month and year counts are the counts of the Progression_table, and
+    whether any_completed is set for the periods with at least one completed day."""
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+
+    c.execute("""SELECT habit_name, date(date, 'start of month') AS month, SUM(completed) FROM Progression_table
+              GROUP BY habit_name, month""")
+    expected = {}
+    for habit_name, month, completed_days in c.fetchall():
+        expected.setdefault(habit_name, {})[month] = completed_days
+    assert rollup_storage_module.read_rollups('test_Habit_app_database.db', 'month') == expected
+
+    years = rollup_storage_module.read_rollups('test_Habit_app_database.db', 'year', habit_name='meditate')
+    assert years['meditate']['2024-01-01'] == 24
+
+    c.execute("SELECT COUNT(*) FROM Rollup_table WHERE any_completed != (completed_days > 0)")
+    assert c.fetchone()[0] == 0
+
+
+def test_weekly_streaks_equal_analysis_streaks(sample_database):
+    """This test function asserts whether the weekly streaks from the rollups, and the streaks that the analysis
+    modules show (which come from the rollups after a check-off of a weekly habit), are the same as the streaks of the
+    streak engine, before and after 'attend senate' is checked off today."""
+    today = datetime.today().strftime('%Y-%m-%d')
+
+    for new_status in (None, 1, 0):
+        if new_status is not None:
+            update_progression_module.save_habit_progression('test_Habit_app_database.db', 'attend senate', today,
+                                                             new_status)
+        engine_streaks = {habit_name: (current_streak, longest_streak) for habit_name, periodicity, current_streak,
+                          longest_streak, last_date in streak_engine_module.calculate_streaks(
+                              'test_Habit_app_database.db', 'Habit_table', 'Progression_table')}
+        current_streaks = analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks(
+            'test_Habit_app_database.db', 'Habit_table', 'Progression_table')
+        longest_streaks = analysis_longest_streak_ever.calculate_longest_streaks(
+            'test_Habit_app_database.db', 'Habit_table', 'Progression_table')
+        for habit_name in ('practice force lightning', 'attend senate', 'wash robes'):
+            assert rollup_storage_module.weekly_streaks('test_Habit_app_database.db', habit_name) == \
+                engine_streaks[habit_name]
+            assert (current_streaks[habit_name][1], longest_streaks[habit_name][0]) == engine_streaks[habit_name]
+
+
+def test_incremental_updates_equal_rebuild(sample_database):
+    """This test function asserts whether the rollups after some check-offs, directly and through the write buffer,
+    are the same as rollups that are built again from the Progression_table."""
+    rollup_storage_module.read_rollups('test_Habit_app_database.db', 'week')
+
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2024-05-03', 0)
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2024-05-03', 0)
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2024-06-01', 1)
+    write_buffer = write_buffer_module.ProgressionWriteBuffer('test_Habit_app_database.db', max_size=10)
+    write_buffer.add('wash robes', '2024-06-02', 1)
+    write_buffer.add('wash robes', '2024-06-02', 0)
+    write_buffer.add('wash robes', date.today().isoformat(), 1)
+    write_buffer.flush()
+
+    incremental = stored_rollups()
+    rollup_storage_module.build_rollups('test_Habit_app_database.db')
+    assert incremental == stored_rollups()
+
+    months = rollup_storage_module.read_rollups('test_Habit_app_database.db', 'month', date(2024, 5, 1),
+                                                date(2024, 6, 1), 'meditate')
+    assert months == {'meditate': {'2024-05-01': 23, '2024-06-01': 1}}
+
+
+def test_invalidated_rollups_are_built_again(sample_database):
+    """This test function asserts whether the rollups of a habit are removed by invalidate_rollups, and built again
+    by read_rollups."""
+    before = rollup_storage_module.read_rollups('test_Habit_app_database.db', 'year')
+    rollup_storage_module.invalidate_rollups('test_Habit_app_database.db', habit_name='meditate')
+    assert 'meditate' not in dict((row[0], row) for row in stored_rollups())
+
+    # Without rollups, an update of the habit is not stored; the rollups are built from the new data instead.
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2024-06-01', 1)
+    after = rollup_storage_module.read_rollups('test_Habit_app_database.db', 'year')
+    assert after['meditate']['2024-01-01'] == before['meditate']['2024-01-01'] + 1
+    assert after['wash robes'] == before['wash robes']
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,85 @@
+"""In this test module, the shard_router_module is tested. The shards are created in a temporary directory, so the
+test databases of the other test modules are not changed.
+"""
+import json
+import pytest
+
+import command_line_module
+import habit_module
+import main_habit_tracker_app
+import shard_router_module
+import user_module
+
+USER_NAMES = ['anakin', 'padme', 'obi wan', 'yoda', 'mace', 'ahsoka', 'rex', 'cody']
+
+
+def set_up_router(tmp_path, shard_count=4):
+    """This function returns a router over new, prepared shards in the temporary directory."""
+    router = shard_router_module.ShardRouter.for_database(str(tmp_path / 'Habit_app_database.db'), shard_count)
+    for database in router.databases:
+        main_habit_tracker_app.forget_database(database)
+    router.bootstrap()
+    return router
+
+
+def test_shard_databases():
+    """This test function asserts whether the shard file names are derived from the database name, and whether one
+    shard is the database itself."""
+    assert shard_router_module.shard_databases('Habit_app_database.db', 3) == \
+        ['Habit_app_database_shard0.db', 'Habit_app_database_shard1.db', 'Habit_app_database_shard2.db']
+    assert shard_router_module.shard_databases('Habit_app_database.db', 1) == ['Habit_app_database.db']
+    with pytest.raises(ValueError):
+        shard_router_module.shard_databases('Habit_app_database.db', 0)
+
+
+def test_routing(tmp_path):
+    """This test function asserts whether a user is always routed to the same shard, whether the users are spread
+    over more than one shard, and whether the habits of a user are only stored in the shard of the user."""
+    router = set_up_router(tmp_path)
+    assert router.shard_index('Anakin ') == router.shard_index('anakin')
+    assert len({router.shard_index(user_name) for user_name in USER_NAMES}) > 1
+
+    router.run_for_user('anakin', command_line_module.add_habit, 'podracing', 'fastest in mos espa', 'weekly',
+                        create=True)
+    assert router.run_for_user('anakin', habit_module.Habit.habit_exists, 'podracing')
+    for database in router.databases:
+        if database != router.database_for_user('anakin'):
+            assert user_module.find_user(database, 'anakin') is None
+    with pytest.raises(ValueError):
+        router.run_for_user('padme', habit_module.Habit.habit_exists, 'podracing')
+
+
+def test_parallel_writes_and_scatter_gather(tmp_path):
+    """This test function adds and marks habits for many users at once, and asserts whether the longest streaks of
+    all users (and of the default user, which has no habits) are gathered from all shards."""
+    router = set_up_router(tmp_path)
+    router.run_in_parallel([(user_name, command_line_module.add_habit, ('meditate', 'jedi code', 'daily'))
+                            for user_name in USER_NAMES], create=True)
+    check_offs = [('meditate', day, 1) for day in ('2024-06-01', '2024-06-02', '2024-06-03')]
+    outcomes = router.run_in_parallel([(user_name, command_line_module.mark_habits, (check_offs[:index % 3 + 1],))
+                                       for index, user_name in enumerate(USER_NAMES)])
+    assert [outcome['marked'] for outcome in outcomes] == [index % 3 + 1 for index in range(len(USER_NAMES))]
+
+    longest_streaks = router.longest_streaks_per_user()
+    assert set(longest_streaks) == set(USER_NAMES) | {'default'}
+    assert longest_streaks['default'] == {}
+    for index, user_name in enumerate(USER_NAMES):
+        assert longest_streaks[user_name] == {'meditate': (index % 3 + 1, 'daily')}
+
+
+def test_command_line_shards(tmp_path, capsys):
+    """This test function asserts whether the command line with --shards stores the habits of a user in the shard of
+    the user."""
+    database = str(tmp_path / 'Habit_app_database.db')
+    router = shard_router_module.ShardRouter.for_database(database, 2)
+    arguments = ['--database', database, '--shards', '2', '--user', 'yoda']
+    assert command_line_module.main(arguments + ['add', 'levitate', '--description', 'x wing', '--periodicity',
+                                                 'daily']) == 0
+    capsys.readouterr()
+    assert command_line_module.main(arguments + ['list']) == 0
+    assert [habit['habit_name'] for habit in json.loads(capsys.readouterr().out)['habits']] == ['levitate']
+    assert router.run_for_user('yoda', habit_module.Habit.habit_exists, 'levitate')
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,85 @@
+"""In this test module, the sparse_storage_module is tested. It asserts whether switching to the sparse storage mode
+and back keeps all progression data and streaks the same, and whether updates of the progression are stored in the
+Completion_table.
+"""
+import pytest
+
+from datetime import datetime
+
+import analysis_current_streak_per_habit
+import analysis_longest_streak_ever
+import connection_manager_module
+import progression_module
+import sparse_storage_module
+import update_progression_module
+
+
+def read_progression():
+    """This function returns all rows of the Progression_table (or the view) in a fixed order."""
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+    c.execute("SELECT date_plus_habit_name, habit_name, habit_periodicity, date, completed FROM Progression_table "
+              "ORDER BY date, habit_name")
+    return c.fetchall()
+
+
+def read_all_streaks():
+    """This function returns the current and longest streaks of all habits."""
+    return (analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks('test_Habit_app_database.db',
+                                                                                 'Habit_table', 'Progression_table'),
+            analysis_longest_streak_ever.calculate_longest_streaks('test_Habit_app_database.db', 'Habit_table',
+                                                                   'Progression_table'))
+
+
+def test_enable_and_disable_sparse_storage(sample_database):
+    """This test function switches the test db to the sparse mode and back. In the sparse mode, only the completed
+    rows should be stored, while the Progression_table (now a view) and the streaks should be exactly the same."""
+    progression_before = read_progression()
+    streaks_before = read_all_streaks()
+    number_of_completions = sum(row[4] for row in progression_before)
+
+    sparse_storage_module.enable_sparse_storage('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                'Progression_table')
+    assert sparse_storage_module.storage_mode('test_Habit_app_database.db', 'Progression_table') == 'sparse'
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+    c.execute("SELECT COUNT(*) FROM Completion_table")
+    assert c.fetchone()[0] == number_of_completions
+    assert read_progression() == progression_before
+    assert read_all_streaks() == streaks_before
+
+    # combine_habits_dates must not try to insert rows into the view.
+    progression_module.Progression.combine_habits_dates('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                        'Progression_table')
+    assert read_progression() == progression_before
+
+    sparse_storage_module.disable_sparse_storage('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                 'Progression_table')
+    assert sparse_storage_module.storage_mode('test_Habit_app_database.db', 'Progression_table') == 'dense'
+    assert read_progression() == progression_before
+    assert read_all_streaks() == streaks_before
+
+
+def test_update_progression_in_sparse_storage(sample_database):
+    """This test function checks off 'meditate' today in the sparse mode. This should add one row to the
+    Completion_table, and setting it back to not completed should remove it again."""
+    today = datetime.today().strftime('%Y-%m-%d')
+    sparse_storage_module.enable_sparse_storage('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                'Progression_table')
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', today, 1)
+    c.execute("SELECT completed FROM Progression_table WHERE habit_name = 'meditate' AND date = ?", (today,))
+    assert c.fetchone()[0] == 1
+    c.execute("SELECT COUNT(*) FROM Completion_table WHERE habit_name = 'meditate' AND date = ?", (today,))
+    assert c.fetchone()[0] == 1
+    assert read_all_streaks()[0]['meditate'] == ('daily', 1)
+
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', today, 0)
+    c.execute("SELECT COUNT(*) FROM Completion_table WHERE habit_name = 'meditate' AND date = ?", (today,))
+    assert c.fetchone()[0] == 0
+
+    sparse_storage_module.disable_sparse_storage('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                 'Progression_table')
+
+
+if __name__ == '__main__':
+    pytest.main()
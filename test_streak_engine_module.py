@@ -0,0 +1,91 @@
+"""In this test module, the streak_engine_module is tested. Its outcome is compared to the original Python
+calculation of the streaks in the analysis modules, both for the sample data and for randomly generated habits.
+"""
+import pytest
+import random
+import sqlite3
+
+from datetime import date, datetime, timedelta
+
+import analysis_current_streak_per_habit
+import analysis_longest_streak_ever
+import database_and_table_creation_module
+import insert_sample_data_module
+import streak_engine_module
+
+
+def empty_test_database():
+    """This function makes sure that the test_db is emptied for a fresh start."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    dbconnection.commit()
+    dbconnection.close()
+
+
+def test_calculate_streaks_sample_data():
+    """This test function asserts whether the streak engine gives the streaks of the sample data, as described in the
+    test modules of the two analysis modules. The current streaks are calculated as of the 5th of June 2024, the last
+    date of the sample data."""
+    empty_test_database()
+    insert_sample_data_module.insert_sample_data_before_distribution_of_app('test_Habit_app_database.db',
+                                                                            'Habit_table', 'Date_table',
+                                                                            'Progression_table')
+
+    streaks = streak_engine_module.calculate_streaks('test_Habit_app_database.db', 'Habit_table',
+                                                     'Progression_table', today='2024-06-05')
+    streaks = {habit: (periodicity, current, longest) for habit, periodicity, current, longest, last_date in streaks}
+
+    assert streaks['lightsaber training'] == ('daily', 32, 32)
+    assert streaks['meditate'] == ('daily', 0, 24)
+    assert streaks['practice force lightning'] == ('weekly', 6, 6)
+    assert streaks['attend senate'] == ('weekly', 4, 4)
+    assert streaks['wash robes'] == ('weekly', 0, 3)
+
+
+def test_calculate_streaks_equals_python_calculation():
+    """This test function generates 100 random habits with random histories (including missing dates), and asserts
+    whether the streak engine gives the same outcome as the Python functions of the analysis modules."""
+    empty_test_database()
+    random.seed(66)
+    today = datetime.today()
+
+    dbconnection = sqlite3.connect('test_Habit_app_database.db')
+    c = dbconnection.cursor()
+    c.execute(database_and_table_creation_module.habit_table_statement('Habit_table'))
+    c.execute(database_and_table_creation_module.progression_table_statement('Progression_table'))
+    for number in range(100):
+        habit_name = f"habit {number}"
+        periodicity = random.choice(['daily', 'weekly'])
+        completion_chance = random.random()
+        c.execute("INSERT INTO Habit_table (habit_name, habit_description, habit_periodicity, habit_creation_date) "
+                  "VALUES (?, ?, ?, ?)", (habit_name, 'random', periodicity, '2024-05-01'))
+        for days_ago in range(random.randint(0, 100)):
+            if random.random() < 0.05:
+                continue
+            day = (date.today() - timedelta(days=days_ago)).isoformat()
+            c.execute("INSERT INTO Progression_table (date_plus_habit_name, habit_name, habit_periodicity, date, "
+                      "completed) VALUES (?, ?, ?, ?, ?)",
+                      (f"{day} - {habit_name}", habit_name, periodicity, day,
+                       int(random.random() < completion_chance)))
+    dbconnection.commit()
+
+    for habit_name, periodicity, current, longest, last_date in streak_engine_module.calculate_streaks(
+            'test_Habit_app_database.db', 'Habit_table', 'Progression_table'):
+        c.execute("SELECT date, completed FROM Progression_table WHERE habit_name = ? ORDER BY date", (habit_name,))
+        history = c.fetchall()
+        if periodicity == 'daily':
+            assert current == analysis_current_streak_per_habit.count_daily_streak(history[::-1])
+            assert longest == analysis_longest_streak_ever.calculate_longest_daily_streak(history)
+        else:
+            assert current == analysis_current_streak_per_habit.count_weekly_streak(history[::-1], today)
+            assert longest == analysis_longest_streak_ever.calculate_longest_weekly_streak(history)
+
+    dbconnection.close()
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,57 @@
+"""In this test module, the NumPy streak backend is tested. Its outcome is compared to the outcome of the
+streak_engine_module, both for the sample data and for a synthetic database with random completions. The tests are
+skipped if NumPy is not installed.
+"""
+import pytest
+import sqlite3
+
+import benchmark_module
+import insert_sample_data_module
+import streak_engine_module
+import streak_numpy_module
+
+numpy = pytest.importorskip('numpy')
+
+
+def test_numpy_streaks_sample_data():
+    """This test function asserts whether the NumPy backend gives the longest streaks of the sample data, as described
+    in the test module of the analysis_longest_streak_ever module."""
+    # First, it is made sure that the test_db is emptied for a fresh start.
+    dbconnection = sqlite3.connect('test_Habit_app_database.db', detect_types=sqlite3.PARSE_DECLTYPES)
+    c = dbconnection.cursor()
+    c.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = c.fetchall()
+    for table_name in tables:
+        c.execute(f"DROP TABLE IF EXISTS {table_name[0]}")
+    dbconnection.commit()
+    dbconnection.close()
+
+    insert_sample_data_module.insert_sample_data_before_distribution_of_app('test_Habit_app_database.db',
+                                                                            'Habit_table', 'Date_table',
+                                                                            'Progression_table')
+    longest_streaks = streak_numpy_module.calculate_longest_streaks('test_Habit_app_database.db', 'Habit_table',
+                                                                    'Progression_table')
+
+    assert longest_streaks == {'lightsaber training': (32, 'daily'), 'meditate': (24, 'daily'),
+                               'practice force lightning': (6, 'weekly'), 'attend senate': (4, 'weekly'),
+                               'wash robes': (3, 'weekly')}
+
+
+def test_numpy_streaks_equal_streak_engine():
+    """This test function builds a synthetic database with 50 habits and 200 days, and asserts whether the NumPy
+    backend and the streak engine give the same current and longest streaks for every habit."""
+    benchmark_module.build_synthetic_database('test_Habit_app_database2.db', 50, 200, completion_chance=0.8)
+
+    current_streaks = streak_numpy_module.calculate_daily_and_weekly_streaks('test_Habit_app_database2.db',
+                                                                             'Habit_table', 'Progression_table')
+    longest_streaks = streak_numpy_module.calculate_longest_streaks('test_Habit_app_database2.db', 'Habit_table',
+                                                                    'Progression_table')
+
+    for habit_name, periodicity, current, longest, last_date in streak_engine_module.calculate_streaks(
+            'test_Habit_app_database2.db', 'Habit_table', 'Progression_table'):
+        assert current_streaks[habit_name] == (periodicity, current)
+        assert longest_streaks[habit_name] == (longest, periodicity)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,67 @@
+"""In this test module, the streak_table_module is tested. It asserts whether the stored streaks are updated correctly
+when the user updates their progression (also on a date in the past), and when new dates are added.
+"""
+import pytest
+
+from datetime import datetime, timedelta
+
+import analysis_current_streak_per_habit
+import analysis_longest_streak_ever
+import streak_table_module
+import update_progression_module
+
+
+def test_streaks_follow_progression_updates(sample_database):
+    """This test function checks off 'meditate' today and yesterday, and asserts whether the current streak is 2.
+    Then, yesterday is set back to not completed, which should leave a current streak of 1. The longest streak ever
+    from the sample data (24) should not change."""
+    today = datetime.today().strftime('%Y-%m-%d')
+    yesterday = (datetime.today() - timedelta(days=1)).strftime('%Y-%m-%d')
+
+    # The streaks are read once, so they are stored in the Streak_table before the updates.
+    analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks('test_Habit_app_database.db',
+                                                                         'Habit_table', 'Progression_table')
+
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', today, 1)
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', yesterday, 1)
+    current_streaks = analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks(
+        'test_Habit_app_database.db', 'Habit_table', 'Progression_table')
+    assert current_streaks['meditate'] == ('daily', 2)
+
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', yesterday, 0)
+    current_streaks = analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks(
+        'test_Habit_app_database.db', 'Habit_table', 'Progression_table')
+    assert current_streaks['meditate'] == ('daily', 1)
+
+    longest_streaks = analysis_longest_streak_ever.calculate_longest_streaks('test_Habit_app_database.db',
+                                                                             'Habit_table', 'Progression_table')
+    assert longest_streaks['meditate'] == (24, 'daily')
+
+
+def test_roll_over_streaks(sample_database):
+    """This test function checks off a daily and a weekly habit today, and then rolls the streaks over to tomorrow
+    and to next week. A new day breaks the daily streak, but the weekly streak is only broken in a new week."""
+    today = datetime.today()
+    tomorrow = today + timedelta(days=1)
+    next_week = today + timedelta(days=7)
+
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate',
+                                                     today.strftime('%Y-%m-%d'), 1)
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'wash robes',
+                                                     today.strftime('%Y-%m-%d'), 1)
+
+    streak_table_module.roll_over_streaks('test_Habit_app_database.db', tomorrow.strftime('%Y-%m-%d'))
+    current_streaks = analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks(
+        'test_Habit_app_database.db', 'Habit_table', 'Progression_table')
+    assert current_streaks['meditate'] == ('daily', 0)
+    if tomorrow.weekday() != 0:
+        assert current_streaks['wash robes'] == ('weekly', 1)
+
+    streak_table_module.roll_over_streaks('test_Habit_app_database.db', next_week.strftime('%Y-%m-%d'))
+    current_streaks = analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks(
+        'test_Habit_app_database.db', 'Habit_table', 'Progression_table')
+    assert current_streaks['wash robes'] == ('weekly', 0)
+
+
+if __name__ == '__main__':
+    pytest.main()
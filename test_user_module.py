@@ -0,0 +1,132 @@
+"""In this test module, the user_module is tested, together with the separation of the habits and progression of
+different users in one database. It also asserts whether the queries of one user use the indexes that start with the
+user_id, so that they do not read the rows of other users.
+"""
+import pytest
+
+import analysis_current_streak_per_habit
+import command_line_module
+import connection_manager_module
+import database_and_table_creation_module
+import habit_module
+import progression_module
+import sparse_storage_module
+import streak_engine_module
+import update_progression_module
+import user_module
+
+
+def add_second_user():
+    """This function adds the user 'anakin' with a habit that has the same name as a habit of the default user, and
+    returns the user_id."""
+    user_id = user_module.add_user('test_Habit_app_database.db', 'Anakin')
+    command_line_module.add_habit('test_Habit_app_database.db', 'meditate', 'on the jedi code', 'daily', user_id)
+    progression_module.Progression.combine_habits_dates('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                        'Progression_table')
+    return user_id
+
+
+def test_add_and_find_user(sample_database):
+    """This test function adds a user, and asserts whether it can be found by name. A name that already exists, an
+    invalid name or an unknown name should give an error."""
+    user_id = user_module.add_user('test_Habit_app_database.db', ' Anakin ')
+    assert user_id != database_and_table_creation_module.DEFAULT_USER_ID
+    assert user_module.find_user('test_Habit_app_database.db', 'anakin') == user_id
+    assert user_module.user_id_for_name('test_Habit_app_database.db', 'default') == \
+        database_and_table_creation_module.DEFAULT_USER_ID
+    assert [row[1] for row in user_module.list_users('test_Habit_app_database.db')] == ['default', 'anakin']
+
+    with pytest.raises(ValueError):
+        user_module.add_user('test_Habit_app_database.db', 'anakin')
+    with pytest.raises(ValueError):
+        user_module.add_user('test_Habit_app_database.db', 'darth-vader')
+    with pytest.raises(ValueError):
+        user_module.user_id_for_name('test_Habit_app_database.db', 'padme')
+    assert user_module.user_id_for_name('test_Habit_app_database.db', 'padme', create=True) == \
+        user_module.find_user('test_Habit_app_database.db', 'padme')
+
+
+def test_habits_and_progression_per_user(sample_database):
+    """This test function gives a second user a habit with the same name as a habit of the default user. Listing,
+    updating and deleting the habit of one user should not change anything for the other user."""
+    default_streaks = analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks(
+        'test_Habit_app_database.db', 'Habit_table', 'Progression_table')
+    user_id = add_second_user()
+
+    assert [habit['habit_name'] for habit in
+            command_line_module.list_habits('test_Habit_app_database.db', user_id=user_id)['habits']] == ['meditate']
+    assert len(command_line_module.list_habits('test_Habit_app_database.db')['habits']) == 5
+    assert habit_module.Habit.habit_exists('test_Habit_app_database.db', 'meditate', user_id)
+    assert not habit_module.Habit.habit_exists('test_Habit_app_database.db', 'wash robes', user_id)
+
+    # The default user did not meditate on the 1st of June 2024, the second user did.
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2024-06-01', 1,
+                                                     user_id)
+    assert update_progression_module.read_day_progression('test_Habit_app_database.db', '2024-06-01', user_id) == \
+        [('2024-06-01', 'meditate', 1)]
+    default_day = update_progression_module.read_day_progression('test_Habit_app_database.db', '2024-06-01')
+    assert ('2024-06-01', 'meditate', 0) in default_day and len(default_day) == 5
+
+    # The streaks of the default user are the same as before, and the second user has a streak of their own.
+    assert analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks(
+        'test_Habit_app_database.db', 'Habit_table', 'Progression_table') == default_streaks
+    assert list(analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks(
+        'test_Habit_app_database.db', 'Habit_table', 'Progression_table', user_id)) == ['meditate']
+
+    # Deleting the habit of the second user keeps the habit and progression of the default user.
+    assert habit_module.Habit.remove_from_database('test_Habit_app_database.db', 'meditate', user_id)
+    assert habit_module.Habit.habit_exists('test_Habit_app_database.db', 'meditate')
+    assert update_progression_module.read_day_progression('test_Habit_app_database.db', '2024-06-01') == default_day
+
+
+def test_queries_use_user_indexes(sample_database):
+    """This test function asserts whether the queries of one user only search the Habit_table and Progression_table
+    through their keys and indexes (SEARCH), and never read the complete table (SCAN)."""
+    add_second_user()
+    c = connection_manager_module.get_connection('test_Habit_app_database.db').cursor()
+
+    queries = [
+        (streak_engine_module.streak_query('Habit_table', 'Progression_table'),
+         {'today': '2024-06-05', 'user_id': 1, 'habit_name': None}),
+        (streak_engine_module.streak_query('Habit_table', 'Progression_table', single_habit=True),
+         {'today': '2024-06-05', 'user_id': 1, 'habit_name': 'meditate'}),
+        ("SELECT date, habit_name, completed FROM Progression_table WHERE user_id = ? AND date = ? "
+         "ORDER BY habit_name", (1, '2024-06-01')),
+        ("SELECT habit_name, habit_description, habit_creation_date FROM Habit_table "
+         "WHERE user_id = ? AND habit_periodicity='daily'", (1,)),
+    ]
+    for query, parameters in queries:
+        c.execute(f"EXPLAIN QUERY PLAN {query}", parameters)
+        details = [row[3] for row in c.fetchall()]
+        assert not [detail for detail in details if detail.startswith(
+            ('SCAN Habit_table', 'SCAN Progression_table', 'SCAN p', 'SCAN m'))]
+        assert all('user_id=?' in detail for detail in details
+                   if 'Habit_table_' in detail or 'Progression_table_' in detail)
+
+
+def test_sparse_storage_per_user(sample_database):
+    """This test function switches the test db with two users to the sparse storage mode. The view should show every
+    habit only with the completions of its own user."""
+    user_id = add_second_user()
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2024-06-01', 1,
+                                                     user_id)
+    default_day = update_progression_module.read_day_progression('test_Habit_app_database.db', '2024-06-01')
+
+    sparse_storage_module.enable_sparse_storage('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                'Progression_table')
+    assert update_progression_module.read_day_progression('test_Habit_app_database.db', '2024-06-01') == default_day
+    assert update_progression_module.read_day_progression('test_Habit_app_database.db', '2024-06-01', user_id) == \
+        [('2024-06-01', 'meditate', 1)]
+
+    update_progression_module.save_habit_progression('test_Habit_app_database.db', 'meditate', '2024-06-01', 0,
+                                                     user_id)
+    assert update_progression_module.read_day_progression('test_Habit_app_database.db', '2024-06-01', user_id) == \
+        [('2024-06-01', 'meditate', 0)]
+    assert update_progression_module.read_day_progression('test_Habit_app_database.db', '2024-06-01') == default_day
+
+    sparse_storage_module.disable_sparse_storage('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                 'Progression_table')
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,103 @@
+"""In this test module, the write_buffer_module is tested. It asserts whether buffered progression updates are only
+written when the buffer is full, when its time limit has passed or when it is flushed, and whether a month of
+check-offs is written in one transaction.
+"""
+import pytest
+import sqlite3
+import time
+
+from datetime import date, timedelta
+
+import analysis_current_streak_per_habit
+import bitmap_storage_module
+import connection_manager_module
+import update_progression_module
+import write_buffer_module
+
+
+def stored_status(habit_name, day):
+    """This function reads the stored status of a habit on a date with a new connection, so that only committed
+    changes are seen."""
+    dbconnection = sqlite3.connect('test_Habit_app_database.db')
+    status = dbconnection.execute("SELECT completed FROM Progression_table WHERE habit_name = ? AND date = ?",
+                                  (habit_name, day)).fetchone()[0]
+    dbconnection.close()
+    return status
+
+
+def test_flush_when_full(sample_database):
+    """This test function asserts whether buffered changes are shown by overlay but not stored, until the buffer is
+    full. Then all changes are stored at once, and the current streak is calculated again."""
+    today = date.today().isoformat()
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    write_buffer = write_buffer_module.ProgressionWriteBuffer('test_Habit_app_database.db', max_size=3, max_delay=60)
+
+    write_buffer.add('meditate', today, 1)
+    write_buffer.add('meditate', yesterday, 1)
+    assert stored_status('meditate', today) == 0
+    rows = update_progression_module.read_day_progression('test_Habit_app_database.db', today)
+    assert ('meditate', 1) in [(habit_name, completed) for day, habit_name, completed in
+                               write_buffer.overlay(today, rows)]
+
+    write_buffer.add('wash robes', today, 1)
+    assert len(write_buffer) == 0 and write_buffer.flushes == 1
+    assert stored_status('meditate', today) == 1 and stored_status('wash robes', today) == 1
+    current_streaks = analysis_current_streak_per_habit.calculate_daily_and_weekly_streaks(
+        'test_Habit_app_database.db', 'Habit_table', 'Progression_table')
+    assert current_streaks['meditate'] == ('daily', 2)
+    with pytest.raises(ValueError):
+        write_buffer.add('meditate', today, 2)
+
+
+def test_back_fill_in_one_flush(sample_database):
+    """This test function back-fills a month of check-offs and asserts whether they are written with one commit.
+    The durability is set for the connection, not per flush."""
+    write_buffer = write_buffer_module.ProgressionWriteBuffer('test_Habit_app_database.db', max_size=500,
+                                                              max_delay=60)
+    days = [(date.today() - timedelta(days=number)).isoformat() for number in range(30)]
+    for day in days:
+        write_buffer.add('meditate', day, 1)
+    assert write_buffer.flush() == 30
+    assert write_buffer.flushes == 1
+    assert all(stored_status('meditate', day) == 1 for day in days)
+    dbconnection = connection_manager_module.get_connection('test_Habit_app_database.db')
+    assert dbconnection.execute("PRAGMA synchronous").fetchone()[0] == 1
+    try:
+        connection_manager_module.set_durability('full')
+        assert dbconnection.execute("PRAGMA synchronous").fetchone()[0] == 2
+    finally:
+        connection_manager_module.set_durability('normal')
+    with pytest.raises(ValueError):
+        connection_manager_module.set_durability('sometimes')
+
+
+def test_change_without_row_is_left_out(sample_database):
+    """This test function buffers a change of a habit on a date without a row in the Progression_table. It must not
+    be stored anywhere, also not in the bitmap of the habit."""
+    counts_before = bitmap_storage_module.completion_counts('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                            'Progression_table')
+    write_buffer = write_buffer_module.ProgressionWriteBuffer('test_Habit_app_database.db', max_size=500,
+                                                              max_delay=60)
+    write_buffer.add('meditate', (date.today() + timedelta(days=3)).isoformat(), 1)
+    assert write_buffer.flush() == 1
+    assert bitmap_storage_module.completion_counts('test_Habit_app_database.db', 'Habit_table', 'Date_table',
+                                                   'Progression_table') == counts_before
+
+
+def test_flush_after_delay(sample_database):
+    """This test function asserts whether a buffered change is written by the timer thread after max_delay
+    seconds, without any further action."""
+    today = date.today().isoformat()
+    write_buffer = write_buffer_module.ProgressionWriteBuffer('test_Habit_app_database.db', max_size=100,
+                                                              max_delay=0.1)
+    write_buffer.add('meditate', today, 1)
+    for attempt in range(50):
+        if write_buffer.flushes:
+            break
+        time.sleep(0.05)
+    assert write_buffer.flushes == 1
+    assert stored_status('meditate', today) == 1
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -1,22 +1,39 @@
 """This module provides the functions needed to display the habit progression data per day. It also lets the user
 update this data: to a '1' (habit completed) or back to a '0' (not completed). This module is called from the main
-menu of the application (and ofcourse from test modules).
+menu of the application (and ofcourse from test modules). Only the habits of one user are shown and updated: the
+default user, unless a user_id is given.
+
+The days are read through a day cache (see day_cache_module): the progression of a window of days around the shown
+date is read at once, so going to the previous or next day, or jumping to a date, is instant.
+
+The updates of the progression menu are not written one by one, but collected in the write buffer of the database
+(see write_buffer_module) and written together. The buffer is flushed at the latest when the user returns to the main
+menu.
 """
 
-import sqlite3
 from datetime import datetime, timedelta
 
+import bitmap_storage_module
+import connection_manager_module
+import database_and_table_creation_module
+import day_cache_module
+import habit_health_module
+import habit_registry_module
+import rollup_storage_module
+import streak_table_module
+import write_buffer_module
 
-def update_function(database):
+
+def update_function(database, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
     """This function lets the user display and interact with the data on habit progression/completion. It consists of
     various (sub) functions which display the current day's data to the user, and which allow the user to switch to
-    previous and next days (including the data on these days). Furthermore, the (sub) functions allow the user to
-    update their progression data regarding their habits. When a certain habit on a certain date has been set to '1'
-    (completed) it can be set back to '0' (not completed) again if the users wishes to do so.
+    previous and next days, or to jump to a date (including the data on these days). Furthermore, the (sub) functions
+    allow the user to update their progression data regarding their habits. When a certain habit on a certain date has
+    been set to '1' (completed) it can be set back to '0' (not completed) again if the users wishes to do so.
     """
-    # Connecting to the database.
-    conn = sqlite3.connect(database)
-    cursor = conn.cursor()
+    # The updates are collected in the write buffer of the database. The days are read through the day cache.
+    write_buffer = write_buffer_module.get_write_buffer(database)
+    day_cache = day_cache_module.DayCache(database, user_id)
 
     # Here I store 'the current date' into the variable current_date because it is used in multiple sub functions.
     current_date = datetime.today()
@@ -24,7 +41,7 @@ def update_function(database):
     def display_day_data():
         """This function is the first sub function that is called after calling the update_function from the main
         menu. It first prints the weekday and date. Then, it prints the columns using friendly user column names.
-        Next, it queries the Progression_table for all the data on the habits on that specific date, and displays them.
+        Next, it reads all the data on the habits on that specific date from the day cache, and displays them.
         """
         # Store the day to be displayed into the variable display_date. This is done with a weekday and date format.
         # Then the user-friendly column names are printed.
@@ -35,11 +52,11 @@ def update_function(database):
         print(f"{'Date':<12} {'Habit Name':<31} {'Completed':<10}")
         print("-" * 53)
 
-        # The Progression_table is queried for the date, habits and 'completed' column regarding the displayed date.
-        cursor.execute(
-            """SELECT date, habit_name, completed FROM Progression_table WHERE date = ? ORDER BY habit_name""",
-            (current_date.strftime('%Y-%m-%d'),))
-        rows = cursor.fetchall()
+        # The date, habits and 'completed' column regarding the displayed date are read from the day cache, which
+        # queries the Progression_table for a window of days if the date is not cached yet. The changes that are still
+        # in the write buffer are shown on top of the stored rows.
+        rows = write_buffer.overlay(current_date.strftime('%Y-%m-%d'),
+                                    day_cache.day(current_date.strftime('%Y-%m-%d')), user_id)
 
         # Through a for loop, each loop assigns the datapoints from the respective rows (the row variable) to the
         # variables date, habit_name and 'completed'. Next, these variables are printed and the loop starts over.
@@ -76,21 +93,41 @@ def update_function(database):
         else:
             print("You cannot go further than today.")
 
+    def jump_to_date():
+        """This function can be called from the within the progression menu. It prompts the user for a date
+        (YYYY-MM-DD) and displays the data of that date, without going through all days in between. Like the other
+        functions, it prevents the user from going back farther than the first of May 2024 or displaying future
+        days."""
+        nonlocal current_date
+        print("")
+        day = input("Enter the date you want to see (YYYY-MM-DD): ").strip()
+        try:
+            new_date = datetime.strptime(day, '%Y-%m-%d')
+        except ValueError:
+            print("Invalid date. Please use the format YYYY-MM-DD.")
+            return
+        if not database_and_table_creation_module.FIRST_DATE <= new_date.strftime('%Y-%m-%d') <= \
+                datetime.today().strftime('%Y-%m-%d'):
+            print("The date must be between 01-05-2024 and today.")
+            return
+        current_date = datetime.combine(new_date.date(), current_date.time())
+        display_day_data()
+
     def update_habit_progression():
         """The functions: display_day_data, go_back_to_previous_day and go_to_next_day, query and display the habit
         data per day. This function, the update_habit_progression function, allows the users to update the habit data.
 
-        It first queries all the habit names from the Progression_table. Then it prompts the user for which habit
+        It first looks up the habit names of the user in the habit registry. Then it prompts the user for which habit
         they want to update. Next, the user is prompted what the new status should be: 1 (completed) or 0 (not
         completed).
         This input is then used to perform an update task on the Progression_table: the row where the habit name is
         equal to the user input, and the date is equal to the current_date (the currently displayed date), the value
-        in the 'completed' column gets set to a value equal to the user input.
+        in the 'completed' column gets set to a value equal to the user input. The update is added to the write
+        buffer, which writes it together with the other updates.
         """
 
-        # Query all the habit names from the Habit Table and store data into the habits variable.
-        cursor.execute("""SELECT habit_name FROM Progression_table""")
-        habits = [row[0] for row in cursor.fetchall()]
+        # The habit names of the user are kept in memory by the habit registry, so no query is needed to check them.
+        habits = habit_registry_module.habit_periodicities(database, user_id)
 
         # Prompt the user for the habit that they want to update and store this data into the variable habit_name.
         print("")
@@ -111,14 +148,11 @@ def update_function(database):
             new_status = int(new_status)
             # If the user provides a valid input (1 or 0), the Progression_table is updated with the new_status (1 or 0)
             # at the displayed date (current_date) for the habit name the user provided (habit_name).
-            cursor.execute("""UPDATE Progression_table SET completed = ? WHERE date = ? AND habit_name = ?""",
-                           (new_status, current_date.strftime('%Y-%m-%d'), habit_name))
+            write_buffer.add(habit_name, current_date.strftime('%Y-%m-%d'), new_status, user_id)
+            day_cache.update(current_date.strftime('%Y-%m-%d'), habit_name, new_status)
             print("")
             print("Habit progression updated successfully.")
 
-            # Close database.
-            conn.commit()
-
         except ValueError:
             print("")
             print("Invalid input. Please enter 1 or 0.")
@@ -130,21 +164,61 @@ def update_function(database):
 
     # This while loop generates the 'progression' menu for the user. The loop prompts the user for input and then,
     # based on this input, it calls the functions for displaying the data on the previous day, the next day, to
-    # update the progression, or the go back to the app's main menu.
+    # update the progression, or the go back to the app's main menu. Before going back, the buffered updates are
+    # written.
     while True:
         print("")
-        command = input("What do you want to do? Previous day (1), next day (2), update progression (3) or back to "
-                        "main menu (m): ").strip().lower()
+        command = input("What do you want to do? Previous day (1), next day (2), update progression (3), jump to a "
+                        "date (4) or back to main menu (m): ").strip().lower()
         if command == '1':
             go_back_to_previous_day()
         elif command == '2':
             go_to_next_day()
         elif command == '3':
             update_habit_progression()
+        elif command == '4':
+            jump_to_date()
         elif command == 'm':
+            write_buffer.flush()
             break
         else:
-            print("Invalid input. Please enter '1', '2', '3', or 'm'.")
-
-    # Close the database.
-    conn.close()
+            print("Invalid input. Please enter '1', '2', '3', '4' or 'm'.")
+
+
+def read_day_progression(database, date, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function returns the progression of all habits of the user on one date (YYYY-MM-DD) as a list of (date,
+    habit_name, completed), ordered by habit name. It is used by the progression menu and by the api_server_module."""
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute("""SELECT date, habit_name, completed FROM Progression_table WHERE user_id = ? AND date = ?
+              ORDER BY habit_name""", (user_id, date))
+    return c.fetchall()
+
+
+def save_habit_progression(database, habit_name, date, new_status,
+                           user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+    """This function stores the new status (1 for completed, 0 for not completed) of a habit on a certain date in the
+    Progression_table, and commits it. Next, the week, month and year counts of the habit (see rollup_storage_module)
+    and its completion rates and health score (see habit_health_module) are updated, and its bitmap (see
+    bitmap_storage_module) is removed, so that it is built again when it is needed. Nothing of this happens if the
+    habit has no row on the date, because then nothing was stored. Finally, the stored streaks of this habit are
+    calculated again through the streak_table_module, so that the analytics module shows the correct streaks, also
+    when a date in the past has been changed. This is done last, because the streaks of a weekly habit are calculated
+    from its week counts.
+    """
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+
+    c.execute("SELECT completed FROM Progression_table WHERE user_id = ? AND date = ? AND habit_name = ?",
+              (user_id, date, habit_name))
+    old_row = c.fetchone()
+    c.execute("""UPDATE Progression_table SET completed = ? WHERE user_id = ? AND date = ? AND habit_name = ?""",
+              (new_status, user_id, date, habit_name))
+    dbconnection.commit()
+
+    if old_row is not None:
+        rollup_storage_module.update_habit_rollups(database, habit_name, date, old_row[0], new_status, user_id=user_id)
+        habit_health_module.update_habit_health(database, habit_name, date, old_row[0], new_status, user_id=user_id)
+        bitmap_storage_module.invalidate_bitmaps(database, habit_name=habit_name, user_id=user_id)
+    streak_table_module.refresh_habit_streak(database, 'Habit_table', 'Progression_table', habit_name,
+                                             user_id=user_id)
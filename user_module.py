@@ -0,0 +1,66 @@
+"""This module contains the functions for the users of the application. One database can hold the habits and
+progression of many users (see database_and_table_creation_module): every habit belongs to one user, and habit names
+only have to be unique per user. The functions of the other modules get the user as a number (user_id). The command
+line and the API server let the user be chosen by name, and look up the number with user_id_for_name.
+
+Without a user, the default user is used (DEFAULT_USER_ID, named 'default'). It owns all habits of databases that were
+created before there were users, so a single-user database keeps working as before.
+"""
+
+from datetime import datetime
+
+import connection_manager_module
+import database_and_table_creation_module
+
+
+def add_user(database, user_name, user_table_name='User_table'):
+    """This function adds a user and returns its user_id. The name is trimmed and converted to lower case, and must
+    be between 1 and 30 characters long and only contain letters, numbers and spaces. An invalid name, or a name that
+    already exists, raises a ValueError."""
+    user_name = user_name.strip().lower()
+    if len(user_name) > 30 or len(user_name) < 1 or not user_name.replace(' ', '').isalnum():
+        raise ValueError("User name must be between 1 and 30 long, and only contain alphabetic characters and "
+                         "numbers.")
+    if find_user(database, user_name, user_table_name) is not None:
+        raise ValueError(f"User name '{user_name}' already exists.")
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(f"INSERT INTO {user_table_name} (user_name, user_creation_date) VALUES (?, ?)",
+              (user_name, datetime.now().strftime('%Y-%m-%d %H:%M')))
+    dbconnection.commit()
+    return c.lastrowid
+
+
+def find_user(database, user_name, user_table_name='User_table'):
+    """This function returns the user_id of the user with this name, or None if there is no such user. The
+    User_table is only created if it does not exist yet, so looking up a user does not write."""
+    if database_and_table_creation_module.table_type(database, user_table_name) is None:
+        database_and_table_creation_module.create_user_table(user_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(f"SELECT user_id FROM {user_table_name} WHERE user_name = ?", (user_name.strip().lower(),))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def user_id_for_name(database, user_name, create=False, user_table_name='User_table'):
+    """This function returns the user_id of the user with this name. If the user does not exist, it is added when
+    create is True, and otherwise a NotFoundError is raised."""
+    user_id = find_user(database, user_name, user_table_name)
+    if user_id is not None:
+        return user_id
+    if create:
+        return add_user(database, user_name, user_table_name)
+    raise database_and_table_creation_module.NotFoundError(f"User name '{user_name.strip().lower()}' not found.")
+
+
+def list_users(database, user_table_name='User_table'):
+    """This function returns all users as a list of (user_id, user_name, user_creation_date), ordered by user_id."""
+    database_and_table_creation_module.create_user_table(user_table_name, database)
+
+    dbconnection = connection_manager_module.get_connection(database)
+    c = dbconnection.cursor()
+    c.execute(f"SELECT user_id, user_name, user_creation_date FROM {user_table_name} ORDER BY user_id")
+    return c.fetchall()
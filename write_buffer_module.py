@@ -0,0 +1,170 @@
+"""This module contains the write buffer for progression updates. Before, every status change in the progression menu
+was written and committed on its own, so every check-off cost a commit (and, with synchronous FULL, a flush of the
+file to disk). Now the changes are collected in memory and written together, in one transaction, when:
+- the buffer contains max_size changes,
+- max_delay seconds have passed since the oldest change in the buffer (a timer thread flushes the buffer),
+- the user leaves the progression menu and returns to the main menu (see update_function),
+- the application shuts down (the buffers are flushed automatically at exit).
+So back-filling a month of check-offs costs one commit instead of one per check-off. The stored streaks of a habit
+are calculated again once per flush, instead of once per check-off.
+
+Until a change is written, the buffer itself is the most recent source: the day view shows the buffered changes on
+top of the stored progression (see overlay), so the user always sees their own changes.
+
+The settings are stored in one place: the WRITE_BUFFER_SETTINGS dictionary below. A max_size of 1 writes every change
+directly, as before. How safely a flush is written to disk is the durability of the connection, which is chosen once
+at startup (see set_durability of the connection_manager_module).
+"""
+
+import atexit
+import threading
+import time
+
+import bitmap_storage_module
+import connection_manager_module
+import database_and_table_creation_module
+import habit_health_module
+import rollup_storage_module
+import streak_table_module
+
+# The settings of new write buffers:
+# - max_size: the number of buffered changes after which the buffer is flushed.
+# - max_delay: the number of seconds after which a buffered change is flushed at the latest.
+WRITE_BUFFER_SETTINGS = {
+    'max_size': 500,
+    'max_delay': 5.0,
+}
+
+# The write buffers, one per database, shared by all threads.
+_write_buffers = {}
+_write_buffers_lock = threading.Lock()
+
+
+class ProgressionWriteBuffer:
+    """This class collects the progression changes of one database and writes them in one transaction. It can be
+    used by several threads: a lock protects the buffered changes, and a flush holds the lock until the changes are
+    stored."""
+
+    def __init__(self, database, max_size=None, max_delay=None):
+        self.database = database
+        self.max_size = max_size if max_size is not None else WRITE_BUFFER_SETTINGS['max_size']
+        self.max_delay = max_delay if max_delay is not None else WRITE_BUFFER_SETTINGS['max_delay']
+        if self.max_size < 1:
+            raise ValueError("The size of the write buffer must be at least 1.")
+        # The buffered changes: {(user_id, habit_name, date): completed}. A later change of the same habit on the
+        # same date replaces the earlier one.
+        self.changes = {}
+        self.lock = threading.RLock()
+        self.timer = None
+        self.oldest_change = None
+        self.flushes = 0
+
+    def add(self, habit_name, date, completed, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+        """This function buffers the new status (1 for completed, 0 for not completed) of a habit on a date
+        (YYYY-MM-DD). The buffer is flushed when it is full, or when its oldest change is older than max_delay
+        seconds."""
+        if completed not in (0, 1):
+            raise ValueError("Invalid status: use 1 for completed or 0 for not completed.")
+        with self.lock:
+            self.changes[(user_id, habit_name, date)] = completed
+            if self.oldest_change is None:
+                self.oldest_change = time.monotonic()
+                self.start_timer()
+            if len(self.changes) >= self.max_size or time.monotonic() - self.oldest_change >= self.max_delay:
+                self.flush()
+
+    def overlay(self, date, rows, user_id=database_and_table_creation_module.DEFAULT_USER_ID):
+        """This function returns the (date, habit_name, completed) rows of a date, as read by read_day_progression,
+        with the buffered changes of the user on that date applied."""
+        with self.lock:
+            return [(row_date, habit_name, self.changes.get((user_id, habit_name, row_date), completed))
+                    for row_date, habit_name, completed in rows] if self.changes else rows
+
+    def flush(self):
+        """This function writes all buffered changes in one transaction. The rollups and health values are updated,
+        the bitmap of every changed habit is removed, and its stored streaks are calculated once. Changes of a habit on
+        a date without a row in the Progression_table are not written. It returns the number of buffered changes."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.changes:
+                return 0
+            dbconnection = connection_manager_module.get_connection(self.database)
+            with connection_manager_module.transaction(self.database):
+                # The old statuses are read first: the rollups and health values change by the difference. Changes
+                # without a row are left out, because the UPDATE does not store them either.
+                old_statuses = {}
+                for user_id, habit_name, date in self.changes:
+                    old_row = dbconnection.execute(
+                        "SELECT completed FROM Progression_table WHERE user_id = ? AND date = ? AND habit_name = ?",
+                        (user_id, date, habit_name)).fetchone()
+                    if old_row is not None:
+                        old_statuses[(user_id, habit_name, date)] = old_row[0]
+                dbconnection.executemany(
+                    "UPDATE Progression_table SET completed = ? WHERE user_id = ? AND date = ? AND habit_name = ?",
+                    [(self.changes[key], key[0], key[2], key[1]) for key in old_statuses])
+                for (user_id, habit_name, date), old_completed in old_statuses.items():
+                    completed = self.changes[(user_id, habit_name, date)]
+                    rollup_storage_module.update_habit_rollups(self.database, habit_name, date, old_completed,
+                                                               completed, user_id=user_id)
+                    habit_health_module.update_habit_health(self.database, habit_name, date, old_completed, completed,
+                                                            user_id=user_id)
+                # The streaks are calculated last, because the streaks of a weekly habit come from its rollups.
+                changed_habits = {(user_id, habit_name) for user_id, habit_name, date in old_statuses}
+                for user_id, habit_name in sorted(changed_habits):
+                    bitmap_storage_module.invalidate_bitmaps(self.database, habit_name=habit_name, user_id=user_id)
+                    streak_table_module.refresh_habit_streak(self.database, 'Habit_table', 'Progression_table',
+                                                             habit_name, user_id=user_id)
+            number_of_changes = len(self.changes)
+            self.changes.clear()
+            self.oldest_change = None
+            self.flushes += 1
+            return number_of_changes
+
+    def start_timer(self):
+        """This function starts the timer thread that flushes the buffer after max_delay seconds. The thread is a
+        daemon, so it does not keep the application running; at exit, flush_all_write_buffers flushes the rest."""
+        self.timer = threading.Timer(self.max_delay, self.flush_from_timer)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush_from_timer(self):
+        """This function runs in the timer thread. It flushes the buffer with the connection of the timer thread, and
+        closes that connection afterwards, because the thread ends."""
+        try:
+            self.flush()
+        finally:
+            connection_manager_module.close_connection(self.database)
+
+    def __len__(self):
+        return len(self.changes)
+
+
+def get_write_buffer(database):
+    """This function returns the write buffer of the database. It is created, with the WRITE_BUFFER_SETTINGS, the
+    first time it is requested."""
+    with _write_buffers_lock:
+        if database not in _write_buffers:
+            _write_buffers[database] = ProgressionWriteBuffer(database)
+        return _write_buffers[database]
+
+
+def flush_write_buffer(database):
+    """This function flushes the write buffer of the database, if there is one, and returns the number of written
+    changes."""
+    with _write_buffers_lock:
+        write_buffer = _write_buffers.get(database)
+    return write_buffer.flush() if write_buffer is not None else 0
+
+
+def flush_all_write_buffers():
+    """This function flushes all write buffers. It is called automatically when the application shuts down, before
+    the connections are closed (functions registered with atexit run in reverse order)."""
+    with _write_buffers_lock:
+        write_buffers = list(_write_buffers.values())
+    for write_buffer in write_buffers:
+        write_buffer.flush()
+
+
+atexit.register(flush_all_write_buffers)